@@ -2,6 +2,7 @@
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from service_marketplace.admin_tools import FastChangeListMixin
 from .models import User, UserProfile
 
 # Inline profile editing on the User admin page
@@ -12,12 +13,16 @@ class UserProfileInline(admin.StackedInline):
     fk_name = 'user'
 
 @admin.register(User)
-class CustomUserAdmin(BaseUserAdmin):
+class CustomUserAdmin(FastChangeListMixin, BaseUserAdmin):
     inlines = (UserProfileInline,)
     
     # Add custom fields to the list display
     list_display = BaseUserAdmin.list_display + ('is_seller', 'is_client')
     list_filter = BaseUserAdmin.list_filter + ('is_seller', 'is_client')
+    # Prefix/exact matches use the username/email indexes (migration 0002)
+    # instead of scanning four columns with icontains. Also backs the user
+    # autocomplete widgets of the other admins.
+    search_fields = ('^username', '=email')
 
     # Add custom fields to the user editing page
     fieldsets = BaseUserAdmin.fieldsets + (
@@ -31,6 +36,8 @@ class CustomUserAdmin(BaseUserAdmin):
         return super().get_inline_instances(request, obj)
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('user', 'full_name', 'bio', 'profile_image')
-    search_fields = ('user__username', 'full_name')
\ No newline at end of file
+    list_select_related = ('user',)
+    search_fields = ('^user__username', '^full_name')
+    raw_id_fields = ('user',)
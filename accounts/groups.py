@@ -0,0 +1,32 @@
+# accounts/groups.py
+
+from django.contrib.auth.models import Group
+from django.db import transaction
+
+from invalidation.bus import poll, subscribe
+
+_group_ids = {}
+
+
+def role_group_id(name):
+    """
+    Id of the role group `name` ('Seller', 'Client'), created on first use.
+    Remembered per process, so registering a user doesn't look it up again;
+    forgotten when any process changes a group (invalidation bus). The id
+    is only remembered once the caller's transaction commits (at once
+    outside one): the group may have been created in it, and a rollback
+    would leave an id every later registration fails on.
+    """
+    group_id = _group_ids.get(name)
+    if group_id is None:
+        poll()
+        group_id = Group.objects.get_or_create(name=name)[0].pk
+        transaction.on_commit(lambda: _group_ids.setdefault(name, group_id))
+    return group_id
+
+
+def _forget(keys):
+    _group_ids.clear()
+
+
+subscribe('auth.Group', _forget)
@@ -0,0 +1,18 @@
+# Case-insensitive search indexes for the admin (PostgreSQL only)
+
+from django.db import migrations
+
+from service_marketplace.migration_operations import upper_like_index
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        upper_like_index("user_username_upper_idx", "accounts_user", "username"),
+        upper_like_index("user_email_upper_idx", "accounts_user", "email"),
+    ]
@@ -0,0 +1,18 @@
+# Trigram index for the typo-tolerant seller search (PostgreSQL only)
+
+from django.db import migrations
+
+from service_marketplace.migration_operations import trigram_extension, trigram_index
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0002_user_search_indexes"),
+    ]
+
+    operations = [
+        trigram_extension(),
+        trigram_index("user_username_trgm_idx", "accounts_user", "username"),
+    ]
@@ -1,9 +1,13 @@
 # accounts/models.py
 
 from django.contrib.auth.models import AbstractUser, Group
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from invalidation.bus import publish_instance
+from service_marketplace import nplusone
+from service_marketplace.cache_tools import mark_stale
+from .groups import role_group_id
 
 # 1. Custom User Model
 class User(AbstractUser):
@@ -30,7 +34,7 @@ class UserProfile(models.Model):
     """
     Holds extra profile information not directly on the User model.
     """
-    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
+    user = nplusone.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     full_name = models.CharField(max_length=150, blank=True)
     bio = models.TextField(blank=True, max_length=500)
     profile_image = models.ImageField(
@@ -39,6 +43,9 @@ class UserProfile(models.Model):
         blank=True
     )
     
+    # Tracks objects fetched together (service_marketplace/nplusone.py)
+    objects = nplusone.TrackedManager()
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
@@ -51,13 +58,32 @@ def create_user_profile_and_assign_group(sender, instance, created, **kwargs):
 
         # Assign User to Client/Seller Group
         if instance.is_seller:
-            group, _ = Group.objects.get_or_create(name='Seller')
-            instance.groups.add(group)
+            instance.groups.add(role_group_id('Seller'))
         elif instance.is_client:
-            group, _ = Group.objects.get_or_create(name='Client')
-            instance.groups.add(group)
+            instance.groups.add(role_group_id('Client'))
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     # Save the profile when the User is saved
-    instance.profile.save()
\ No newline at end of file
+    instance.profile.save()
+
+# 4. Signals for the cached public seller page (accounts/views.py)
+def _mark_seller_profile_stale(username):
+    from .views import seller_profile_key # Views import this module
+    key = seller_profile_key(username)
+    transaction.on_commit(lambda: mark_stale(key))
+
+@receiver(post_save, sender=UserProfile)
+def mark_seller_profile_stale_on_profile_save(sender, instance, **kwargs):
+    if instance.user.is_seller:
+        _mark_seller_profile_stale(instance.user.username)
+
+@receiver([post_save, post_delete], sender='services.Service')
+def mark_seller_profile_stale_on_service_change(sender, instance, **kwargs):
+    _mark_seller_profile_stale(instance.seller.username)
+
+# 5. Signals for the in-process role group ids (accounts/groups.py)
+@receiver([post_save, post_delete], sender=Group)
+def publish_group_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        publish_instance(instance)
@@ -1,3 +1,36 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from . import groups
+
+
+class RoleGroupIdTests(TransactionTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(groups, '_group_ids', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_remembered(self):
+        group_id = groups.role_group_id('Seller')
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.role_group_id('Seller'), group_id)
+
+    def test_group_found_in_a_rolled_back_transaction_is_forgotten(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            groups.role_group_id('Seller')
+            groups._group_ids.clear()
+            # Found, but created by the same transaction
+            groups.role_group_id('Seller')
+            raise RuntimeError
+        self.assertEqual(groups._group_ids, {})
+
+    def test_group_created_in_a_rolled_back_transaction_is_forgotten(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            groups.role_group_id('Seller')
+            raise RuntimeError
+        group_id = groups.role_group_id('Seller')
+        self.assertEqual(Group.objects.get(name='Seller').pk, group_id)
@@ -18,4 +18,7 @@ urlpatterns = [
     path('dashboard/seller/', views.seller_dashboard, name='seller_dashboard'),
     path('dashboard/client/', views.client_dashboard, name='client_dashboard'),
     path('profile/edit/', views.UserProfileUpdateView.as_view(), name='profile_update'),
+
+    # Public seller profile
+    path('sellers/<str:username>/', views.seller_profile, name='seller_profile'),
 ]
\ No newline at end of file
@@ -1,13 +1,16 @@
 # accounts/views.py
 
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.views import LoginView, LogoutView
 from django.views.generic import CreateView, UpdateView
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.contrib import messages
 from django.urls import reverse_lazy
+from django.conf import settings
+from service_marketplace.cache_tools import get_or_compute
 from orders.models import Order
+from analytics.rollups import SERIES_RANGES, response_time_label, seller_reputation, seller_totals
 from .forms import ClientRegistrationForm, SellerRegistrationForm, UserProfileForm
 from .models import User, UserProfile
 
@@ -79,20 +82,62 @@ def seller_dashboard(request):
         messages.error(request, "Access denied. You are not a seller.")
         return redirect('dashboard')
     
-    # Fetch seller specific stats
-    total_orders = Order.objects.filter(seller=request.user).count()
-    completed_orders = Order.objects.filter(seller=request.user, status='COMPLETED')
-    total_earnings = sum(order.price_at_order for order in completed_orders)
+    # Fetch seller specific stats from the daily rollups (the charts load
+    # their time series from analytics' JSON endpoint)
+    totals = seller_totals(request.user)
     
     context = {
         'user': request.user, 
         'dashboard_type': 'Seller',
-        'total_orders': total_orders,
-        'total_earnings': total_earnings,
-        'latest_orders': Order.objects.filter(seller=request.user).order_by('-created_at')[:5],
+        'total_orders': totals['total_orders'],
+        'total_earnings': totals['revenue'],
+        'average_rating': totals['average_rating'],
+        'pending_orders': totals['pending_orders'],
+        'in_progress_orders': totals['in_progress_orders'],
+        'completed_orders': totals['completed_orders'],
+        'cancelled_orders': totals['cancelled_orders'],
+        'series_ranges': SERIES_RANGES,
+        'latest_orders': Order.objects.filter(seller=request.user).select_related('service', 'client').order_by('-created_at')[:5],
     }
     return render(request, 'accounts/seller_dashboard.html', context)
 
+def seller_profile_key(username):
+    return f'seller_profile:{username}'
+
+def _seller_profile_data(username):
+    seller = get_object_or_404(
+        User.objects.select_related('profile', 'reputation'), username=username, is_seller=True
+    )
+    services = list(
+        seller.services.filter(is_active=True)
+        .select_related('category', 'rating_distribution')
+        .order_by('-created_at')
+    )
+    return seller, services
+
+def seller_profile(request, username):
+    """
+    Public seller page: profile, track record and active services. The
+    stats come from the seller's reputation row (kept current by the order,
+    review and message signals), loaded with the user in one query. Both
+    are cached per seller; profile and service saves mark them stale (see
+    accounts/models.py), so reputation figures may lag by up to
+    SELLER_PROFILE_CACHE_TIMEOUT.
+    """
+    seller, services = get_or_compute(
+        'seller_profile', seller_profile_key(username), lambda: _seller_profile_data(username),
+        settings.SELLER_PROFILE_CACHE_TIMEOUT,
+    )
+    reputation = seller_reputation(seller)
+
+    context = {
+        'seller': seller,
+        'reputation': reputation,
+        'response_time': response_time_label(reputation.average_response_seconds),
+        'services': services,
+    }
+    return render(request, 'accounts/seller_profile.html', context)
+
 @login_required
 def client_dashboard(request):
     if not request.user.is_client:
@@ -107,7 +152,7 @@ def client_dashboard(request):
         'user': request.user, 
         'dashboard_type': 'Client',
         'total_spent': total_spent,
-        'latest_orders': Order.objects.filter(client=request.user).order_by('-created_at')[:5],
+        'latest_orders': Order.objects.filter(client=request.user).select_related('service', 'seller').order_by('-created_at')[:5],
     }
     return render(request, 'accounts/client_dashboard.html', context)
 
@@ -0,0 +1,32 @@
+# analytics/admin.py
+
+from django.contrib import admin
+from service_marketplace.admin_tools import FastChangeListMixin, username_filter
+from .models import AppliedRollupBatch, SellerDailyStats, SellerReputation, ServiceDailyViews
+
+@admin.register(SellerDailyStats)
+class SellerDailyStatsAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('seller', 'day', 'completed_orders', 'completions', 'revenue', 'review_count')
+    list_select_related = ('seller',)
+    list_filter = (username_filter('seller'),)
+    date_hierarchy = 'day'
+    raw_id_fields = ('seller',)
+
+@admin.register(SellerReputation)
+class SellerReputationAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('seller', 'completions', 'review_count', 'rating_sum', 'responses')
+    list_select_related = ('seller',)
+    list_filter = (username_filter('seller'),)
+    raw_id_fields = ('seller',)
+
+@admin.register(ServiceDailyViews)
+class ServiceDailyViewsAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('service', 'day', 'views')
+    list_select_related = ('service',)
+    date_hierarchy = 'day'
+    raw_id_fields = ('service',)
+
+@admin.register(AppliedRollupBatch)
+class AppliedRollupBatchAdmin(admin.ModelAdmin):
+    list_display = ('batch', 'applied_at')
+    date_hierarchy = 'applied_at'
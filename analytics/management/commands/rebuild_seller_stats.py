@@ -0,0 +1,30 @@
+# analytics/management/commands/rebuild_seller_stats.py
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.rollups import rebuild_seller_stats
+
+
+class Command(BaseCommand):
+    help = "Recomputes the daily seller rollups from the raw orders and reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seller',
+            action='append',
+            dest='sellers',
+            metavar='USERNAME',
+            help="Only rebuild this seller's rows (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        sellers = None
+        if options['sellers']:
+            sellers = list(get_user_model().objects.filter(username__in=options['sellers']))
+            missing = set(options['sellers']) - {seller.username for seller in sellers}
+            if missing:
+                raise CommandError(f"Unknown sellers: {', '.join(sorted(missing))}")
+
+        count = rebuild_seller_stats(sellers)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily seller rollup rows."))
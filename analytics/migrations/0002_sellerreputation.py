@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_user_search_indexes"),
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SellerReputation",
+            fields=[
+                ("pending_orders", models.IntegerField(default=0)),
+                ("in_progress_orders", models.IntegerField(default=0)),
+                ("completed_orders", models.IntegerField(default=0)),
+                ("cancelled_orders", models.IntegerField(default=0)),
+                ("completions", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("review_count", models.IntegerField(default=0)),
+                ("rating_sum", models.IntegerField(default=0)),
+                ("responses", models.IntegerField(default=0)),
+                ("response_seconds", models.BigIntegerField(default=0)),
+                (
+                    "seller",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="reputation",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddField(
+            model_name="sellerdailystats",
+            name="response_seconds",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="sellerdailystats",
+            name="responses",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0003_service_daily_views"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AppliedRollupBatch",
+            fields=[
+                ("batch", models.UUIDField(primary_key=True, serialize=False)),
+                ("applied_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,159 @@
+# analytics/models.py
+
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from chat.models import Message
+from orders.models import Order
+from reviews.models import Review
+
+
+class SellerCounters(models.Model):
+    """
+    Counters shared by the daily rollups and the all-time reputation record.
+    """
+    # Orders by current status
+    pending_orders = models.IntegerField(default=0)
+    in_progress_orders = models.IntegerField(default=0)
+    completed_orders = models.IntegerField(default=0)
+    cancelled_orders = models.IntegerField(default=0)
+
+    # Completed orders and their revenue
+    completions = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    # Reviews received
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+
+    # Seller replies to client messages and the total wait before them
+    responses = models.IntegerField(default=0)
+    response_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class SellerDailyStats(SellerCounters):
+    """
+    One row per seller and day, kept up to date incrementally by the order
+    and review signals below, through the job queue (see analytics.rollups).
+
+    The status counters are bucketed by the day the order was *placed* and
+    track each order's current status, so summing a date range gives the
+    status breakdown of the orders placed in it. Revenue and completions are
+    bucketed by completion day, ratings by review day and response times by
+    the day of the seller's reply.
+    """
+    seller = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    day = models.DateField()
+
+    class Meta:
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['seller', 'day'], name='unique_seller_day_stats'),
+        ]
+
+    def __str__(self):
+        return f"{self.seller} on {self.day}"
+
+
+class SellerReputation(SellerCounters):
+    """
+    All-time totals of a seller's daily rollups, updated in the same
+    transaction as them (see analytics.rollups.apply_deltas). The public
+    seller profile and the dashboard summary read this single row.
+    """
+    seller = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='reputation'
+    )
+
+    def __str__(self):
+        return f"Reputation of {self.seller_id}"
+
+    @property
+    def total_orders(self):
+        return self.pending_orders + self.in_progress_orders + self.completed_orders + self.cancelled_orders
+
+    @property
+    def average_rating(self):
+        return round(self.rating_sum / self.review_count, 2) if self.review_count else None
+
+    @property
+    def average_response_seconds(self):
+        return self.response_seconds / self.responses if self.responses else None
+
+
+
+class AppliedRollupBatch(models.Model):
+    """
+    A batch of rollup deltas already applied, recorded in the same
+    transaction as its increments (see analytics.rollups.apply_deltas), so
+    a job run again after a crash or a stale lock never applies it twice.
+    """
+    batch = models.UUIDField(primary_key=True)
+    applied_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return str(self.batch)
+
+
+class ServiceDailyViews(models.Model):
+    """
+    Detail page views per service and day. Views are counted in memory per
+    process and added here in batches (see analytics.pageviews), so a
+    process that dies loses at most its last VIEW_COUNTS_FLUSH_SECONDS.
+    """
+    service = models.ForeignKey('services.Service', on_delete=models.CASCADE, related_name='daily_views')
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['service', 'day'], name='unique_service_day_views'),
+        ]
+
+    def __str__(self):
+        return f"{self.service_id} on {self.day}: {self.views}"
+
+# Order/review/message events queue their rollup deltas for the job worker.
+# analytics.rollups imports this module, hence the local imports.
+@receiver(post_save, sender=Order)
+def rollup_order_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    from .rollups import record_order_change
+    record_order_change(instance, created)
+
+@receiver(post_delete, sender=Order)
+def rollup_order_delete(sender, instance, **kwargs):
+    from .rollups import record_order_delete
+    record_order_delete(instance)
+
+@receiver(post_save, sender=Review)
+def rollup_review_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    from .rollups import record_review_change
+    record_review_change(instance, created)
+
+@receiver(post_delete, sender=Review)
+def rollup_review_delete(sender, instance, **kwargs):
+    from .rollups import record_review_delete
+    record_review_delete(instance)
+
+@receiver(post_save, sender=Message)
+def rollup_message_save(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    from .rollups import record_message
+    record_message(instance)
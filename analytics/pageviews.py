@@ -0,0 +1,155 @@
+# analytics/pageviews.py
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT ... ON CONFLICT statement
+FLUSH_BATCH_SIZE = 500
+
+# Responses that count as a view (304: the browser's copy was still current)
+COUNTED_STATUSES = (200, 304)
+
+
+# 1. Counting (in memory, per process)
+# A page view only bumps a dictionary entry. A background thread adds the
+# counts to ServiceDailyViews every VIEW_COUNTS_FLUSH_SECONDS, so no request
+# waits for a write and hot services don't serialize on their row.
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_flusher = None
+# Today's date and the timestamp of the next local midnight: converting the
+# current time to the local date on every view costs more than counting it
+_today = (None, 0)
+
+
+def _current_day():
+    global _today
+    day, until = _today
+    if time.time() >= until:
+        now = timezone.localtime()
+        day = now.date()
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        _today = (day, midnight.timestamp())
+    return day
+
+
+def record_view(slug):
+    """
+    Counts one view of the service with `slug` today.
+    """
+    day = _current_day()
+    with _pending_lock:
+        _pending[(slug, day)] += 1
+    if _flusher is None:
+        _start_flusher()
+
+
+def count_service_views(view_func):
+    """
+    Counts the views of a service detail view (slug in the URL kwargs). Put
+    it outside the catalog caches, so views served from the page cache or
+    answered with 304 count too. Works with both sync and async views.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapper(request, *args, **kwargs):
+            response = await view_func(request, *args, **kwargs)
+            if request.method == 'GET' and response.status_code in COUNTED_STATUSES:
+                record_view(kwargs['slug'])
+            return response
+
+        return _async_wrapper
+
+    @wraps(view_func)
+    def _wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if request.method == 'GET' and response.status_code in COUNTED_STATUSES:
+            record_view(kwargs['slug'])
+        return response
+
+    return _wrapper
+
+
+# 2. Flushing
+
+def _start_flusher():
+    global _flusher
+    with _pending_lock:
+        if _flusher is not None:
+            return
+        # Started on first use, so each forked server worker gets its own
+        _flusher = threading.Thread(target=_flush_periodically, name='pageview-flusher', daemon=True)
+        _flusher.start()
+    atexit.register(flush_views)
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(settings.VIEW_COUNTS_FLUSH_SECONDS)
+        flush_views()
+        # The thread's connection is not managed by the request cycle
+        connections.close_all()
+
+
+def flush_views():
+    """
+    Adds this process's pending view counts to ServiceDailyViews. Counts of
+    a failed flush are put back for the next one. Returns the number of
+    (service, day) rows written.
+    """
+    with _pending_lock:
+        counts = dict(_pending)
+        _pending.clear()
+    if not counts:
+        return 0
+    try:
+        return save_view_counts(counts)
+    except Exception:
+        logger.exception("Flushing service view counts failed")
+        with _pending_lock:
+            _pending.update(counts)
+        return 0
+
+
+def save_view_counts(counts):
+    """
+    Adds {(slug, day): views} to the per-day counters, with one upsert
+    statement per FLUSH_BATCH_SIZE rows that increments existing rows in
+    place. Slugs of deleted services are dropped.
+    """
+    from services.models import Service
+    from .models import ServiceDailyViews
+
+    ids = dict(Service.objects.filter(slug__in={slug for slug, _ in counts}).values_list('slug', 'pk'))
+    adapt_day = connection.ops.adapt_datefield_value
+    rows = [(ids[slug], adapt_day(day), views) for (slug, day), views in counts.items() if slug in ids]
+
+    meta = ServiceDailyViews._meta
+    quote = connection.ops.quote_name
+    table, service, day, views = (
+        quote(meta.db_table), quote(meta.get_field('service').column), quote('day'), quote('views'),
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+                batch = rows[start:start + FLUSH_BATCH_SIZE]
+                cursor.execute(
+                    f'INSERT INTO {table} ({service}, {day}, {views}) '
+                    f'VALUES {", ".join(["(%s, %s, %s)"] * len(batch))} '
+                    f'ON CONFLICT ({service}, {day}) DO UPDATE SET {views} = {table}.{views} + excluded.{views}',
+                    [value for row in batch for value in row],
+                )
+    return len(rows)
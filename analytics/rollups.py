@@ -0,0 +1,485 @@
+# analytics/rollups.py
+
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from chat.models import Message
+from jobs.models import Job
+from jobs.queue import enqueue
+from orders.models import Order
+from reviews.models import Review
+from services.models import Service
+from .models import AppliedRollupBatch, SellerDailyStats, SellerReputation
+
+# Order status -> counter column
+STATUS_FIELDS = {
+    'PENDING': 'pending_orders',
+    'IN_PROGRESS': 'in_progress_orders',
+    'COMPLETED': 'completed_orders',
+    'CANCELLED': 'cancelled_orders',
+}
+COUNTER_FIELDS = (
+    *STATUS_FIELDS.values(), 'completions', 'revenue', 'review_count', 'rating_sum',
+    'responses', 'response_seconds',
+)
+
+# Ranges served to the dashboard charts; the yearly one is bucketed by month
+SERIES_RANGES = (30, 90, 365)
+MONTHLY_SERIES_DAYS = 365
+
+REBUILD_BATCH_SIZE = 1000
+
+# Seconds between deletions of old AppliedRollupBatch rows
+PRUNE_INTERVAL = 3600
+_last_prune = 0
+
+# Batch ids of response time jobs are derived from the message id, so a
+# message is counted once however often its job runs
+RESPONSE_BATCH_NAMESPACE = uuid.UUID('5a0f3c1e-8d4b-4e6a-9c1f-2b7d8e9a0c41')
+
+
+# 1. Incremental updates (computed in the signal, applied by a job)
+
+def _day(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def _order_contribution(state):
+    """
+    Counter deltas one order adds to the rollups, keyed by (seller_id, day).
+    A completed order counts towards its completion day; orders completed
+    without a completion_date yet fall back to the time they were saved.
+    """
+    contribution = defaultdict(Counter)
+    contribution[(state['seller_id'], _day(state['created_at']))][STATUS_FIELDS[state['status']]] += 1
+    if state['status'] == 'COMPLETED':
+        completed_at = state['completion_date'] or state['updated_at']
+        bucket = contribution[(state['seller_id'], _day(completed_at))]
+        bucket['completions'] += 1
+        bucket['revenue'] += state['price_at_order']
+    return contribution
+
+
+def _diff(old, new):
+    deltas = defaultdict(Counter)
+    for key, counters in new.items():
+        deltas[key].update(counters)
+    for key, counters in old.items():
+        deltas[key].subtract(counters)
+    return {
+        key: {field: value for field, value in counters.items() if value}
+        for key, counters in deltas.items()
+    }
+
+
+def apply_deltas(deltas, batch=None):
+    """
+    Adds {(seller_id, day): {field: delta}} to the rollup rows and the
+    sellers' reputation totals, creating missing rows. Increments use F()
+    so concurrent updates don't clobber each other.
+
+    With a `batch` id the deltas are applied at most once: the id is
+    recorded in the same transaction, and a batch already recorded is
+    skipped. Returns whether the deltas were applied.
+    """
+    totals = defaultdict(Counter)
+    with transaction.atomic():
+        if batch is not None:
+            # Concurrent runs of one batch wait here for the first to commit
+            _, created = AppliedRollupBatch.objects.get_or_create(batch=batch)
+            if not created:
+                return False
+
+        for (seller_id, day), fields in deltas.items():
+            if not fields:
+                continue
+            stats, _ = SellerDailyStats.objects.get_or_create(seller_id=seller_id, day=day)
+            SellerDailyStats.objects.filter(pk=stats.pk).update(
+                **{field: F(field) + value for field, value in fields.items()}
+            )
+            totals[seller_id].update(fields)
+
+        for seller_id, fields in totals.items():
+            SellerReputation.objects.get_or_create(seller_id=seller_id)
+            SellerReputation.objects.filter(pk=seller_id).update(
+                **{field: F(field) + value for field, value in fields.items() if value}
+            )
+    return True
+
+
+def prune_applied_batches():
+    """
+    Forgets applied batches older than JOBS_KEEP_DONE_DAYS, long past any
+    retry of their job. Runs at most every PRUNE_INTERVAL seconds per
+    process.
+    """
+    global _last_prune
+    if time.monotonic() - _last_prune < PRUNE_INTERVAL:
+        return 0
+    _last_prune = time.monotonic()
+    cutoff = timezone.now() - timedelta(days=settings.JOBS_KEEP_DONE_DAYS)
+    return AppliedRollupBatch.objects.filter(applied_at__lt=cutoff).delete()[0]
+
+
+def serialize_deltas(deltas):
+    """
+    JSON-safe form of the deltas for the job queue: [seller_id, day, fields].
+    """
+    return [
+        [seller_id, day.isoformat(), {field: str(value) for field, value in fields.items()}]
+        for (seller_id, day), fields in deltas.items() if fields
+    ]
+
+
+def deserialize_deltas(rows):
+    return {
+        (seller_id, date.fromisoformat(day)): {
+            field: Decimal(value) if field == 'revenue' else int(value)
+            for field, value in fields.items()
+        }
+        for seller_id, day, fields in rows
+    }
+
+
+def queue_deltas(deltas):
+    """
+    Hands the deltas to the job worker (analytics.tasks), after the order
+    or review write commits, under a new batch id.
+    """
+    rows = serialize_deltas(deltas)
+    if rows:
+        enqueue('analytics.apply_rollup_deltas', batch=uuid.uuid4().hex, rows=rows)
+
+
+def record_order_change(order, created):
+    if created:
+        previous = {}
+    elif hasattr(order, '_loaded_state'):
+        previous = _order_contribution(order._loaded_state)
+    else:
+        # Loaded with deferred fields; `rebuild_seller_stats` repairs any drift
+        return
+    queue_deltas(_diff(previous, _order_contribution(order.tracked_state())))
+
+
+def record_order_delete(order):
+    state = getattr(order, '_loaded_state', None) or order.tracked_state()
+    queue_deltas(_diff(_order_contribution(state), {}))
+
+
+def _seller_id(review, service_id):
+    if service_id == review.service_id and Review.service.is_cached(review):
+        return review.service.seller_id
+    # Reviews deleted in bulk arrive without their service. Only the seller
+    # id is needed, not a full Service per review (which NPLUSONE_DETECTION
+    # reports as N+1 queries).
+    return Service.objects.filter(pk=service_id).values_list('seller_id', flat=True).first()
+
+
+def _review_contribution(review, service_id, rating):
+    """
+    Counter deltas a review with `rating` on service `service_id` adds to
+    the rollups of that service's seller.
+    """
+    key = (_seller_id(review, service_id), _day(review.created_at))
+    return {key: Counter(review_count=1, rating_sum=rating)}
+
+
+def _loaded_review(review):
+    # The stored service and rating (see Review.from_db), or None
+    if not hasattr(review, '_loaded_rating'):
+        return None
+    return review._loaded_service_id, review._loaded_rating
+
+
+def record_review_change(review, created):
+    current = (review.service_id, review.rating)
+    previous = None if created else _loaded_review(review)
+    if created:
+        queue_deltas(_diff({}, _review_contribution(review, *current)))
+    elif previous is not None and previous != current:
+        # A review moved to another service leaves the previous seller's rollups
+        queue_deltas(_diff(_review_contribution(review, *previous), _review_contribution(review, *current)))
+
+
+def record_review_delete(review):
+    previous = _loaded_review(review) or (review.service_id, review.rating)
+    queue_deltas(_diff(_review_contribution(review, *previous), {}))
+
+
+def response_seconds(message):
+    """
+    How long the seller took to answer, when `message` is their first reply
+    to one or more client messages: the time since the earliest of those
+    messages. None for client messages and follow-ups.
+    """
+    order = message.order
+    if message.sender_id != order.seller_id:
+        return None
+    earlier = Message.objects.filter(order_id=order.pk, timestamp__lt=message.timestamp)
+    last_reply = earlier.filter(sender_id=order.seller_id).aggregate(last=Max('timestamp'))['last']
+    waiting = earlier.filter(sender_id=order.client_id)
+    if last_reply is not None:
+        waiting = waiting.filter(timestamp__gt=last_reply)
+    asked_at = waiting.order_by('timestamp').values_list('timestamp', flat=True).first()
+    if asked_at is None:
+        return None
+    return int((message.timestamp - asked_at).total_seconds())
+
+
+def record_message(message):
+    """
+    Queues the response time of a seller's message for the job worker
+    (analytics.tasks): finding the client messages it answers takes a few
+    queries, kept off the chat write path. The order is cached by
+    Message.save.
+    """
+    if message.sender_id == message.order.seller_id:
+        enqueue('analytics.record_message_response', message_id=message.pk)
+
+
+def _response_batch(message_id):
+    return uuid.uuid5(RESPONSE_BATCH_NAMESPACE, str(message_id)).hex
+
+
+def apply_response(message_id):
+    """
+    Adds the response time of seller message `message_id` to the rollups,
+    at most once per message. Returns whether anything was applied.
+    """
+    message = Message.objects.select_related('order').filter(pk=message_id).first()
+    seconds = response_seconds(message) if message is not None else None
+    if seconds is None:
+        return False
+    deltas = {(message.sender_id, _day(message.timestamp)): {'responses': 1, 'response_seconds': seconds}}
+    return apply_deltas(deltas, batch=_response_batch(message_id))
+
+
+# 2. Reading
+
+def seller_reputation(seller):
+    """
+    The seller's reputation row, or an unsaved all-zero one for sellers
+    without any activity yet.
+    """
+    try:
+        return seller.reputation
+    except SellerReputation.DoesNotExist:
+        return SellerReputation(seller=seller)
+
+
+def seller_totals(seller):
+    """
+    All-time totals for the dashboard summary, read from the seller's
+    reputation row.
+    """
+    reputation = seller_reputation(seller)
+    totals = {field: getattr(reputation, field) for field in COUNTER_FIELDS}
+    totals['total_orders'] = reputation.total_orders
+    totals['average_rating'] = reputation.average_rating
+    return totals
+
+
+def response_time_label(seconds):
+    """
+    Rounded, human readable average response time ("within 3 hours").
+    """
+    if seconds is None:
+        return None
+    for unit, size in (('day', 86400), ('hour', 3600), ('minute', 60)):
+        if seconds >= size:
+            count = round(seconds / size)
+            return f"within {count} {unit}{'s' if count != 1 else ''}"
+    return "within a minute"
+
+
+def _average(rating_sum, review_count):
+    return round(rating_sum / review_count, 2) if review_count else None
+
+
+def seller_series(seller, days, today=None):
+    """
+    Chart data for the last `days` days: one point per day, or per month
+    for the yearly range. Days without activity are filled with zeros.
+    """
+    today = today or timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = SellerDailyStats.objects.filter(seller=seller, day__gte=start, day__lte=today)
+
+    monthly = days >= MONTHLY_SERIES_DAYS
+    if monthly:
+        labels = []
+        month = start.replace(day=1)
+        while month <= today:
+            labels.append(month.strftime('%Y-%m'))
+            month = (month + timedelta(days=32)).replace(day=1)
+    else:
+        labels = [(start + timedelta(days=offset)).isoformat() for offset in range(days)]
+
+    buckets = {label: Counter() for label in labels}
+    status_totals = Counter()
+    for row in rows.values('day', *COUNTER_FIELDS):
+        label = row['day'].strftime('%Y-%m') if monthly else row['day'].isoformat()
+        buckets[label].update({field: row[field] for field in COUNTER_FIELDS})
+        status_totals.update({status: row[field] for status, field in STATUS_FIELDS.items()})
+
+    return {
+        'days': days,
+        'bucket': 'month' if monthly else 'day',
+        'labels': labels,
+        'revenue': [float(buckets[label]['revenue']) for label in labels],
+        'completions': [buckets[label]['completions'] for label in labels],
+        'orders': [
+            sum(buckets[label][field] for field in STATUS_FIELDS.values()) for label in labels
+        ],
+        'average_rating': [
+            _average(buckets[label]['rating_sum'], buckets[label]['review_count']) for label in labels
+        ],
+        'status_totals': {status: status_totals[status] for status in STATUS_FIELDS},
+    }
+
+
+# 3. Full rebuild
+
+def rebuild_seller_stats(sellers=None):
+    """
+    Recomputes the rollups from the raw orders and reviews with grouped
+    queries (and one pass over the messages for response times), along with
+    the sellers' reputation totals. Used to backfill the tables and to
+    repair drift; the signals keep them current afterwards. Returns the
+    number of daily rows written.
+
+    The raw rows already include the changes whose deltas are still queued,
+    so those deltas are dropped for the rebuilt sellers first (see
+    `_drop_queued_deltas`).
+    """
+    with transaction.atomic():
+        _drop_queued_deltas(sellers)
+        return _rebuild(sellers)
+
+
+def _rebuild(sellers):
+    orders = Order.objects.order_by()
+    reviews = Review.objects.order_by()
+    messages = Message.objects.all()
+    stats = SellerDailyStats.objects.all()
+    reputations = SellerReputation.objects.all()
+    if sellers is not None:
+        orders = orders.filter(seller__in=sellers)
+        reviews = reviews.filter(service__seller__in=sellers)
+        messages = messages.filter(order__seller__in=sellers)
+        stats = stats.filter(seller__in=sellers)
+        reputations = reputations.filter(seller__in=sellers)
+
+    rollups = defaultdict(Counter)
+    placed = orders.values('seller_id', 'status', day=TruncDate('created_at')).annotate(count=Count('id'))
+    for row in placed:
+        rollups[(row['seller_id'], row['day'])][STATUS_FIELDS[row['status']]] += row['count']
+
+    completed = (
+        orders.filter(status='COMPLETED')
+        .values('seller_id', day=TruncDate(Coalesce('completion_date', 'updated_at')))
+        .annotate(count=Count('id'), revenue=Sum('price_at_order'))
+    )
+    for row in completed:
+        bucket = rollups[(row['seller_id'], row['day'])]
+        bucket['completions'] += row['count']
+        bucket['revenue'] += row['revenue'] or Decimal('0')
+
+    reviewed = (
+        reviews.values(seller_id=F('service__seller_id'), day=TruncDate('created_at'))
+        .annotate(count=Count('id'), ratings=Sum('rating'))
+    )
+    for row in reviewed:
+        bucket = rollups[(row['seller_id'], row['day'])]
+        bucket['review_count'] += row['count']
+        bucket['rating_sum'] += row['ratings'] or 0
+
+    for (seller_id, day), seconds in _replay_responses(messages):
+        bucket = rollups[(seller_id, day)]
+        bucket['responses'] += 1
+        bucket['response_seconds'] += seconds
+
+    totals = defaultdict(Counter)
+    for (seller_id, _), counters in rollups.items():
+        totals[seller_id].update(counters)
+
+    stats.delete()
+    reputations.delete()
+    SellerDailyStats.objects.bulk_create(
+        [
+            SellerDailyStats(seller_id=seller_id, day=day, **counters)
+            for (seller_id, day), counters in rollups.items()
+        ],
+        batch_size=REBUILD_BATCH_SIZE,
+    )
+    SellerReputation.objects.bulk_create(
+        [SellerReputation(seller_id=seller_id, **counters) for seller_id, counters in totals.items()],
+        batch_size=REBUILD_BATCH_SIZE,
+    )
+    return len(rollups)
+
+
+def _drop_queued_deltas(sellers):
+    """
+    Records the batches of the rollup jobs still queued or running as
+    applied, so they add nothing on top of a rebuild of `sellers` (None:
+    all of them). Their deltas for other sellers are queued again under a
+    new batch; response times of messages to other sellers are left queued.
+    """
+    seller_ids = None if sellers is None else {seller.pk for seller in sellers}
+    pending = Job.objects.filter(status__in=[Job.QUEUED, Job.RUNNING])
+
+    batches, kept = [], defaultdict(Counter)
+    for kwargs in pending.filter(name='analytics.apply_rollup_deltas').values_list('kwargs', flat=True):
+        if kwargs.get('batch') is None:
+            continue
+        batches.append(kwargs['batch'])
+        for (seller_id, day), fields in deserialize_deltas(kwargs['rows']).items():
+            if seller_ids is not None and seller_id not in seller_ids:
+                kept[(seller_id, day)].update(fields)
+
+    message_ids = [
+        kwargs['message_id']
+        for kwargs in pending.filter(name='analytics.record_message_response').values_list('kwargs', flat=True)
+    ]
+    responses = Message.objects.filter(pk__in=message_ids)
+    if seller_ids is not None:
+        responses = responses.filter(order__seller__in=seller_ids)
+    batches += [_response_batch(message_id) for message_id in responses.values_list('pk', flat=True)]
+
+    AppliedRollupBatch.objects.bulk_create(
+        [AppliedRollupBatch(batch=batch) for batch in batches], ignore_conflicts=True,
+    )
+    queue_deltas(kept)
+
+
+def _replay_responses(messages):
+    """
+    Yields ((seller_id, day), seconds) for every seller reply, walking each
+    thread in order with the same rule as `response_seconds`.
+    """
+    rows = (
+        messages.order_by('order_id', 'timestamp', 'pk')
+        .values_list('order_id', 'sender_id', 'timestamp', 'order__seller_id')
+        .iterator(chunk_size=REBUILD_BATCH_SIZE)
+    )
+    current_order, asked_at = None, None
+    for order_id, sender_id, timestamp, seller_id in rows:
+        if order_id != current_order:
+            current_order, asked_at = order_id, None
+        if sender_id != seller_id:
+            asked_at = asked_at or timestamp
+        elif asked_at is not None:
+            yield (seller_id, _day(timestamp)), int((timestamp - asked_at).total_seconds())
+            asked_at = None
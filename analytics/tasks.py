@@ -0,0 +1,25 @@
+# analytics/tasks.py
+
+from jobs.queue import task
+from .rollups import apply_deltas, apply_response, deserialize_deltas, prune_applied_batches
+
+
+@task()
+def apply_rollup_deltas(rows, batch=None):
+    """
+    Applies counter deltas computed by the order/review signals. Runs in one
+    transaction that also records `batch`, so a job run again (retried
+    after a crash past the commit, or requeued by a stale lock) applies
+    nothing twice.
+    """
+    apply_deltas(deserialize_deltas(rows), batch=batch)
+    prune_applied_batches()
+
+
+@task()
+def record_message_response(message_id):
+    """
+    Adds the response time of a seller's chat message to the rollups
+    (queued by the Message signal in analytics/models.py).
+    """
+    apply_response(message_id)
@@ -0,0 +1,140 @@
+import uuid
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+
+from accounts.models import User
+from chat.models import Message
+from jobs.models import Job
+from jobs.queue import get_task
+from orders.models import Order
+from reviews.models import Review
+from services.models import Category, Service
+from .models import SellerDailyStats, SellerReputation
+from .rollups import apply_deltas, rebuild_seller_stats, serialize_deltas
+from .tasks import apply_rollup_deltas
+
+
+class ApplyRollupDeltasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', is_seller=True)
+        cls.deltas = {(cls.seller.pk, date(2026, 1, 5)): {'review_count': 1, 'rating_sum': 4}}
+
+    def counters(self):
+        stats = SellerDailyStats.objects.get(seller=self.seller)
+        reputation = SellerReputation.objects.get(seller=self.seller)
+        return stats.review_count, stats.rating_sum, reputation.review_count, reputation.rating_sum
+
+    def test_batch_applied_once(self):
+        batch = uuid.uuid4().hex
+        self.assertTrue(apply_deltas(self.deltas, batch=batch))
+        self.assertFalse(apply_deltas(self.deltas, batch=batch))
+        self.assertEqual(self.counters(), (1, 4, 1, 4))
+
+    def test_job_run_twice_applies_once(self):
+        # E.g. the worker died after the commit, and the stale job was requeued
+        rows = serialize_deltas(self.deltas)
+        batch = uuid.uuid4().hex
+        apply_rollup_deltas(rows=rows, batch=batch)
+        apply_rollup_deltas(rows=rows, batch=batch)
+        self.assertEqual(self.counters(), (1, 4, 1, 4))
+
+    def test_failed_batch_not_recorded(self):
+        batch = uuid.uuid4().hex
+        with mock.patch.object(SellerReputation.objects, 'get_or_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                apply_deltas(self.deltas, batch=batch)
+        self.assertFalse(SellerDailyStats.objects.exists())
+        # The retry applies it
+        self.assertTrue(apply_deltas(self.deltas, batch=batch))
+        self.assertEqual(self.counters(), (1, 4, 1, 4))
+
+    def test_separate_batches_add_up(self):
+        apply_deltas(self.deltas, batch=uuid.uuid4().hex)
+        apply_deltas(self.deltas, batch=uuid.uuid4().hex)
+        self.assertEqual(self.counters(), (2, 8, 2, 8))
+
+
+class RollupEventTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user('client', 'client@example.com', 'pw')
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', is_seller=True, is_client=False)
+        cls.other_seller = User.objects.create_user('other', 'other@example.com', 'pw', is_seller=True, is_client=False)
+        category = Category.objects.create(name='Web', slug='web')
+        cls.service = Service.objects.create(
+            seller=cls.seller, category=category, title='Web developer', slug='web-developer',
+            description='Sites', price=100,
+        )
+        cls.other_service = Service.objects.create(
+            seller=cls.other_seller, category=category, title='Logo design', slug='logo-design',
+            description='Marks', price=50,
+        )
+
+    def create(self, model, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return model.objects.create(**fields)
+
+    def run_jobs(self):
+        # What the worker does, inside the test transaction
+        for job in Job.objects.filter(status=Job.QUEUED).order_by('pk'):
+            get_task(job.name)(**job.kwargs)
+            Job.objects.filter(pk=job.pk).update(status=Job.DONE)
+
+    def reputation(self, seller):
+        reputation = SellerReputation.objects.filter(seller=seller).first() or SellerReputation(seller=seller)
+        return reputation.review_count, reputation.rating_sum, reputation.responses, reputation.response_seconds
+
+    def review(self, rating=4):
+        order = self.create(
+            Order, client=self.client_user, seller=self.seller, service=self.service, status='COMPLETED',
+        )
+        return self.create(Review, service=self.service, client=self.client_user, order=order, rating=rating)
+
+    def test_response_time_computed_by_the_worker_once(self):
+        order = self.create(Order, client=self.client_user, seller=self.seller, service=self.service)
+        question = self.create(Message, order=order, sender=self.client_user, text='Hello?')
+        answer = self.create(Message, order=order, sender=self.seller, text='Hi!')
+        Message.objects.filter(pk=question.pk).update(timestamp=answer.timestamp - timedelta(minutes=5))
+        jobs = Job.objects.filter(name='analytics.record_message_response')
+        self.assertEqual([job.kwargs for job in jobs], [{'message_id': answer.pk}])
+
+        self.run_jobs()
+        # Run again, e.g. after the worker died past the commit
+        jobs.update(status=Job.QUEUED)
+        self.run_jobs()
+        self.assertEqual(self.reputation(self.seller), (0, 0, 1, 300))
+
+    def test_review_moved_to_another_seller(self):
+        review = self.review(rating=4)
+        self.run_jobs()
+        review = Review.objects.get(pk=review.pk)
+        review.service = self.other_service
+        with self.captureOnCommitCallbacks(execute=True):
+            review.save()
+        self.run_jobs()
+        self.assertEqual(self.reputation(self.seller), (0, 0, 0, 0))
+        self.assertEqual(self.reputation(self.other_seller), (1, 4, 0, 0))
+
+    def test_rebuild_drops_queued_deltas(self):
+        self.review(rating=5)
+        rebuild_seller_stats()
+        self.run_jobs()
+        self.assertEqual(self.reputation(self.seller), (1, 5, 0, 0))
+
+    def test_partial_rebuild_keeps_queued_deltas_of_other_sellers(self):
+        review = self.review(rating=3)
+        self.run_jobs()
+        review = Review.objects.get(pk=review.pk)
+        review.service = self.other_service
+        with self.captureOnCommitCallbacks(execute=True):
+            review.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_seller_stats([self.seller])
+        self.run_jobs()
+        self.assertEqual(self.reputation(self.seller), (0, 0, 0, 0))
+        self.assertEqual(self.reputation(self.other_seller), (1, 3, 0, 0))
@@ -0,0 +1,8 @@
+# analytics/urls.py
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('seller/series/', views.seller_series_view, name='seller_series'),
+]
@@ -0,0 +1,22 @@
+# analytics/views.py
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+
+from .rollups import SERIES_RANGES, seller_series
+
+
+@login_required
+def seller_series_view(request):
+    """
+    JSON time series (revenue, orders, ratings, status breakdown) for the
+    current seller's dashboard charts. `?days=` is one of SERIES_RANGES.
+    """
+    if not request.user.is_seller:
+        return JsonResponse({'error': 'Only sellers have earnings analytics.'}, status=403)
+
+    days = request.GET.get('days', str(SERIES_RANGES[0]))
+    if not days.isdigit() or int(days) not in SERIES_RANGES:
+        return JsonResponse({'error': f'days must be one of {list(SERIES_RANGES)}.'}, status=400)
+
+    return JsonResponse(seller_series(request.user, int(days)))
@@ -1,3 +1,15 @@
+# chat/admin.py
+
 from django.contrib import admin
+from service_marketplace.admin_tools import FastChangeListMixin, username_filter
+from .models import Message
 
-# Register your models here.
+@admin.register(Message)
+class MessageAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('order', 'sender', 'receiver', 'timestamp', 'is_read')
+    # Message.__str__/Order.__str__ follow order -> service
+    list_select_related = ('order__service', 'sender', 'receiver')
+    list_filter = ('is_read', username_filter('sender'))
+    search_fields = ('=order__order_ref', '^sender__username')
+    autocomplete_fields = ('sender', 'receiver')
+    raw_id_fields = ('order',)
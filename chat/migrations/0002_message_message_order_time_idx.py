@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0001_initial"),
+        ("orders", "0003_order_ref_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["order", "timestamp"], name="message_order_time_idx"
+            ),
+        ),
+    ]
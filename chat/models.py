@@ -3,29 +3,33 @@
 from django.db import models
 from django.conf import settings
 from orders.models import Order
+from service_marketplace import nplusone
 
 class Message(models.Model):
     """
     Represents a single private message within an Order thread.
     """
     # Foreign Keys
-    order = models.ForeignKey(
+    order = nplusone.ForeignKey(
         Order, 
         on_delete=models.CASCADE, 
         related_name='messages' # Allows accessing messages from order.messages.all()
     )
-    sender = models.ForeignKey(
+    sender = nplusone.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE, 
         related_name='sent_messages'
     )
     # Receiver is not strictly necessary for a 1:1 chat, but useful for integrity checks
-    receiver = models.ForeignKey(
+    receiver = nplusone.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE, 
         related_name='received_messages'
     )
 
+    # Tracks objects fetched together (service_marketplace/nplusone.py)
+    objects = nplusone.TrackedManager()
+
     # Core Fields
     text = models.TextField()
     
@@ -35,6 +39,10 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Threads are read (and response times computed) per order in time order
+            models.Index(fields=['order', 'timestamp'], name='message_order_time_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username} in Order {self.order.order_ref}"
@@ -1,3 +1,36 @@
+from django.templatetags.static import static
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import User
+from orders.models import Order
+from services.models import Category, Service
+
+from .models import Message
+
+
+class OrderThreadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user('client', 'client@example.com', 'pw')
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', is_seller=True, is_client=False)
+        # The client has no profile image, the seller keeps the default one
+        cls.client_user.profile.profile_image = ''
+        cls.client_user.profile.save()
+        category = Category.objects.create(name='Web', slug='web')
+        service = Service.objects.create(
+            seller=cls.seller, category=category, title='Web developer', slug='web-developer',
+            description='Sites', price=100,
+        )
+        cls.order = Order.objects.create(client=cls.client_user, seller=cls.seller, service=service)
+        for sender in [cls.client_user, cls.seller, cls.client_user]:
+            Message.objects.create(order=cls.order, sender=sender, text=f'From {sender.username}')
+
+    def test_thread_rendered_with_avatars(self):
+        self.client.force_login(self.client_user)
+        response = self.client.get(reverse('order_detail', kwargs={'pk': self.order.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'From seller')
+        # The navbar and the client's two messages
+        self.assertContains(response, static('img/default_avatar.png'), count=3)
@@ -0,0 +1,10 @@
+# invalidation/admin.py
+
+from django.contrib import admin
+from .models import InvalidationEvent
+
+@admin.register(InvalidationEvent)
+class InvalidationEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'topic', 'key', 'created_at')
+    list_filter = ('topic',)
+    date_hierarchy = 'created_at'
@@ -0,0 +1,147 @@
+# invalidation/bus.py
+
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Handlers of every topic, and the key of "everything of a topic"
+ALL_TOPICS = '*'
+
+_handlers = defaultdict(list)
+_transport = None
+_transport_lock = threading.Lock()
+_poll_lock = threading.Lock()
+_last_poll = None
+# Versions published by this process, already applied here. Forgotten in
+# bulk past MAX_PUBLISHED (in processes that never poll, such as the job
+# worker); handlers are idempotent, so at worst they run twice.
+_published = set()
+MAX_PUBLISHED = 10000
+
+
+# 1. Subscribing
+
+def subscribe(topic, handler):
+    """
+    Calls `handler(keys)` whenever rows of `topic` (a model label such as
+    'services.Category') change in any process: `keys` is the set of
+    changed primary keys as strings, or None when everything of the topic
+    must be dropped. Handlers of ALL_TOPICS receive every change.
+
+    Handlers run in the publishing process right after the commit and in
+    the others on their next poll, so they should be quick and idempotent:
+    drop or reload the affected entries.
+    """
+    if handler not in _handlers[topic]:
+        _handlers[topic].append(handler)
+
+
+def _dispatch(changes):
+    """
+    Runs the handlers for {topic: set of keys}; a None key stands for the
+    whole topic.
+    """
+    for topic, keys in changes.items():
+        for handler in _handlers.get(topic, []) + _handlers.get(ALL_TOPICS, []):
+            try:
+                handler(None if None in keys else set(keys))
+            except Exception:
+                # One broken cache must not keep the others stale
+                logger.exception("Invalidation handler %r failed for %s", handler, topic)
+
+
+def invalidate_all():
+    """
+    Tells every handler of this process to drop everything, e.g. between
+    tests (a rolled back transaction publishes nothing) or after restoring
+    the database.
+    """
+    _dispatch({topic: {None} for topic in list(_handlers) if topic != ALL_TOPICS})
+
+
+# 2. Publishing
+
+def get_transport():
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = import_string(settings.INVALIDATION_TRANSPORT)()
+    return _transport
+
+
+def publish(topic, key=None):
+    """
+    Announces a change of row `key` of `topic` (None: all of them) once the
+    current transaction commits. The local handlers run at once; other
+    processes pick the event up within INVALIDATION_POLL_INTERVAL.
+    """
+    key = '' if key is None else str(key)
+
+    def send():
+        try:
+            if len(_published) >= MAX_PUBLISHED:
+                _published.clear()
+            _published.add(get_transport().publish(topic, key))
+        except Exception:
+            logger.exception("Publishing the invalidation of %s %s failed", topic, key or '*')
+        _dispatch({topic: {key or None}})
+
+    transaction.on_commit(send)
+
+
+def publish_instance(instance):
+    publish(instance._meta.label, instance.pk)
+
+
+# 3. Receiving
+
+def poll_due():
+    """
+    Whether the next poll() would reach the transport.
+    """
+    return _last_poll is None or time.monotonic() - _last_poll >= settings.INVALIDATION_POLL_INTERVAL
+
+
+def poll(force=False):
+    """
+    Applies the changes published by other processes since the last poll.
+    Cheap to call often: at most one poll per INVALIDATION_POLL_INTERVAL
+    reaches the transport, and only one thread at a time. Returns the
+    number of events received. When the transport reports lost events,
+    every handler is told to drop everything.
+
+    Caches call it before loading from the database: the first poll of a
+    process only records the current version, so changes committed after
+    the load are not missed.
+    """
+    global _last_poll
+    if not force and not poll_due():
+        return 0
+    if not _poll_lock.acquire(blocking=False):
+        return 0
+    try:
+        _last_poll = time.monotonic()
+        events, complete = get_transport().receive()
+    finally:
+        _poll_lock.release()
+
+    if not complete:
+        logger.warning("Invalidation events were lost, dropping every in-process cache")
+        invalidate_all()
+        return len(events)
+    changes = defaultdict(set)
+    for version, topic, key in events:
+        if version in _published:
+            _published.discard(version)
+            continue
+        changes[topic].add(key or None)
+    _dispatch(changes)
+    return len(events)
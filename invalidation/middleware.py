@@ -0,0 +1,40 @@
+# invalidation/middleware.py
+
+import logging
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.decorators import sync_and_async_middleware
+
+from .bus import poll, poll_due
+
+logger = logging.getLogger(__name__)
+
+
+@sync_and_async_middleware
+def invalidation_middleware(get_response):
+    """
+    Applies the changes other processes published before handling the
+    request, so in-process caches lag the database by at most
+    INVALIDATION_POLL_INTERVAL seconds. Under ASGI the poll (a query with
+    the database transport) runs in a thread, and only when one is due.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if poll_due():
+                try:
+                    await sync_to_async(poll)()
+                except Exception:
+                    logger.exception("Polling the invalidation bus failed")
+            return await get_response(request)
+
+        return middleware
+
+    def middleware(request):
+        try:
+            poll()
+        except Exception:
+            # Serve from the caches as they are rather than fail the request
+            logger.exception("Polling the invalidation bus failed")
+        return get_response(request)
+
+    return middleware
@@ -0,0 +1,19 @@
+# invalidation/models.py
+
+from django.db import models
+
+
+class InvalidationEvent(models.Model):
+    """
+    One change published on the invalidation bus (invalidation/bus.py) by
+    the database transport. The id is the event's version: every process
+    reads the events past the last version it has seen.
+    """
+    # Model label of the changed data ('services.Category')
+    topic = models.CharField(max_length=100)
+    # Primary key of the changed row; blank for "everything of the topic"
+    key = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.topic} {self.key or '*'} (v{self.pk})"
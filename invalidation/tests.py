@@ -0,0 +1,96 @@
+from collections import defaultdict
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from . import bus
+from .middleware import invalidation_middleware
+from .models import InvalidationEvent
+from .transports import DatabaseTransport
+
+
+@override_settings(INVALIDATION_TRANSPORT='invalidation.transports.DatabaseTransport')
+class BusTests(TestCase):
+
+    def setUp(self):
+        self.received = []
+        patchers = [
+            mock.patch.object(bus, '_handlers', defaultdict(list)),
+            mock.patch.object(bus, '_transport', DatabaseTransport()),
+            mock.patch.object(bus, '_last_poll', None),
+            mock.patch.object(bus, '_published', set()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        bus.subscribe('services.Category', self.received.append)
+        # Baseline: the first poll only records the current version
+        bus.poll(force=True)
+
+    def publish_elsewhere(self, topic, key=''):
+        # What another process's publish leaves in the database
+        return InvalidationEvent.objects.create(topic=topic, key=key)
+
+    def test_publish_runs_local_handlers_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bus.publish('services.Category', 3)
+            self.assertEqual(self.received, [])
+        self.assertEqual(self.received, [{'3'}])
+        # Not applied a second time when the event comes back on the next poll
+        bus.poll(force=True)
+        self.assertEqual(self.received, [{'3'}])
+
+    def test_poll_delivers_other_processes_events(self):
+        self.publish_elsewhere('services.Category', '1')
+        self.publish_elsewhere('services.Category', '2')
+        self.publish_elsewhere('services.Service', '1')
+        self.assertEqual(bus.poll(force=True), 3)
+        self.assertEqual(self.received, [{'1', '2'}])
+
+    def test_whole_topic(self):
+        self.publish_elsewhere('services.Category')
+        bus.poll(force=True)
+        self.assertEqual(self.received, [None])
+
+    def test_poll_is_rate_limited(self):
+        self.publish_elsewhere('services.Category', '1')
+        with override_settings(INVALIDATION_POLL_INTERVAL=60):
+            self.assertFalse(bus.poll_due())
+            self.assertEqual(bus.poll(), 0)
+        self.assertEqual(self.received, [])
+
+    def test_lost_events_drop_everything(self):
+        with override_settings(INVALIDATION_KEEP_SECONDS=0), self.assertLogs('invalidation.bus', 'WARNING'):
+            bus.poll(force=True)
+        self.assertEqual(self.received, [None])
+
+    def test_broken_handler_does_not_stop_the_others(self):
+        def broken(keys):
+            raise RuntimeError
+        bus._handlers['services.Category'].insert(0, broken)
+        self.publish_elsewhere('services.Category', '1')
+        with self.assertLogs('invalidation.bus', 'ERROR'):
+            bus.poll(force=True)
+        self.assertEqual(self.received, [{'1'}])
+
+
+class MiddlewareTests(TestCase):
+
+    def test_sync(self):
+        with mock.patch('invalidation.middleware.poll') as poll:
+            response = invalidation_middleware(lambda request: HttpResponse())(RequestFactory().get('/'))
+        self.assertEqual(response.status_code, 200)
+        poll.assert_called_once_with()
+
+    async def test_async_polls_outside_the_event_loop(self):
+        async def view(request):
+            return HttpResponse()
+
+        middleware = invalidation_middleware(view)
+        with mock.patch.object(bus, '_last_poll', None), \
+                mock.patch.object(bus, '_transport', DatabaseTransport()):
+            # The database transport queries: SynchronousOnlyOperation if run in the loop
+            with self.assertNoLogs('invalidation.middleware'):
+                response = await middleware(RequestFactory().get('/'))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,139 @@
+# invalidation/transports.py
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class Transport:
+    """
+    Carries invalidation events between processes. `publish` sends one
+    event and returns its version; `receive` returns the events published
+    since the previous call as [(version, topic, key), ...] and whether
+    that list is complete. When it is not (events were lost), the bus
+    invalidates everything.
+    """
+
+    def publish(self, topic, key):
+        raise NotImplementedError
+
+    def receive(self):
+        raise NotImplementedError
+
+
+# 1. Database (default): events are rows, read by polling
+
+class DatabaseTransport(Transport):
+    """
+    Stores events as InvalidationEvent rows. Every receive is one indexed
+    query for the rows past the last id seen. Rows older than
+    INVALIDATION_KEEP_SECONDS are deleted every PRUNE_INTERVAL seconds by
+    whichever process publishes; a process that has not received for that
+    long may have missed some and reports its list incomplete.
+    """
+    PRUNE_INTERVAL = 300
+
+    def __init__(self):
+        self.last_id = None
+        self.last_receive = None
+        self.last_prune = 0
+
+    def publish(self, topic, key):
+        from .models import InvalidationEvent
+
+        event = InvalidationEvent.objects.create(topic=topic, key=key)
+        if time.monotonic() - self.last_prune >= self.PRUNE_INTERVAL:
+            self.last_prune = time.monotonic()
+            self.prune()
+        return event.pk
+
+    def receive(self):
+        from .models import InvalidationEvent
+
+        if self.last_id is None:
+            # First look: only changes from now on concern caches built now
+            self.last_id = InvalidationEvent.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+            self.last_receive = time.monotonic()
+            return [], True
+        complete = time.monotonic() - self.last_receive < settings.INVALIDATION_KEEP_SECONDS
+        events = list(
+            InvalidationEvent.objects.filter(pk__gt=self.last_id).order_by('pk').values_list('pk', 'topic', 'key')
+        )
+        if events:
+            self.last_id = events[-1][0]
+        self.last_receive = time.monotonic()
+        return events, complete
+
+    def prune(self):
+        from .models import InvalidationEvent
+
+        cutoff = timezone.now() - timedelta(seconds=settings.INVALIDATION_KEEP_SECONDS)
+        return InvalidationEvent.objects.filter(created_at__lt=cutoff).delete()[0]
+
+
+# 2. Redis pub/sub (optional): events are pushed to every process
+
+class RedisTransport(Transport):
+    """
+    Publishes events on a Redis channel (INVALIDATION_REDIS_URL); a thread
+    per process listens and queues them, so `receive` costs no round trip
+    and processes converge within milliseconds instead of a poll interval.
+    Versions come from a shared counter; a gap in the versions received or
+    a dropped connection means events were lost. Needs the `redis` package.
+    """
+    CHANNEL = 'invalidation'
+    VERSION_KEY = 'invalidation:version'
+    RECONNECT_DELAY = 1
+
+    def __init__(self):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisTransport needs the 'redis' package (pip install redis).")
+        self.client = redis.Redis.from_url(settings.INVALIDATION_REDIS_URL)
+        self.received = deque()
+        self.last_version = None
+        self.lost = False
+        self.listening = threading.Event()
+        threading.Thread(target=self._listen, daemon=True).start()
+        # Events published before the subscription would go unnoticed
+        self.listening.wait(timeout=5)
+
+    def publish(self, topic, key):
+        version = self.client.incr(self.VERSION_KEY)
+        self.client.publish(self.CHANNEL, json.dumps([version, topic, key]))
+        return version
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                self.listening.set()
+                for message in pubsub.listen():
+                    self.received.append(tuple(json.loads(message['data'])))
+            except Exception:
+                logger.exception("Invalidation channel lost, reconnecting")
+            self.lost = True
+            time.sleep(self.RECONNECT_DELAY)
+
+    def receive(self):
+        events = []
+        while self.received:
+            events.append(self.received.popleft())
+        complete = not self.lost
+        self.lost = False
+        for version, _, _ in sorted(events):
+            if self.last_version is not None and version > self.last_version + 1:
+                complete = False
+            self.last_version = max(version, self.last_version or 0)
+        return events, complete
@@ -0,0 +1,27 @@
+# jobs/admin.py
+
+from django.contrib import admin
+from django.utils import timezone
+from service_marketplace.admin_tools import FastChangeListMixin
+from .models import Job, Watermark
+
+@admin.register(Job)
+class JobAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'key', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('=key', '^name')
+    readonly_fields = ('locked_by', 'locked_at', 'created_at', 'finished_at', 'last_error')
+    actions = ['retry_jobs']
+
+    @admin.action(description="Retry selected failed jobs")
+    def retry_jobs(self, request, queryset):
+        # Skip keys that already have a queued job, it does the same work
+        queued_keys = Job.objects.filter(status=Job.QUEUED, key__isnull=False).values('key')
+        count = queryset.filter(status=Job.FAILED).exclude(key__in=queued_keys).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f"{count} jobs queued again.")
+
+@admin.register(Watermark)
+class WatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'value')
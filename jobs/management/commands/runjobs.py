@@ -0,0 +1,38 @@
+# jobs/management/commands/runjobs.py
+
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs until stopped (SIGINT/SIGTERM finish the running jobs first)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', '-c',
+            type=int,
+            help="Jobs run in parallel (default: settings.JOBS_WORKERS).",
+        )
+        parser.add_argument(
+            '--pool',
+            choices=('thread', 'process'),
+            default='thread',
+            help="Run jobs on threads (I/O bound tasks) or processes (CPU bound tasks).",
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Exit once no job is due instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(concurrency=options['concurrency'], pool=options['pool'])
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+
+        self.stdout.write(f"Worker {worker.owner} started ({worker.concurrency} {worker.pool}s).")
+        processed = worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped after {processed} jobs."))
@@ -0,0 +1,95 @@
+# jobs/queue.py
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Task name -> Task, filled by @task when the apps' tasks.py modules load
+TASKS = {}
+
+
+class Task:
+    def __init__(self, name, func, max_attempts):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, key=None, delay=None, **kwargs):
+        enqueue(self.name, key=key, delay=delay, **kwargs)
+
+
+def task(name=None, max_attempts=None):
+    """
+    Registers a function as a background task. Tasks take JSON-serializable
+    keyword arguments and must be safe to run more than once, since failed
+    jobs are retried.
+
+        @task()
+        def refresh_service_rankings(service_ids): ...
+
+        refresh_service_rankings.enqueue(key='ranking:42', service_ids=[42])
+    """
+    def decorator(func):
+        task_name = name or f"{func.__module__.split('.')[0]}.{func.__name__}"
+        registered = Task(task_name, func, max_attempts or settings.JOBS_MAX_ATTEMPTS)
+        TASKS[task_name] = registered
+        return registered
+    return decorator
+
+
+def get_task(name):
+    try:
+        return TASKS[name]
+    except KeyError:
+        raise LookupError(f"No task registered as '{name}'.")
+
+
+def enqueue(name, key=None, delay=None, **kwargs):
+    """
+    Queues task `name` once the current transaction commits (right away
+    outside a transaction), so the request never waits for the work and a
+    rolled back write never queues it.
+
+    With a `key`, enqueueing is idempotent: while a job with the same key is
+    still queued, further calls are dropped and that job does the work.
+    """
+    task_def = get_task(name)
+
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: _run_eagerly(task_def, kwargs))
+        return
+
+    run_at = timezone.now() + timedelta(seconds=delay) if delay else None
+    transaction.on_commit(lambda: _insert_job(task_def, key, run_at, kwargs))
+
+
+def _insert_job(task_def, key, run_at, kwargs):
+    job = Job(name=task_def.name, key=key, kwargs=kwargs, max_attempts=task_def.max_attempts)
+    if run_at is not None:
+        job.run_at = run_at
+    if key is None:
+        job.save()
+        return
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        # A job with this key is already queued and will do the work
+        pass
+
+
+def _run_eagerly(task_def, kwargs):
+    try:
+        task_def(**kwargs)
+    except Exception:
+        logger.exception("Eager task %s failed", task_def.name)
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import enqueue, task
+from .worker import Worker, release_stale_jobs, retry_delay
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.broken', max_attempts=2)
+def broken():
+    raise RuntimeError('broken')
+
+
+class EnqueueTests(TestCase):
+
+    def test_queued_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tests.record', value=1)
+            self.assertFalse(Job.objects.exists())
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.kwargs, job.status), ('tests.record', {'value': 1}, Job.QUEUED))
+
+    def test_key_dedupes_queued_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tests.record', key='same', value=1)
+            enqueue('tests.record', key='same', value=2)
+            enqueue('tests.record', key='other', value=3)
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_key_reusable_once_the_job_ran(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tests.record', key='same', value=1)
+        Job.objects.update(status=Job.DONE)
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tests.record', key='same', value=2)
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+    def test_unknown_task(self):
+        with self.assertRaises(LookupError):
+            enqueue('tests.missing')
+
+
+class RetryDelayTests(TestCase):
+
+    @override_settings(JOBS_RETRY_BACKOFF=10, JOBS_RETRY_BACKOFF_MAX=60)
+    def test_exponential_with_jitter_and_cap(self):
+        for attempt, base in ((1, 10), (2, 20), (3, 40), (4, 60), (10, 60)):
+            delay = retry_delay(attempt)
+            self.assertGreaterEqual(delay, base * 0.8)
+            self.assertLessEqual(delay, base * 1.2)
+
+
+class WorkerTests(TransactionTestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def run_worker(self):
+        return Worker(concurrency=1, poll_interval=0.01).run(once=True)
+
+    def test_runs_due_jobs(self):
+        enqueue('tests.record', value=1)
+        enqueue('tests.record', delay=3600, value=2)
+        self.assertEqual(self.run_worker(), 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(Job.objects.get(kwargs={'value': 1}).status, Job.DONE)
+        self.assertEqual(Job.objects.get(kwargs={'value': 2}).status, Job.QUEUED)
+
+    def test_failure_retried_with_backoff_then_failed(self):
+        enqueue('tests.broken')
+        with self.assertLogs('jobs.worker', 'WARNING'):
+            self.run_worker()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError', job.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_running_job_requeued(self):
+        enqueue('tests.record', value=1)
+        Job.objects.update(
+            status=Job.RUNNING, locked_by='gone:1', locked_at=timezone.now() - timedelta(days=1),
+        )
+        with self.assertLogs('jobs.worker', 'WARNING'):
+            release_stale_jobs()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
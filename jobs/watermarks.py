@@ -0,0 +1,15 @@
+# jobs/watermarks.py
+
+from .models import Watermark
+
+
+def get_watermark(name):
+    """
+    The time stored under `name`, or None when the task never completed a
+    run (callers then process everything).
+    """
+    return Watermark.objects.filter(name=name).values_list('value', flat=True).first()
+
+
+def set_watermark(name, value):
+    Watermark.objects.update_or_create(name=name, defaults={'value': value})
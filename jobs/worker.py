@@ -0,0 +1,193 @@
+# jobs/worker.py
+
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from .models import Job
+from .queue import get_task
+
+logger = logging.getLogger(__name__)
+
+# Seconds between housekeeping passes (stale locks, old finished jobs)
+HOUSEKEEPING_INTERVAL = 60
+
+
+# 1. Claiming
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_jobs(limit, owner):
+    """
+    Marks up to `limit` due jobs as running and returns them.
+
+    On PostgreSQL/MySQL the candidates are locked with SKIP LOCKED so
+    concurrent workers never wait on each other. Each job is then claimed
+    with a conditional UPDATE, which also keeps databases without row locks
+    (SQLite) from running a job twice.
+    """
+    now = timezone.now()
+    claimed = []
+    with transaction.atomic():
+        candidates = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+        for pk in list(candidates):
+            updated = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+                status=Job.RUNNING, locked_by=owner, locked_at=now,
+            )
+            if updated:
+                claimed.append(pk)
+    return claimed
+
+
+# 2. Running
+
+def retry_delay(attempt):
+    """
+    Exponential backoff with +/-20% jitter, so jobs failing together don't
+    retry together.
+    """
+    delay = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempt - 1), settings.JOBS_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run_job(pk):
+    """
+    Runs one claimed job and records the outcome. Executed in the pool, so
+    it opens (and closes) its own database connection.
+    """
+    try:
+        job = Job.objects.get(pk=pk)
+        attempt = job.attempts + 1
+        try:
+            get_task(job.name)(**job.kwargs)
+        except Exception:
+            _record_failure(job, attempt, traceback.format_exc())
+            return False
+        Job.objects.filter(pk=pk).update(
+            status=Job.DONE, attempts=attempt, finished_at=timezone.now(), last_error='',
+        )
+        return True
+    finally:
+        connections.close_all()
+
+
+def _record_failure(job, attempt, error):
+    if attempt >= job.max_attempts:
+        logger.error("Job %s failed permanently after %s attempts", job, attempt)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED, attempts=attempt, finished_at=timezone.now(), last_error=error,
+        )
+        return
+
+    logger.warning("Job %s failed (attempt %s), retrying", job, attempt)
+    run_at = timezone.now() + timedelta(seconds=retry_delay(attempt))
+    _requeue(job.pk, attempts=attempt, run_at=run_at, last_error=error)
+
+
+def _requeue(pk, **fields):
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=pk).update(status=Job.QUEUED, locked_by='', locked_at=None, **fields)
+    except IntegrityError:
+        # A newer job with the same key was queued meanwhile and covers this one
+        Job.objects.filter(pk=pk).update(
+            status=Job.DONE, finished_at=timezone.now(),
+            last_error='Superseded by a newer job with the same key.',
+        )
+
+
+# 3. Housekeeping
+
+def release_stale_jobs():
+    """
+    Requeues running jobs whose worker died (locked for longer than
+    JOBS_LOCK_TIMEOUT). The interrupted attempt counts as a failure.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    for job in stale:
+        _record_failure(job, job.attempts + 1, f"Lock held by {job.locked_by} expired.")
+
+
+def purge_finished_jobs():
+    cutoff = timezone.now() - timedelta(days=settings.JOBS_KEEP_DONE_DAYS)
+    Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+
+
+# 4. Worker loop
+
+def _init_process():
+    # Spawned pool processes start without Django configured
+    django.setup()
+    connections.close_all()
+
+
+class Worker:
+    """
+    Polls the queue and runs due jobs on a thread or process pool of
+    `concurrency` workers. Stops claiming on `stop()` (or when drained with
+    `once=True`) and waits for running jobs to finish.
+    """
+    def __init__(self, concurrency=None, pool='thread', poll_interval=None):
+        self.concurrency = concurrency or settings.JOBS_WORKERS
+        self.pool = pool
+        self.poll_interval = poll_interval or settings.JOBS_POLL_INTERVAL
+        self.owner = worker_id()
+        self.stopping = False
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def _executor(self):
+        if self.pool == 'process':
+            # Forked children must not share the parent's connections
+            connections.close_all()
+            return ProcessPoolExecutor(max_workers=self.concurrency, initializer=_init_process)
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='jobs')
+
+    def run(self, once=False):
+        processed = 0
+        last_housekeeping = 0
+        running = set()
+        with self._executor() as executor:
+            while not self.stopping:
+                if time.monotonic() - last_housekeeping >= HOUSEKEEPING_INTERVAL:
+                    release_stale_jobs()
+                    purge_finished_jobs()
+                    last_housekeeping = time.monotonic()
+
+                free = self.concurrency - len(running)
+                claimed = claim_jobs(free, self.owner) if free else []
+                running |= {executor.submit(run_job, pk) for pk in claimed}
+
+                if once and not running:
+                    break
+                if running:
+                    done, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    processed += len(done)
+                    for future in done:
+                        if future.exception() is not None:
+                            logger.error("Job runner crashed", exc_info=future.exception())
+                else:
+                    time.sleep(self.poll_interval)
+
+            done, _ = wait(running)
+            processed += len(done)
+        return processed
@@ -0,0 +1,13 @@
+# notifications/admin.py
+
+from django.contrib import admin
+from service_marketplace.admin_tools import FastChangeListMixin, username_filter
+from .models import Notification
+
+@admin.register(Notification)
+class NotificationAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('recipient', 'kind', 'order', 'count', 'is_read', 'updated_at', 'emailed_at')
+    list_select_related = ('recipient', 'order__service')
+    list_filter = ('kind', 'is_read', username_filter('recipient'))
+    search_fields = ('=order__order_ref',)
+    raw_id_fields = ('recipient', 'actor', 'order')
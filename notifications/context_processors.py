@@ -0,0 +1,20 @@
+# notifications/context_processors.py
+
+from django.utils.functional import SimpleLazyObject
+
+from .models import Notification
+
+
+def unread_notifications(request):
+    """
+    Unread notification count for the navbar badge. Lazy, so the COUNT only
+    runs on pages that render it.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'unread_notification_count': 0}
+    return {
+        'unread_notification_count': SimpleLazyObject(
+            lambda: Notification.objects.filter(recipient=user, is_read=False).count()
+        ),
+    }
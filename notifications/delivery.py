@@ -0,0 +1,105 @@
+# notifications/delivery.py
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from jobs.queue import enqueue
+from .models import Notification
+
+# Recipients rendered and sent per SMTP connection round
+DIGEST_BATCH_SIZE = 100
+
+
+# 1. Inbox delivery
+
+def deliver(recipient_id, kind, order_id=None, actor_id=None, text=''):
+    """
+    Adds an event to the recipient's inbox. An unread, not yet emailed
+    notification of the same kind, order and actor updated within
+    NOTIFICATIONS_COALESCE_SECONDS absorbs the event instead (count + 1),
+    so a burst of chat messages becomes a single entry.
+    """
+    now = timezone.now()
+    window_start = now - timedelta(seconds=settings.NOTIFICATIONS_COALESCE_SECONDS)
+
+    with transaction.atomic():
+        notification = (
+            Notification.objects.select_for_update()
+            .filter(
+                recipient_id=recipient_id, kind=kind, order_id=order_id, actor_id=actor_id,
+                is_read=False, emailed_at__isnull=True, updated_at__gte=window_start,
+            )
+            .order_by('-updated_at')
+            .first()
+        )
+        if notification is not None:
+            Notification.objects.filter(pk=notification.pk).update(
+                count=F('count') + 1, text=text, updated_at=now,
+            )
+        else:
+            notification = Notification.objects.create(
+                recipient_id=recipient_id, kind=kind, order_id=order_id, actor_id=actor_id, text=text,
+            )
+
+    # One digest per recipient and delay window, whatever the number of events
+    enqueue(
+        'notifications.send_digest',
+        key=f'digest:{recipient_id}',
+        delay=settings.NOTIFICATIONS_DIGEST_DELAY,
+        recipient_ids=[recipient_id],
+    )
+    return notification
+
+
+# 2. Email digests
+
+def send_digests(recipient_ids=None):
+    """
+    Emails every recipient one digest of their unread notifications that
+    were not emailed yet, sending a batch of messages per connection.
+    Returns the number of emails sent.
+    """
+    pending = Notification.objects.filter(is_read=False, emailed_at__isnull=True)
+    if recipient_ids is not None:
+        pending = pending.filter(recipient_id__in=recipient_ids)
+
+    recipients = list(pending.order_by().values_list('recipient_id', flat=True).distinct())
+    sent = 0
+    for start in range(0, len(recipients), DIGEST_BATCH_SIZE):
+        sent += _send_digest_batch(pending.filter(recipient_id__in=recipients[start:start + DIGEST_BATCH_SIZE]))
+    return sent
+
+
+def _send_digest_batch(pending):
+    by_recipient = defaultdict(list)
+    for notification in pending.select_related('recipient', 'actor', 'order'):
+        by_recipient[notification.recipient].append(notification)
+
+    emails = []
+    for recipient, notifications in by_recipient.items():
+        if not recipient.email:
+            continue
+        body = render_to_string('notifications/email/digest.txt', {
+            'recipient': recipient,
+            'notifications': notifications,
+            'site_url': settings.SITE_URL.rstrip('/'),
+        })
+        count = sum(notification.count for notification in notifications)
+        subject = f"You have {count} new update{'s' if count != 1 else ''} on ServiceMarket"
+        emails.append(EmailMessage(subject, body, to=[recipient.email]))
+
+    if emails:
+        with get_connection() as connection:
+            connection.send_messages(emails)
+
+    # Recipients without an email address are marked too, so they aren't retried
+    ids = [notification.pk for notifications in by_recipient.values() for notification in notifications]
+    Notification.objects.filter(pk__in=ids).update(emailed_at=timezone.now())
+    return len(emails)
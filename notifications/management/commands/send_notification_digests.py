@@ -0,0 +1,13 @@
+# notifications/management/commands/send_notification_digests.py
+
+from django.core.management.base import BaseCommand
+
+from notifications.delivery import send_digests
+
+
+class Command(BaseCommand):
+    help = "Emails every user a digest of their unread notifications that were not emailed yet."
+
+    def handle(self, *args, **options):
+        sent = send_digests()
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} notification digests."))
@@ -0,0 +1,122 @@
+# notifications/models.py
+
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from chat.models import Message
+from jobs.queue import enqueue
+from orders.models import Order
+
+
+class Notification(models.Model):
+    """
+    An entry in a user's in-app inbox. Bursts of the same event on the same
+    order are coalesced into one notification with a `count` (see
+    notifications.delivery), e.g. 20 chat messages in a minute.
+    """
+    NEW_ORDER = 'NEW_ORDER'
+    ORDER_STATUS = 'ORDER_STATUS'
+    MESSAGE = 'MESSAGE'
+    KIND_CHOICES = [
+        (NEW_ORDER, 'New order'),
+        (ORDER_STATUS, 'Order status changed'),
+        (MESSAGE, 'New message'),
+    ]
+
+    # Foreign Keys
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='notifications'
+    )
+
+    # Core Fields
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    text = models.CharField(max_length=255, blank=True) # Latest event, e.g. a message preview
+    count = models.PositiveIntegerField(default=1) # Events coalesced into this notification
+    is_read = models.BooleanField(default=False)
+
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True) # Time of the latest event
+    emailed_at = models.DateTimeField(null=True, blank=True) # Included in a digest
+
+    class Meta:
+        ordering = ['-updated_at']
+        indexes = [
+            # Inbox listing, unread badge and coalescing lookups
+            models.Index(fields=['recipient', 'is_read', '-updated_at'], name='notification_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.recipient}"
+
+    @property
+    def summary(self):
+        actor = self.actor.username if self.actor else 'Someone'
+        ref = self.order.order_ref if self.order else ''
+        if self.kind == self.MESSAGE:
+            if self.count > 1:
+                return f"{self.count} new messages from {actor} on order {ref}"
+            return f"New message from {actor} on order {ref}"
+        if self.kind == self.NEW_ORDER:
+            return f"New order {ref} from {actor}"
+        return f"Order {ref} is now {self.text}"
+
+    def get_absolute_url(self):
+        if self.order_id:
+            return reverse('order_detail', kwargs={'pk': self.order_id})
+        return reverse('notification_inbox')
+
+
+# Signals: the events are delivered by the job worker (notifications.tasks),
+# so the order/message write path only pays for queueing a job.
+@receiver(post_save, sender=Order)
+def notify_order_change(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        enqueue(
+            'notifications.deliver_notification',
+            recipient_id=instance.seller_id, actor_id=instance.client_id,
+            order_id=instance.pk, kind=Notification.NEW_ORDER,
+        )
+        return
+
+    previous = getattr(instance, '_loaded_state', None)
+    if previous is not None and previous['status'] != instance.status:
+        # Status changes are made by the seller, the client is told
+        enqueue(
+            'notifications.deliver_notification',
+            recipient_id=instance.client_id, actor_id=instance.seller_id,
+            order_id=instance.pk, kind=Notification.ORDER_STATUS,
+            text=instance.get_status_display(),
+        )
+
+@receiver(post_save, sender=Message)
+def notify_message(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    enqueue(
+        'notifications.deliver_notification',
+        recipient_id=instance.receiver_id, actor_id=instance.sender_id,
+        order_id=instance.order_id, kind=Notification.MESSAGE,
+        text=instance.text[:255],
+    )
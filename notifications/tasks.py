@@ -0,0 +1,18 @@
+# notifications/tasks.py
+
+from jobs.queue import task
+from . import delivery
+
+
+@task()
+def deliver_notification(recipient_id, kind, order_id=None, actor_id=None, text=''):
+    """
+    Adds an order/chat event to the recipient's inbox (queued by the
+    signals in notifications/models.py).
+    """
+    delivery.deliver(recipient_id, kind, order_id=order_id, actor_id=actor_id, text=text)
+
+
+@task()
+def send_digest(recipient_ids):
+    delivery.send_digests(recipient_ids)
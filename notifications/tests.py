@@ -0,0 +1,62 @@
+from django.core import mail
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from accounts.models import User
+from chat.models import Message
+from jobs.models import Job
+from jobs.worker import Worker
+from orders.models import Order
+from services.models import Category, Service
+
+from .models import Notification
+
+
+class NotificationDeliveryTests(TransactionTestCase):
+
+    def setUp(self):
+        self.client_user = User.objects.create_user('client', 'client@example.com', 'pw')
+        self.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', is_seller=True, is_client=False)
+        category = Category.objects.create(name='Web', slug='web')
+        service = Service.objects.create(
+            seller=self.seller, category=category, title='Web developer', slug='web-developer',
+            description='Sites', price=100,
+        )
+        self.order = Order.objects.create(client=self.client_user, seller=self.seller, service=service)
+
+    def run_worker(self):
+        return Worker(concurrency=1, poll_interval=0.01).run(once=True)
+
+    def send_messages(self, count):
+        for number in range(count):
+            Message.objects.create(order=self.order, sender=self.client_user, text=f'Message {number}')
+
+    def send_due_digests(self):
+        Job.objects.filter(name='notifications.send_digest', status=Job.QUEUED).update(run_at=timezone.now())
+        self.run_worker()
+
+    def test_burst_of_messages_coalesced(self):
+        self.send_messages(20)
+        self.run_worker()
+        notification = Notification.objects.get(recipient=self.seller, kind=Notification.MESSAGE)
+        self.assertEqual((notification.count, notification.text), (20, 'Message 19'))
+        # The new order and the 20 messages share one pending digest
+        self.assertEqual(Job.objects.filter(name='notifications.send_digest', status=Job.QUEUED).count(), 1)
+
+    def test_one_digest_email_per_period(self):
+        self.send_messages(20)
+        self.run_worker()
+        self.assertEqual(mail.outbox, [])
+
+        self.send_due_digests()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['seller@example.com'])
+        self.assertEqual(mail.outbox[0].subject, 'You have 21 new updates on ServiceMarket')
+        self.assertFalse(Notification.objects.filter(emailed_at__isnull=True).exists())
+
+        # Emailed notifications don't absorb later events, which get a digest of their own
+        self.send_messages(1)
+        self.run_worker()
+        self.send_due_digests()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[1].subject, 'You have 1 new update on ServiceMarket')
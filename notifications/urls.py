@@ -0,0 +1,10 @@
+# notifications/urls.py
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.NotificationInboxView.as_view(), name='notification_inbox'),
+    path('<int:pk>/open/', views.open_notification, name='open_notification'),
+    path('read-all/', views.mark_all_read, name='mark_all_notifications_read'),
+]
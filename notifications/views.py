@@ -0,0 +1,42 @@
+# notifications/views.py
+
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.shortcuts import get_object_or_404, redirect
+from django.views.decorators.http import require_POST
+from django.views.generic import ListView
+
+from .models import Notification
+
+
+class NotificationInboxView(LoginRequiredMixin, ListView):
+    """
+    The current user's notifications, newest activity first.
+    """
+    model = Notification
+    template_name = 'notifications/inbox.html'
+    context_object_name = 'notifications'
+    paginate_by = 20
+
+    def get_queryset(self):
+        return (
+            Notification.objects.filter(recipient=self.request.user)
+            .select_related('actor', 'order')
+            .order_by('-updated_at')
+        )
+
+@login_required
+def open_notification(request, pk):
+    """
+    Marks a notification as read and redirects to what it is about.
+    """
+    notification = get_object_or_404(Notification, pk=pk, recipient=request.user)
+    if not notification.is_read:
+        Notification.objects.filter(pk=notification.pk).update(is_read=True)
+    return redirect(notification.get_absolute_url())
+
+@login_required
+@require_POST
+def mark_all_read(request):
+    Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+    return redirect('notification_inbox')
@@ -1,3 +1,26 @@
+# orders/admin.py
+
 from django.contrib import admin
+from service_marketplace.admin_tools import FastChangeListMixin, username_filter
+from .models import Order
 
-# Register your models here.
+@admin.register(Order)
+class OrderAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('order_ref', 'service', 'client', 'seller', 'price_at_order', 'status', 'created_at')
+    list_select_related = ('service', 'client', 'seller')
+    list_filter = ('status', username_filter('seller'), username_filter('client'))
+    # Order references are looked up exactly (indexed on PostgreSQL, see migration 0003)
+    search_fields = ('=order_ref',)
+    autocomplete_fields = ('client', 'seller', 'service')
+    readonly_fields = ('order_ref', 'created_at', 'updated_at')
+    fieldsets = (
+        (None, {
+            'fields': ('order_ref', 'service', 'client', 'seller')
+        }),
+        ('Status & Pricing', {
+            'fields': ('status', 'price_at_order', 'completion_date')
+        }),
+        ('Metadata', {
+            'fields': ('created_at', 'updated_at'),
+        }),
+    )
@@ -0,0 +1,143 @@
+# orders/exports.py
+
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import Order
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# (column name, lookup) in export order
+EXPORT_COLUMNS = [
+    ('order_ref', 'order_ref'),
+    ('service_title', 'service__title'),
+    ('client', 'client__username'),
+    ('seller', 'seller__username'),
+    ('price_at_order', 'price_at_order'),
+    ('status', 'status'),
+    ('created_at', 'created_at'),
+    ('completion_date', 'completion_date'),
+]
+
+# Which timestamp the date range applies to
+DATE_FIELDS = {
+    'created': 'created_at',
+    'completed': 'completion_date',
+}
+
+# Rows fetched per round trip (server-side cursor on PostgreSQL)
+EXPORT_CHUNK_SIZE = 2000
+
+# Leading characters that make spreadsheet tools read a CSV cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+# 1. Query
+
+def parse_day(value):
+    """
+    Parses a YYYY-MM-DD string; empty values mean "unbounded".
+    Raises ValueError on anything else.
+    """
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def export_queryset(seller=None, start=None, end=None, date_field='created'):
+    """
+    Orders in the inclusive [start, end] day range as value tuples in
+    EXPORT_COLUMNS order. Only the exported columns are selected and the
+    joins happen in the same query.
+    """
+    if date_field not in DATE_FIELDS:
+        raise ValueError(f"Unknown date field: {date_field}")
+    field = DATE_FIELDS[date_field]
+
+    orders = Order.objects.all()
+    if seller is not None:
+        orders = orders.filter(seller=seller)
+    if start is not None:
+        orders = orders.filter(**{f'{field}__gte': _start_of_day(start)})
+    if end is not None:
+        orders = orders.filter(**{f'{field}__lt': _start_of_day(end + timedelta(days=1))})
+    if date_field == 'completed':
+        orders = orders.filter(status='COMPLETED')
+
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    return orders.order_by(field, 'pk').values_list(*lookups)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+# 2. Serialization
+
+class _Echo:
+    """
+    File-like object whose write() returns the line instead of buffering it,
+    so csv.writer can be used from a generator.
+    """
+    def write(self, value):
+        return value
+
+
+def _serialize(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _csv_cell(value):
+    """
+    A CSV cell for `value`. Text that starts like a formula (service titles
+    and usernames are user input) is prefixed with a quote, so spreadsheet
+    tools show it instead of evaluating it.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return _serialize(value)
+
+
+def iter_export(queryset, export_format='csv', chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the export line by line, header first. Rows are streamed with
+    `iterator()`, so memory use does not grow with the number of orders.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    columns = [name for name, _ in EXPORT_COLUMNS]
+    rows = queryset.iterator(chunk_size=chunk_size)
+
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([_csv_cell(value) for value in row])
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(columns, map(_serialize, row)))) + '\n'
+
+
+def export_filename(export_format, start=None, end=None, seller=None):
+    parts = ['orders']
+    if seller is not None:
+        parts.append(seller.username)
+    if start or end:
+        parts.append(f"{start or 'start'}_{end or 'today'}")
+    return '-'.join(parts) + '.' + export_format
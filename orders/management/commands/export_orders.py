@@ -0,0 +1,54 @@
+# orders/management/commands/export_orders.py
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.exports import DATE_FIELDS, EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_queryset, iter_export, parse_day
+
+
+class Command(BaseCommand):
+    help = "Streams orders in a date range as CSV or JSON Lines (to stdout or a file)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--start', help="First day to include (YYYY-MM-DD).")
+        parser.add_argument('--end', help="Last day to include (YYYY-MM-DD).")
+        parser.add_argument(
+            '--by',
+            choices=sorted(DATE_FIELDS),
+            default='created',
+            help="Apply the range to the order date or the completion date.",
+        )
+        parser.add_argument('--seller', metavar='USERNAME', help="Only export this seller's orders.")
+        parser.add_argument('--output', '-o', help="Write to this file instead of stdout.")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            start = parse_day(options['start'])
+            end = parse_day(options['end'])
+        except ValueError:
+            raise CommandError("Dates must use the YYYY-MM-DD format.")
+
+        seller = None
+        if options['seller']:
+            try:
+                seller = get_user_model().objects.get(username=options['seller'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Unknown seller: {options['seller']}")
+
+        rows = export_queryset(seller=seller, start=start, end=end, date_field=options['by'])
+        lines = iter_export(rows, options['format'], chunk_size=options['chunk_size'])
+
+        if options['output']:
+            count = 0
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                for line in lines:
+                    output.write(line)
+                    count += 1
+            if options['format'] == 'csv':
+                count -= 1  # header
+            self.stderr.write(self.style.SUCCESS(f"Exported {count} orders to {options['output']}."))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,17 @@
+# Case-insensitive search indexes for the admin (PostgreSQL only)
+
+from django.db import migrations
+
+from service_marketplace.migration_operations import upper_like_index
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("orders", "0002_order_seller_created_index"),
+    ]
+
+    operations = [
+        upper_like_index("order_ref_upper_idx", "orders_order", "order_ref"),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from services.models import Service
+from service_marketplace import nplusone
 from django.urls import reverse
 import time # Import added for time.strftime
 import uuid # Import added for unique ID fallback
@@ -14,24 +15,27 @@ class Order(models.Model):
     ]
 
     # Foreign Keys
-    client = models.ForeignKey(
+    client = nplusone.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE, 
         related_name='client_orders',
         limit_choices_to={'is_client': True}
     )
-    seller = models.ForeignKey(
+    seller = nplusone.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE, 
         related_name='seller_orders',
         limit_choices_to={'is_seller': True}
     )
-    service = models.ForeignKey(
+    service = nplusone.ForeignKey(
         Service, 
         on_delete=models.PROTECT, # Protect service from being deleted if it has active orders
         related_name='orders'
     )
 
+    # Tracks objects fetched together (service_marketplace/nplusone.py)
+    objects = nplusone.TrackedManager()
+
     # Core Fields
     order_ref = models.CharField(max_length=20, unique=True, editable=False)
     price_at_order = models.DecimalField(max_digits=10, decimal_places=2)
@@ -50,12 +54,30 @@ class Order(models.Model):
     # final_delivery_file = models.FileField(upload_to='order_deliveries/%Y/%m/', blank=True, null=True)
 
 
+    # Fields whose stored values post_save handlers compare against (see analytics)
+    TRACKED_FIELDS = ('seller_id', 'status', 'price_at_order', 'created_at', 'updated_at', 'completion_date')
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Seller order lists and date-range exports
+            models.Index(fields=['seller', 'created_at'], name='order_seller_created_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.order_ref} ({self.service.title})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Deferred loads leave _loaded_state unset, there is nothing to compare against
+        if all(name in field_names for name in cls.TRACKED_FIELDS):
+            instance._loaded_state = instance.tracked_state()
+        return instance
+
+    def tracked_state(self):
+        return {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+
     def save(self, *args, **kwargs):
         # 1. Ensure price_at_order is set upon creation
         # self.pk is None for a new object
@@ -80,6 +102,8 @@ class Order(models.Model):
                 print(f"Error generating Order ID: {e}")
 
         super().save(*args, **kwargs)
+        # 3. The saved values are the baseline for the next save
+        self._loaded_state = self.tracked_state()
 
     def get_absolute_url(self):
         return reverse('order_detail', kwargs={'pk': self.pk})
\ No newline at end of file
@@ -1,3 +1,54 @@
+import csv
+import json
+
 from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from services.models import Category, Service
+
+from .models import Order
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user('-client', 'client@example.com', 'pw')
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', is_seller=True, is_client=False)
+        other_seller = User.objects.create_user('other', 'other@example.com', 'pw', is_seller=True, is_client=False)
+        category = Category.objects.create(name='Web', slug='web')
+        service = Service.objects.create(
+            seller=cls.seller, category=category, title='=HYPERLINK("http://example.com")', slug='formula',
+            description='Sites', price=100,
+        )
+        other_service = Service.objects.create(
+            seller=other_seller, category=category, title='Logo design', slug='logo-design',
+            description='Marks', price=50,
+        )
+        Order.objects.create(client=cls.client_user, seller=cls.seller, service=service)
+        Order.objects.create(client=cls.client_user, seller=other_seller, service=other_service)
+
+    def export(self, export_format):
+        self.client.force_login(self.seller)
+        response = self.client.get(reverse('export_orders'), {'format': export_format})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_escapes_formulas(self):
+        header, *rows = csv.reader(self.export('csv').splitlines())
+        self.assertEqual(len(rows), 1)
+        row = dict(zip(header, rows[0]))
+        self.assertEqual(row['service_title'], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(row['client'], "'-client")
+        self.assertEqual((row['seller'], row['price_at_order']), ('seller', '100.00'))
+
+    def test_jsonl_keeps_values(self):
+        rows = [json.loads(line) for line in self.export('jsonl').splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['service_title'], '=HYPERLINK("http://example.com")')
+        self.assertEqual(rows[0]['client'], '-client')
 
-# Create your tests here.
+    def test_clients_cannot_export(self):
+        self.client.force_login(self.client_user)
+        self.assertEqual(self.client.get(reverse('export_orders')).status_code, 403)
@@ -12,4 +12,5 @@ urlpatterns = [
     # Dashboard Lists
     path('client/', views.ClientOrderListView.as_view(), name='client_orders'),
     path('seller/', views.SellerOrderListView.as_view(), name='seller_orders'),
+    path('export/', views.export_orders, name='export_orders'),
 ]
\ No newline at end of file
@@ -6,12 +6,14 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.http import HttpResponseForbidden
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
 
 from .models import Order
+from .exports import EXPORT_FORMATS, CONTENT_TYPES, DATE_FIELDS, export_filename, export_queryset, iter_export, parse_day
 from services.models import Service
 from .forms import OrderCreationForm, OrderStatusUpdateForm
 from django.utils import timezone
+from accounts.models import User
 from chat.models import Message 
 from chat.forms import MessageForm
 
@@ -83,11 +85,17 @@ class OrderDetailView(OrderPermissionMixin, DetailView):
     template_name = 'orders/order_detail.html'
     context_object_name = 'order'
 
+    def get_queryset(self):
+        return Order.objects.select_related('service', 'client', 'seller')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         order = self.object
         
-        # ... (Messaging Context) ...
+        # Messaging context: the whole thread in one query, senders' profiles
+        # (avatars) included
+        context['chat_messages'] = order.messages.select_related('sender__profile')
+        context['message_form'] = MessageForm()
 
         # Check if review button should be visible (Client + Completed Status + No existing review)
         review_exists = hasattr(order, 'review')
@@ -151,7 +159,7 @@ class ClientOrderListView(LoginRequiredMixin, ListView):
         # Filter orders only for the logged-in client
         if not self.request.user.is_client:
             return Order.objects.none()
-        return Order.objects.filter(client=self.request.user).order_by('-created_at')
+        return Order.objects.filter(client=self.request.user).select_related('service', 'seller').order_by('-created_at')
 
 class SellerOrderListView(LoginRequiredMixin, ListView):
     """
@@ -166,4 +174,45 @@ class SellerOrderListView(LoginRequiredMixin, ListView):
         # Filter orders only for the logged-in seller
         if not self.request.user.is_seller:
             return Order.objects.none()
-        return Order.objects.filter(seller=self.request.user).order_by('-created_at')
\ No newline at end of file
+        return Order.objects.filter(seller=self.request.user).select_related('service', 'client').order_by('-created_at')
+
+
+# --- Order Export (streaming) ---
+
+@login_required
+def export_orders(request):
+    """
+    Streams the orders in a date range as CSV or JSON Lines.
+    Sellers export their own orders; staff with the `orders.view_order`
+    permission export everyone's (optionally narrowed with ?seller=).
+
+    Query params: format (csv|jsonl), start/end (YYYY-MM-DD, inclusive)
+    and by (created|completed) for the date the range applies to.
+    """
+    user = request.user
+    export_format = request.GET.get('format', 'csv')
+    date_field = request.GET.get('by', 'created')
+    if export_format not in EXPORT_FORMATS or date_field not in DATE_FIELDS:
+        return HttpResponseBadRequest("Unsupported export format or date field.")
+    try:
+        start = parse_day(request.GET.get('start'))
+        end = parse_day(request.GET.get('end'))
+    except ValueError:
+        return HttpResponseBadRequest("Dates must use the YYYY-MM-DD format.")
+
+    if user.has_perm('orders.view_order'):
+        seller_name = request.GET.get('seller')
+        seller = get_object_or_404(User, username=seller_name) if seller_name else None
+    elif user.is_seller:
+        seller = user
+    else:
+        return HttpResponseForbidden("You do not have permission to export orders.")
+
+    rows = export_queryset(seller=seller, start=start, end=end, date_field=date_field)
+    response = StreamingHttpResponse(
+        iter_export(rows, export_format),
+        content_type=CONTENT_TYPES[export_format],
+    )
+    filename = export_filename(export_format, start, end, seller)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,13 @@
+# recommendations/admin.py
+
+from django.contrib import admin
+from service_marketplace.admin_tools import FastChangeListMixin
+from .models import ServiceRecommendation
+
+@admin.register(ServiceRecommendation)
+class ServiceRecommendationAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('service', 'kind', 'rank', 'recommended', 'score')
+    list_select_related = ('service', 'recommended')
+    list_filter = ('kind',)
+    search_fields = ('^service__title',)
+    raw_id_fields = ('service', 'recommended')
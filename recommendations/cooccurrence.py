@@ -0,0 +1,235 @@
+# recommendations/cooccurrence.py
+
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from scipy import sparse
+
+from jobs.watermarks import get_watermark, set_watermark
+from orders.models import Order
+from .models import ServiceRecommendation
+
+# Watermark of the last build; a missing value forces a full build
+LAST_BUILD_WATERMARK = 'recommendations.also_ordered.last_build'
+
+# Services whose neighbours are scored per sparse product, bounding memory
+TARGET_BATCH_SIZE = 2000
+
+# Rows fetched per round trip when loading order pairs
+LOAD_CHUNK_SIZE = 10000
+
+# Only orders that went ahead count as a signal
+COUNTED_ORDERS = ~Q(status='CANCELLED')
+
+
+# 1. Similarity (pure NumPy/SciPy, no database access)
+
+def top_neighbours(clients, services, k, min_cooccurrence=1, targets=None, item_counts=None):
+    """
+    Item-item "clients also ordered" neighbours from client -> service pairs.
+
+    `clients` and `services` are equal-length integer arrays (duplicates
+    allowed). Two services co-occur once per client who ordered both; the
+    score is the cosine similarity co / sqrt(n_a * n_b), where n is the
+    number of distinct clients per service, so popular services don't top
+    every list.
+
+    `targets` limits the services scored (incremental builds). The pairs
+    must then include every order of every client who ordered a target, and
+    `item_counts` ({service_id: n}) supplies the catalog-wide n for the
+    services in the pairs.
+
+    Returns {service_id: [(neighbour_id, score), ...]} with at most `k`
+    neighbours per service, best first.
+    """
+    service_ids, columns = np.unique(np.asarray(services, dtype=np.int64), return_inverse=True)
+    client_ids, rows = np.unique(np.asarray(clients, dtype=np.int64), return_inverse=True)
+    if not len(service_ids):
+        return {}
+
+    # Binary client x service matrix; repeat orders collapse to 1
+    orders = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(client_ids), len(service_ids)),
+    )
+    orders.sum_duplicates()
+    orders.data[:] = 1
+
+    if item_counts is None:
+        counts = np.asarray(orders.sum(axis=0), dtype=np.float64).ravel()
+    else:
+        counts = np.array([item_counts.get(int(sid), 0) for sid in service_ids], dtype=np.float64)
+
+    if targets is None:
+        target_columns = np.arange(len(service_ids))
+    else:
+        target_columns = np.flatnonzero(np.isin(service_ids, np.asarray(list(targets), dtype=np.int64)))
+
+    by_service = orders.T.tocsr()
+    neighbours = {}
+    for start in range(0, len(target_columns), TARGET_BATCH_SIZE):
+        batch = target_columns[start:start + TARGET_BATCH_SIZE]
+        cooccurrence = (by_service[batch] @ orders).tocsr()
+        for offset, column in enumerate(batch):
+            begin, end = cooccurrence.indptr[offset], cooccurrence.indptr[offset + 1]
+            others = cooccurrence.indices[begin:end]
+            shared = cooccurrence.data[begin:end]
+            keep = (others != column) & (shared >= min_cooccurrence)
+            others, shared = others[keep], shared[keep]
+            if not len(others):
+                neighbours[int(service_ids[column])] = []
+                continue
+
+            scores = shared / np.sqrt(counts[column] * counts[others])
+            if len(scores) > k:
+                best = np.argpartition(-scores, k - 1)[:k]
+            else:
+                best = np.arange(len(scores))
+            # Ties broken by service id so rebuilds are stable
+            best = best[np.lexsort((service_ids[others[best]], -scores[best]))]
+            neighbours[int(service_ids[column])] = [
+                (int(service_ids[others[i]]), float(scores[i])) for i in best
+            ]
+    return neighbours
+
+
+# 2. Loading
+
+def _order_pairs(orders):
+    """
+    (clients, services) arrays for an Order queryset, streamed in chunks.
+    """
+    pairs = orders.order_by().values_list('client_id', 'service_id').distinct()
+    flat = np.fromiter(
+        (value for pair in pairs.iterator(chunk_size=LOAD_CHUNK_SIZE) for value in pair),
+        dtype=np.int64,
+    )
+    return flat[0::2], flat[1::2]
+
+
+def _client_counts(service_ids):
+    """
+    {service_id: distinct clients with counted orders}, the catalog-wide n
+    used by the cosine score.
+    """
+    service_ids = sorted(service_ids)
+    counts = {}
+    for start in range(0, len(service_ids), LOAD_CHUNK_SIZE):
+        counts.update(
+            Order.objects.filter(COUNTED_ORDERS, service_id__in=service_ids[start:start + LOAD_CHUNK_SIZE])
+            .order_by().values('service_id').annotate(count=Count('client_id', distinct=True))
+            .values_list('service_id', 'count')
+        )
+    return counts
+
+
+def _changed_service_ids(since):
+    """
+    Services whose neighbour lists an incremental build recomputes. An order
+    placed (or changed) since the last build changes its service's client
+    count, which enters the score of every pair the service is part of, so
+    every service co-ordered with it is rescored too.
+    """
+    changed = Order.objects.filter(updated_at__gte=since).values('service_id')
+    clients = Order.objects.filter(service_id__in=changed).values('client_id')
+    return set(Order.objects.filter(client_id__in=clients).values_list('service_id', flat=True).distinct())
+
+
+# 3. Building
+
+def store_neighbours(kind, neighbours, replace_all=False):
+    """
+    Replaces the stored lists of one kind: all of them, or only those of
+    the services in `neighbours`.
+    """
+    rows = [
+        ServiceRecommendation(service_id=service_id, recommended_id=other_id, kind=kind, rank=rank, score=score)
+        for service_id, ranked in neighbours.items()
+        for rank, (other_id, score) in enumerate(ranked)
+    ]
+    stored = ServiceRecommendation.objects.filter(kind=kind)
+    service_ids = sorted(neighbours)
+    with transaction.atomic():
+        if replace_all:
+            stored.delete()
+        else:
+            for start in range(0, len(service_ids), LOAD_CHUNK_SIZE):
+                stored.filter(service_id__in=service_ids[start:start + LOAD_CHUNK_SIZE]).delete()
+        ServiceRecommendation.objects.bulk_create(rows, batch_size=1000)
+
+
+def build_also_ordered(full=False, now=None):
+    """
+    Recomputes the "clients also ordered" lists and returns the number of
+    services rebuilt.
+
+    Full builds score every service from all orders and replace the whole
+    kind. Incremental builds only rescore the services affected by orders
+    placed or changed since the last build (see `_changed_service_ids`),
+    loading just the orders of the clients of those services.
+    """
+    now = now or timezone.now()
+    since = None if full else get_watermark(LAST_BUILD_WATERMARK)
+    k = settings.RECOMMENDATIONS_TOP_K
+    min_cooccurrence = settings.RECOMMENDATIONS_MIN_COOCCURRENCE
+    orders = Order.objects.filter(COUNTED_ORDERS)
+
+    if since is None:
+        clients, services = _order_pairs(orders)
+        neighbours = top_neighbours(clients, services, k, min_cooccurrence)
+        store_neighbours(ServiceRecommendation.ALSO_ORDERED, neighbours, replace_all=True)
+    else:
+        targets = _changed_service_ids(since)
+        related_clients = Order.objects.filter(service_id__in=targets).values('client_id')
+        clients, services = _order_pairs(orders.filter(client_id__in=related_clients))
+        counts = _client_counts(set(services.tolist()))
+        neighbours = top_neighbours(clients, services, k, min_cooccurrence, targets=targets, item_counts=counts)
+        # Targets left without counted orders (e.g. all cancelled) lose their list
+        neighbours.update({service_id: [] for service_id in targets if service_id not in neighbours})
+        store_neighbours(ServiceRecommendation.ALSO_ORDERED, neighbours)
+
+    set_watermark(LAST_BUILD_WATERMARK, now)
+    return len(neighbours)
+
+
+# 4. Benchmark
+
+def synthetic_orders(order_count, client_count, service_count, seed=0):
+    """
+    Random (clients, services) arrays with Zipf-like service popularity and
+    clustered tastes: each client mostly orders within one of a few dozen
+    service groups. Used by `benchmark_recommendations`.
+    """
+    rng = np.random.default_rng(seed)
+    clients = rng.integers(0, client_count, order_count)
+    groups = max(service_count // 500, 1)
+    popularity = 1.0 / np.arange(1, service_count // groups + 1)
+    popularity /= popularity.sum()
+    within_group = rng.choice(len(popularity), order_count, p=popularity)
+    stray = rng.random(order_count) < 0.2
+    group = np.where(stray, rng.integers(0, groups, order_count), clients % groups)
+    services = np.minimum(group * len(popularity) + within_group, service_count - 1)
+    return clients, services
+
+
+def benchmark(order_count, client_count, service_count, k=None, seed=0):
+    """
+    Times `top_neighbours` on synthetic data. Returns the timings and sizes.
+    """
+    k = k or settings.RECOMMENDATIONS_TOP_K
+    started = time.perf_counter()
+    clients, services = synthetic_orders(order_count, client_count, service_count, seed)
+    generated = time.perf_counter()
+    neighbours = top_neighbours(clients, services, k)
+    finished = time.perf_counter()
+    return {
+        'orders': order_count,
+        'services_scored': len(neighbours),
+        'neighbours': sum(len(ranked) for ranked in neighbours.values()),
+        'generate_seconds': generated - started,
+        'build_seconds': finished - generated,
+    }
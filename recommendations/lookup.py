@@ -0,0 +1,28 @@
+# recommendations/lookup.py
+#
+# Read side of the precomputed recommendations, kept apart from the builders
+# so web processes never import NumPy/SciPy.
+
+from .models import ServiceRecommendation
+
+
+def recommended_services(service_id, kinds=None):
+    """
+    Queryset of the rows recommending active services for `service_id`, of
+    the given kinds (all by default), best first: one range scan on the
+    (service, kind, rank) index joined to the services.
+    """
+    rows = ServiceRecommendation.objects.filter(service_id=service_id, recommended__is_active=True)
+    if kinds is not None:
+        rows = rows.filter(kind__in=kinds)
+    return rows.select_related('recommended__category', 'recommended__rating_distribution').order_by('kind', 'rank')
+
+
+def group_by_kind(rows):
+    """
+    {kind: [Service, ...]} for every kind, from `recommended_services` rows.
+    """
+    grouped = {kind: [] for kind, _ in ServiceRecommendation.KIND_CHOICES}
+    for row in rows:
+        grouped[row.kind].append(row.recommended)
+    return grouped
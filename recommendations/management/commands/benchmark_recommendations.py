@@ -0,0 +1,28 @@
+# recommendations/management/commands/benchmark_recommendations.py
+
+from django.core.management.base import BaseCommand
+
+from recommendations.cooccurrence import benchmark
+
+
+class Command(BaseCommand):
+    help = "Times the co-occurrence builder on synthetic orders (no database access)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000)
+        parser.add_argument('--clients', type=int, default=200_000)
+        parser.add_argument('--services', type=int, default=20_000)
+        parser.add_argument('--top-k', type=int, default=None)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        result = benchmark(
+            options['orders'], options['clients'], options['services'],
+            k=options['top_k'], seed=options['seed'],
+        )
+        self.stdout.write(
+            f"{result['orders']:,} orders -> {result['services_scored']:,} services, "
+            f"{result['neighbours']:,} neighbours"
+        )
+        self.stdout.write(f"Generated in {result['generate_seconds']:.2f}s")
+        self.stdout.write(self.style.SUCCESS(f"Built in {result['build_seconds']:.2f}s"))
@@ -0,0 +1,30 @@
+# recommendations/management/commands/build_recommendations.py
+
+from django.core.management.base import BaseCommand
+
+from recommendations.cooccurrence import build_also_ordered
+from recommendations.similarity import build_similar_services
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the \"clients also ordered\" recommendations from the order history "
+        "and, with --full, the content-based \"similar services\" index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help=(
+                "Rebuild every service instead of only those touched by orders since the last run, "
+                "and rebuild the similar services index (kept current by the worker otherwise)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        count = build_also_ordered(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt recommendations for {count} services."))
+        if options['full']:
+            count = build_similar_services()
+            self.stdout.write(self.style.SUCCESS(f"Indexed {count} services for similar services."))
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("services", "0004_service_title_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServiceRecommendation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("also_ordered", "Clients also ordered")],
+                        max_length=20,
+                    ),
+                ),
+                ("rank", models.PositiveSmallIntegerField()),
+                ("score", models.FloatField()),
+                (
+                    "recommended",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="services.service",
+                    ),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recommendations",
+                        to="services.service",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["service", "kind", "rank"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("service", "kind", "rank"),
+                        name="unique_service_recommendation_rank",
+                    )
+                ],
+            },
+        ),
+    ]
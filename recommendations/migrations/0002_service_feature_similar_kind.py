@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recommendations", "0001_initial"),
+        ("services", "0004_service_title_search_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="servicerecommendation",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("also_ordered", "Clients also ordered"),
+                    ("similar", "Similar services"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.CreateModel(
+            name="ServiceFeature",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("feature", models.IntegerField()),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="services.service",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["feature"], name="service_feature_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# recommendations/models.py
+
+from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+from services.models import Service
+
+
+class ServiceRecommendation(models.Model):
+    """
+    One precomputed neighbour of a service, written by the offline builders
+    (see recommendations/cooccurrence.py and similarity.py). A service's
+    top-K list for one kind is a single index range scan on
+    (service, kind, rank).
+    """
+    ALSO_ORDERED = 'also_ordered'
+    SIMILAR = 'similar'
+    KIND_CHOICES = (
+        (ALSO_ORDERED, 'Clients also ordered'),
+        (SIMILAR, 'Similar services'),
+    )
+
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name='recommendations'
+    )
+    recommended = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    rank = models.PositiveSmallIntegerField() # 0 = best
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['service', 'kind', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['service', 'kind', 'rank'], name='unique_service_recommendation_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.service_id} -> {self.recommended_id} ({self.kind} #{self.rank})"
+
+
+class ServiceFeature(models.Model):
+    """
+    Inverted index of the content-based similarity: one row per service and
+    each of its most distinctive hashed text features (see
+    recommendations/similarity.py). Candidates for a service are found with
+    one indexed lookup on `feature` instead of comparing texts.
+    """
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    feature = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['feature'], name='service_feature_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.service_id}: {self.feature}"
+
+
+# Title, description or category edits move a service in the similarity index;
+# the worker re-indexes it (the key collapses repeated saves)
+@receiver(post_save, sender=Service)
+def reindex_similar_services_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    enqueue('recommendations.refresh_similar_services', key=f'similar:{instance.pk}', service_ids=[instance.pk])
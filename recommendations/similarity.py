@@ -0,0 +1,310 @@
+# recommendations/similarity.py
+
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from scipy import sparse
+
+from services.models import Service
+from .cooccurrence import store_neighbours
+from .models import ServiceFeature, ServiceRecommendation
+
+# Document frequencies of the last full build. New and edited services are
+# weighted with them; a missing value forces a full build.
+INDEX_STATE_KEY = 'recommendations:similar:state'
+
+# Hashed feature space (no vocabulary to store or keep in sync)
+FEATURES = 1 << 18
+
+# Title words count more than description words; the category is one feature
+TITLE_WEIGHT = 3
+CATEGORY_WEIGHT = 2
+
+# Most distinctive features per service written to the inverted index
+KEY_FEATURES = 8
+# Features shared by more services are too common to find neighbours with
+MAX_POSTINGS = 1000
+# Candidates (most shared key features) reranked by exact cosine per service
+CANDIDATES = 200
+
+# Services vectorized/scored per batch
+BATCH_SIZE = 2000
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset(
+    'a an and are as at be by can for from get have i in is it me my of on or our '
+    'that the this to we will with you your'.split()
+)
+
+
+# 1. Vectorizing
+
+def _hash(token):
+    return zlib.crc32(token.encode()) & (FEATURES - 1)
+
+
+def text_features(title, description, category_id):
+    """
+    Weighted hashed term counts of one service.
+    """
+    counts = Counter()
+    for weight, text in ((TITLE_WEIGHT, title), (1, description)):
+        for token in TOKEN_RE.findall((text or '').lower()):
+            if len(token) > 1 and token not in STOP_WORDS:
+                counts[_hash('w:' + token)] += weight
+    if category_id is not None:
+        counts[_hash(f'c:{category_id}')] += CATEGORY_WEIGHT
+    return counts
+
+
+def _term_matrix(rows):
+    """
+    Sublinear term frequencies (1 + log tf) of a list of feature Counters.
+    """
+    indptr, indices, data = [0], [], []
+    for counts in rows:
+        indices.extend(counts.keys())
+        data.extend(counts.values())
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+        shape=(len(rows), FEATURES),
+    )
+    matrix.sort_indices()
+    matrix.data = 1 + np.log(matrix.data)
+    return matrix
+
+
+def _weigh(term_matrix, state):
+    """
+    TF-IDF rows scaled to unit length, so dot products are cosines.
+    """
+    idf = np.log((1 + state['documents']) / (1 + state['df'])).astype(np.float32) + 1
+    vectors = term_matrix.multiply(idf.reshape(1, -1)).tocsr()
+    norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ vectors
+
+
+def _key_features(vectors, df):
+    """
+    Per row, the KEY_FEATURES highest weighted features that are rare
+    enough to index.
+    """
+    keys = []
+    for row in range(vectors.shape[0]):
+        begin, end = vectors.indptr[row], vectors.indptr[row + 1]
+        features, weights = vectors.indices[begin:end], vectors.data[begin:end]
+        usable = df[features] <= MAX_POSTINGS
+        features, weights = features[usable], weights[usable]
+        if len(features) > KEY_FEATURES:
+            features = features[np.argpartition(-weights, KEY_FEATURES - 1)[:KEY_FEATURES]]
+        keys.append(np.sort(features))
+    return keys
+
+
+def _top_per_row(rows, columns, values, limit):
+    """
+    Keeps the `limit` highest values per row of (rows, columns, values)
+    triplets, sorted by row then value (ties by column).
+    """
+    order = np.lexsort((columns, -values, rows))
+    rows, columns, values = rows[order], columns[order], values[order]
+    _, starts, sizes = np.unique(rows, return_index=True, return_counts=True)
+    rank = np.arange(len(rows)) - np.repeat(starts, sizes)
+    keep = rank < limit
+    return rows[keep], columns[keep], values[keep]
+
+
+def _pair_scores(vectors, rows, columns):
+    return np.asarray(vectors[rows].multiply(vectors[columns]).sum(axis=1)).ravel()
+
+
+def _group(rows, columns, values, ids):
+    """
+    {id of row: [(id of column, value), ...]} from sorted triplets.
+    """
+    grouped = {}
+    for row, column, value in zip(rows.tolist(), columns.tolist(), values.tolist()):
+        grouped.setdefault(int(ids[row]), []).append((int(ids[column]), float(value)))
+    return grouped
+
+
+# 2. Index state and loading
+
+def _load_state():
+    state = cache.get(INDEX_STATE_KEY)
+    if state is None:
+        return None
+    df = np.zeros(FEATURES, dtype=np.int32)
+    df[state['features']] = state['counts']
+    return {'documents': state['documents'], 'df': df}
+
+
+def _save_state(documents, df):
+    # Stored sparse: only the features that occur
+    features = np.flatnonzero(df).astype(np.int32)
+    cache.set(INDEX_STATE_KEY, {
+        'documents': documents,
+        'features': features,
+        'counts': df[features].astype(np.int32),
+    }, None)
+
+
+def _service_texts(services):
+    """
+    (ids, feature Counters) of a Service queryset, fetched in batches.
+    """
+    ids, rows = [], []
+    texts = services.order_by('pk').values_list('pk', 'title', 'description', 'category_id')
+    for pk, title, description, category_id in texts.iterator(chunk_size=BATCH_SIZE):
+        ids.append(pk)
+        rows.append(text_features(title, description, category_id))
+    return np.asarray(ids, dtype=np.int64), rows
+
+
+def _store_features(ids, keys, replace_all=False):
+    rows = [
+        ServiceFeature(service_id=int(service_id), feature=int(feature))
+        for service_id, features in zip(ids, keys)
+        for feature in features
+    ]
+    with transaction.atomic():
+        if replace_all:
+            ServiceFeature.objects.all().delete()
+        else:
+            ServiceFeature.objects.filter(service_id__in=ids.tolist()).delete()
+        ServiceFeature.objects.bulk_create(rows, batch_size=1000)
+
+
+# 3. Full build
+
+def build_similar_services():
+    """
+    Rebuilds the content index and every "similar services" list; returns
+    the number of services indexed.
+
+    Each service becomes a hashed TF-IDF vector over its title, description
+    and category. Its few most distinctive features go into an inverted
+    index (ServiceFeature); services sharing the most key features are the
+    candidates, reranked by exact cosine. This finds approximate nearest
+    neighbours without comparing every pair of services.
+    """
+    k = settings.RECOMMENDATIONS_TOP_K
+    ids, rows = _service_texts(Service.objects.all())
+    term_matrix = sparse.vstack(
+        [_term_matrix(rows[start:start + BATCH_SIZE]) for start in range(0, len(rows), BATCH_SIZE)]
+        or [_term_matrix([])]
+    ).tocsr()
+    df = np.bincount(term_matrix.indices, minlength=FEATURES).astype(np.int32)
+    vectors = _weigh(term_matrix, {'documents': len(ids), 'df': df}).tocsr()
+    keys = _key_features(vectors, df)
+
+    # Binary service x key feature matrix; K @ K.T counts shared key features
+    key_matrix = sparse.csr_matrix(
+        (
+            np.ones(sum(len(features) for features in keys), dtype=np.float32),
+            np.concatenate(keys or [np.empty(0, dtype=np.int32)]),
+            np.concatenate([[0], np.cumsum([len(features) for features in keys], dtype=np.int64)]),
+        ),
+        shape=(len(ids), FEATURES),
+    )
+    by_feature = key_matrix.T.tocsr()
+
+    neighbours = {int(service_id): [] for service_id in ids}
+    for start in range(0, len(ids), BATCH_SIZE):
+        shared = (key_matrix[start:start + BATCH_SIZE] @ by_feature).tocoo()
+        rows_, columns = shared.row + start, shared.col
+        others = rows_ != columns
+        rows_, columns, counts = _top_per_row(rows_[others], columns[others], shared.data[others], CANDIDATES)
+        scores = _pair_scores(vectors, rows_, columns)
+        positive = scores > 0
+        neighbours.update(_group(*_top_per_row(rows_[positive], columns[positive], scores[positive], k), ids))
+
+    store_neighbours(ServiceRecommendation.SIMILAR, neighbours, replace_all=True)
+    _store_features(ids, keys, replace_all=True)
+    _save_state(len(ids), df)
+    return len(ids)
+
+
+# 4. Incremental updates (background job on Service save)
+
+def refresh_similar_services(service_ids):
+    """
+    Re-indexes the given services after an edit: rewrites their key
+    features and "similar services" lists, and updates the lists of the
+    services they now appear in (or used to). Weights come from the last
+    full build; a full build runs instead when there is none.
+
+    A service that stops being similar to one it used to be listed under
+    can leave that list shorter than K until the next full build, which
+    also refreshes the document frequencies.
+    """
+    state = _load_state()
+    if state is None:
+        build_similar_services()
+        return
+
+    k = settings.RECOMMENDATIONS_TOP_K
+    ids, rows = _service_texts(Service.objects.filter(pk__in=service_ids))
+    if not len(ids):
+        return
+    changed_vectors = _weigh(_term_matrix(rows), state).tocsr()
+    keys = _key_features(changed_vectors, state['df'])
+    _store_features(ids, keys)
+
+    # Candidates of each changed service: one indexed lookup per service
+    candidates = {}
+    for service_id, features in zip(ids.tolist(), keys):
+        candidates[service_id] = list(
+            ServiceFeature.objects.filter(feature__in=features.tolist()).exclude(service_id=service_id)
+            .values('service_id').annotate(shared=Count('id')).order_by('-shared', 'service_id')
+            .values_list('service_id', flat=True)[:CANDIDATES]
+        )
+    referrers = set(
+        ServiceRecommendation.objects.filter(kind=ServiceRecommendation.SIMILAR, recommended_id__in=ids.tolist())
+        .values_list('service_id', flat=True)
+    )
+    others = (set().union(*candidates.values()) | referrers) - set(ids.tolist())
+    other_ids, other_rows = _service_texts(Service.objects.filter(pk__in=others))
+
+    all_ids = np.concatenate([ids, other_ids])
+    vectors = sparse.vstack([changed_vectors, _weigh(_term_matrix(other_rows), state)]).tocsr()
+    position = {int(service_id): index for index, service_id in enumerate(all_ids)}
+
+    # Lists of the changed services
+    pairs = [(position[s], position[c]) for s, found in candidates.items() for c in found if c in position]
+    lists = {int(service_id): [] for service_id in ids}
+    if pairs:
+        rows_, columns = (np.asarray(side) for side in zip(*pairs))
+        scores = _pair_scores(vectors, rows_, columns)
+        positive = scores > 0
+        lists.update(_group(*_top_per_row(rows_[positive], columns[positive], scores[positive], k), all_ids))
+
+    # Lists of the other services: drop the changed services, re-add them
+    # with their new scores and keep the best K
+    changed = set(ids.tolist())
+    current = {}
+    for row in ServiceRecommendation.objects.filter(
+        kind=ServiceRecommendation.SIMILAR, service_id__in=others
+    ).order_by('rank'):
+        current.setdefault(row.service_id, []).append((row.recommended_id, row.score))
+    for other_id in others:
+        if other_id not in position:
+            continue
+        ranked = [(pk, score) for pk, score in current.get(other_id, []) if pk not in changed]
+        for service_id in changed:
+            score = float(vectors[position[other_id]].multiply(vectors[position[service_id]]).sum())
+            if score > 0:
+                ranked.append((service_id, score))
+        ranked.sort(key=lambda pair: (-pair[1], pair[0]))
+        if ranked[:k] != current.get(other_id, []):
+            lists[other_id] = ranked[:k]
+
+    store_neighbours(ServiceRecommendation.SIMILAR, lists)
@@ -0,0 +1,13 @@
+# recommendations/tasks.py
+
+from jobs.queue import task
+from . import similarity
+
+
+@task()
+def refresh_similar_services(service_ids):
+    """
+    Re-indexes edited services for "similar services" (queued by the
+    Service signal in recommendations/models.py).
+    """
+    similarity.refresh_similar_services(service_ids)
@@ -0,0 +1,40 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from accounts.models import User
+from jobs.watermarks import get_watermark
+from orders.models import Order
+from services.models import Category, Service
+from .cooccurrence import LAST_BUILD_WATERMARK, build_also_ordered
+from .models import ServiceRecommendation
+
+
+class BuildAlsoOrderedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user('seller', 'seller@example.com', 'pw', is_seller=True, is_client=False)
+        category = Category.objects.create(name='Web', slug='web')
+        cls.services = [
+            Service.objects.create(
+                seller=seller, category=category, title=f'Service {i}', slug=f'service-{i}',
+                description='Description', price=10,
+            )
+            for i in range(3)
+        ]
+        for i in range(2):
+            client = User.objects.create_user(f'client{i}', f'client{i}@example.com', 'pw')
+            for service in cls.services[:2]:
+                Order.objects.create(client=client, seller=seller, service=service, status='COMPLETED')
+
+    def test_full_then_incremental(self):
+        self.assertIsNone(get_watermark(LAST_BUILD_WATERMARK))
+        self.assertEqual(build_also_ordered(), 2)
+        self.assertTrue(
+            ServiceRecommendation.objects.filter(
+                kind=ServiceRecommendation.ALSO_ORDERED, service=self.services[0], recommended=self.services[1],
+            ).exists()
+        )
+        # The watermark lives in the database, not the cache
+        cache.clear()
+        self.assertEqual(build_also_ordered(), 0)
@@ -1,3 +1,23 @@
+# reviews/admin.py
+
 from django.contrib import admin
+from service_marketplace.admin_tools import FastChangeListMixin, username_filter
+from .models import RatingDistribution, Review
+
+@admin.register(Review)
+class ReviewAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('service', 'client', 'rating', 'created_at')
+    list_select_related = ('service', 'client')
+    list_filter = ('rating', username_filter('client'))
+    search_fields = ('=order__order_ref', '^service__title')
+    autocomplete_fields = ('service', 'client')
+    # Order.__str__ needs the service, so orders are picked by id
+    raw_id_fields = ('order',)
 
-# Register your models here.
+@admin.register(RatingDistribution)
+class RatingDistributionAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('service', 'stars_5', 'stars_4', 'stars_3', 'stars_2', 'stars_1')
+    list_select_related = ('service',)
+    search_fields = ('^service__title',)
+    # Maintained by the review signals; repair with `reconcile_rating_distribution`
+    readonly_fields = ('service', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
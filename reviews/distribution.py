@@ -0,0 +1,135 @@
+# reviews/distribution.py
+
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from services.facets import rating_band
+
+from .models import RatingDistribution, Review
+
+STAR_FIELDS = {stars: f'stars_{stars}' for stars in range(1, 6)}
+
+# Services per batch when reconciling
+RECONCILE_BATCH_SIZE = 500
+
+
+# 1. Incremental updates (called from the Review signals)
+
+def apply_rating_changes(service_id, changes):
+    """
+    Adds {stars: delta} to a service's distribution row, creating it when
+    missing. Increments use F() so concurrent reviews don't clobber each
+    other.
+
+    Returns True when the change moved the service into another rating
+    band, i.e. changed the results of the min_rating filter and the facet
+    counts.
+    """
+    fields = {STAR_FIELDS[stars]: F(STAR_FIELDS[stars]) + delta for stars, delta in changes.items() if delta}
+    if not fields:
+        return False
+    with transaction.atomic():
+        RatingDistribution.objects.get_or_create(service_id=service_id)
+        RatingDistribution.objects.filter(pk=service_id).update(**fields)
+        # The row stays locked by the update, so this is the count the change produced
+        counts = RatingDistribution.objects.get(pk=service_id).counts()
+    previous = {stars: count - changes.get(stars, 0) for stars, count in counts.items()}
+    return rating_band(previous) != rating_band(counts)
+
+
+def record_review_change(review, created):
+    """
+    Applies a saved review to the distributions. Returns True when a
+    service changed rating band (see `apply_rating_changes`).
+    """
+    if created:
+        return apply_rating_changes(review.service_id, {review.rating: 1})
+    previous = getattr(review, '_loaded_rating', None)
+    if previous is None:
+        return False
+    previous_service_id = review._loaded_service_id
+    if previous_service_id != review.service_id:
+        # Moved to another service: counted there from now on
+        removed = apply_rating_changes(previous_service_id, {previous: -1})
+        added = apply_rating_changes(review.service_id, {review.rating: 1})
+        return removed or added
+    if previous != review.rating:
+        return apply_rating_changes(review.service_id, {previous: -1, review.rating: 1})
+    return False
+
+
+def record_review_delete(review):
+    # The stored row is what was counted, whatever the instance holds now
+    rating = getattr(review, '_loaded_rating', review.rating)
+    service_id = getattr(review, '_loaded_service_id', review.service_id)
+    return apply_rating_changes(service_id, {rating: -1})
+
+
+# 2. Reading
+
+def distribution_counts(service):
+    """
+    {stars: review count} of a service, from its distribution row (load it
+    with select_related('rating_distribution') to avoid the query). Services
+    without reviews may have no row yet.
+    """
+    try:
+        return service.rating_distribution.counts()
+    except RatingDistribution.DoesNotExist:
+        return {stars: 0 for stars in STAR_FIELDS}
+
+
+# 3. Reconciliation
+
+def _review_counts(service_ids):
+    counts = defaultdict(Counter)
+    rows = (
+        Review.objects.filter(service_id__in=service_ids).order_by()
+        .values_list('service_id', 'rating').annotate(count=Count('id'))
+    )
+    for service_id, rating, count in rows:
+        counts[service_id][rating] = count
+    return counts
+
+
+def find_drift(service_ids):
+    """
+    Compares the stored distributions of the given services with counts
+    from the reviews table. Returns {service_id: (stored, actual)} for the
+    services that differ, both as {stars: count}.
+    """
+    actual = _review_counts(service_ids)
+    stored = {row.pk: row.counts() for row in RatingDistribution.objects.filter(pk__in=service_ids)}
+    drift = {}
+    for service_id in service_ids:
+        expected = {stars: actual[service_id][stars] for stars in STAR_FIELDS}
+        current = stored.get(service_id, {stars: 0 for stars in STAR_FIELDS})
+        if current != expected:
+            drift[service_id] = (current, expected)
+    return drift
+
+
+def reconcile(service_ids, fix=False):
+    """
+    Checks the distributions of `service_ids` batch by batch and, with `fix`,
+    overwrites the drifted rows with the recounted values. Returns the drift
+    found (see `find_drift`).
+    """
+    service_ids = sorted(service_ids)
+    drift = {}
+    for start in range(0, len(service_ids), RECONCILE_BATCH_SIZE):
+        batch = service_ids[start:start + RECONCILE_BATCH_SIZE]
+        with transaction.atomic():
+            # Locked so reviews written meanwhile wait instead of being lost
+            list(RatingDistribution.objects.select_for_update().filter(pk__in=batch).values_list('pk'))
+            found = find_drift(batch)
+            if fix:
+                for service_id, (_, expected) in found.items():
+                    RatingDistribution.objects.update_or_create(
+                        service_id=service_id,
+                        defaults={STAR_FIELDS[stars]: count for stars, count in expected.items()},
+                    )
+        drift.update(found)
+    return drift
@@ -0,0 +1,95 @@
+# reviews/listing.py
+
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+from service_marketplace.cache_tools import get_or_compute
+from .distribution import distribution_counts
+from .models import Review
+
+# Histogram rows, top down
+STARS = (5, 4, 3, 2, 1)
+
+
+# 1. Cursor pagination
+
+def encode_cursor(review):
+    raw = f'{review.created_at.isoformat()}|{review.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (created_at, pk) position a cursor points after.
+    Raises ValueError on malformed cursors.
+    """
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def review_page(service_id, cursor=None, limit=None):
+    """
+    One page of a service's reviews, newest first, as (reviews, next_cursor).
+    Pages are keyed on the last (created_at, pk) seen instead of an offset,
+    so every page is an index range scan however deep the reader goes.
+    next_cursor is None on the last page.
+    """
+    limit = limit or settings.REVIEWS_PAGE_SIZE
+    reviews = (
+        Review.objects.filter(service_id=service_id)
+        .select_related('client')
+        .order_by('-created_at', '-pk')
+    )
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        reviews = reviews.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    # One extra row tells whether another page follows
+    page = list(reviews[:limit + 1])
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode_cursor(page[-1])
+    return page, None
+
+
+def first_reviews_key(service_id):
+    return f'reviews:first:{service_id}'
+
+
+def first_review_page(service_id):
+    """
+    `review_page` without a cursor, the batch rendered on the service page,
+    cached per service. Review saves mark it stale (see reviews/models.py).
+    """
+    return get_or_compute(
+        'reviews', first_reviews_key(service_id), lambda: review_page(service_id), settings.REVIEWS_CACHE_TIMEOUT
+    )
+
+
+# 2. Rating histogram
+
+def rating_histogram(service):
+    """
+    Review count per star (5 to 1) plus the derived total and average, for
+    the summary block. Read from the service's RatingDistribution row, so no
+    aggregate runs over the reviews.
+    """
+    counts = distribution_counts(service)
+    total = sum(counts.values())
+    rating_sum = sum(stars * count for stars, count in counts.items())
+    return {
+        'total_reviews': total,
+        # Rounded like Service.average_rating
+        'average_rating': round(rating_sum / total, 1) if total else None,
+        'rating_histogram': [
+            {'stars': stars, 'count': counts[stars], 'percent': round(100 * counts[stars] / total) if total else 0}
+            for stars in STARS
+        ],
+    }
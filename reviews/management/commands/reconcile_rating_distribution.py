@@ -0,0 +1,54 @@
+# reviews/management/commands/reconcile_rating_distribution.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.distribution import reconcile
+from services.models import Service
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the per-service rating distributions with the reviews table "
+        "and reports drift. With --fix the drifted rows are rewritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--service',
+            action='append',
+            dest='services',
+            metavar='SLUG',
+            help="Only check this service (repeatable).",
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help="Overwrite drifted distributions with the recounted values.",
+        )
+
+    def handle(self, *args, **options):
+        services = Service.objects.all()
+        if options['services']:
+            services = services.filter(slug__in=options['services'])
+            missing = set(options['services']) - set(services.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(f"Unknown services: {', '.join(sorted(missing))}")
+
+        service_ids = list(services.values_list('pk', flat=True))
+        drift = reconcile(service_ids, fix=options['fix'])
+
+        for service_id, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"Service {service_id}: stored {_format(stored)}, actual {_format(actual)}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f"Checked {len(service_ids)} services, no drift."))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(drift)} of {len(service_ids)} services."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(drift)} of {len(service_ids)} services drifted; rerun with --fix to repair."
+            ))
+
+
+def _format(counts):
+    return ' '.join(f'{stars}*:{counts[stars]}' for stars in sorted(counts))
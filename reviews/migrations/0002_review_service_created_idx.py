@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0003_order_ref_search_index"),
+        ("reviews", "0001_initial"),
+        ("services", "0004_service_title_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["service", "-created_at", "-id"],
+                name="review_service_created_idx",
+            ),
+        ),
+    ]
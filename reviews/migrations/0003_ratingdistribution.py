@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_distributions(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    RatingDistribution = apps.get_model('reviews', 'RatingDistribution')
+    rows = {}
+    counts = Review.objects.order_by().values_list('service_id', 'rating').annotate(count=Count('id'))
+    for service_id, rating, count in counts:
+        row = rows.setdefault(service_id, RatingDistribution(service_id=service_id))
+        setattr(row, f'stars_{rating}', count)
+    RatingDistribution.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0002_review_service_created_idx"),
+        ("services", "0004_service_title_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RatingDistribution",
+            fields=[
+                (
+                    "service",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rating_distribution",
+                        serialize=False,
+                        to="services.service",
+                    ),
+                ),
+                ("stars_1", models.PositiveIntegerField(default=0)),
+                ("stars_2", models.PositiveIntegerField(default=0)),
+                ("stars_3", models.PositiveIntegerField(default=0)),
+                ("stars_4", models.PositiveIntegerField(default=0)),
+                ("stars_5", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_distributions, migrations.RunPython.noop),
+    ]
@@ -1,31 +1,41 @@
 # reviews/models.py
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.conf import settings
 from services.models import Service
 from orders.models import Order
 from django.core.validators import MinValueValidator, MaxValueValidator
+from services.caching import bump_catalog_version, evict_service_pages
+from services.categories import category_slugs
+from jobs.queue import enqueue
+from service_marketplace.cache_tools import mark_stale
+from service_marketplace import nplusone
 
 class Review(models.Model):
     # Foreign Keys
-    service = models.ForeignKey(
+    service = nplusone.ForeignKey(
         Service, 
         on_delete=models.CASCADE, 
         related_name='reviews'
     )
-    client = models.ForeignKey(
+    client = nplusone.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.SET_NULL, # Keep the review if the client deletes their account
         null=True, 
         limit_choices_to={'is_client': True}
     )
     # Crucial link: Ensures one review per completed order
-    order = models.OneToOneField(
+    order = nplusone.OneToOneField(
         Order, 
         on_delete=models.CASCADE, 
         related_name='review'
     )
 
+    # Tracks objects fetched together (service_marketplace/nplusone.py)
+    objects = nplusone.TrackedManager()
+
     # Core Fields
     rating = models.IntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(5)] # Rating from 1 to 5
@@ -38,8 +48,119 @@ class Review(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Cursor pagination on the service page (see reviews/listing.py)
+            models.Index(fields=['service', '-created_at', '-id'], name='review_service_created_idx'),
+        ]
         # The (service, client) constraint is usually used, but (order) is more specific here.
         # unique_together = ('service', 'client') # Ensures a client can only review a service once (optional)
 
     def __str__(self):
-        return f"{self.rating}/5 for {self.service.title} by {self.client.username}"
\ No newline at end of file
+        return f"{self.rating}/5 for {self.service.title} by {self.client.username}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored rating and service so post_save handlers can
+        # apply the difference
+        if 'rating' in field_names and 'service_id' in field_names:
+            instance._loaded_rating = instance.rating
+            instance._loaded_service_id = instance.service_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The rating distribution is updated by the post_save receiver below,
+        # inside this transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_rating = self.rating
+        self._loaded_service_id = self.service_id
+
+
+class RatingDistribution(models.Model):
+    """
+    Number of reviews per star for one service, updated in the same
+    transaction as every Review save/delete (see reviews/distribution.py).
+    The service page reads its average and histogram from this row instead
+    of aggregating reviews; `reconcile_rating_distribution` repairs drift.
+    """
+    service = models.OneToOneField(
+        Service,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rating_distribution'
+    )
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Rating distribution for {self.service_id}"
+
+    def counts(self):
+        """
+        {stars: review count} for 1 to 5 stars.
+        """
+        return {stars: getattr(self, f'stars_{stars}') for stars in range(1, 6)}
+
+    @property
+    def total(self):
+        return sum(self.counts().values())
+
+    @property
+    def average(self):
+        # Rounded to one decimal place, None without reviews
+        counts = self.counts()
+        total = sum(counts.values())
+        if not total:
+            return None
+        return round(sum(stars * count for stars, count in counts.items()) / total, 1)
+
+@receiver([post_save, post_delete], sender=Review)
+def refresh_ranking_on_review(sender, instance, **kwargs):
+    # Runs in the job worker; the key collapses a burst of reviews into one refresh
+    service_id = instance.service_id
+    enqueue('services.refresh_service_rankings', key=f'ranking:{service_id}', service_ids=[service_id])
+
+@receiver([post_save, post_delete], sender=Review)
+def mark_first_reviews_stale(sender, instance, **kwargs):
+    from .listing import first_reviews_key # reviews.listing imports this module
+    key = first_reviews_key(instance.service_id)
+    transaction.on_commit(lambda: mark_stale(key))
+
+@receiver([post_save, post_delete], sender=Review)
+def evict_service_pages_on_review(sender, instance, **kwargs):
+    # The detail page and the first listing pages show the rating (a moved
+    # review changes the rating of both services)
+    service_ids = {instance.service_id, getattr(instance, '_loaded_service_id', instance.service_id)}
+    if Review.service.is_cached(instance) and len(service_ids) == 1:
+        pages = [(instance.service.slug, instance.service.category_id)]
+    else:
+        pages = list(Service.objects.filter(pk__in=service_ids).values_list('slug', 'category_id'))
+    slugs = [slug for slug, _ in pages]
+    category_ids = {category_id for _, category_id in pages}
+    transaction.on_commit(lambda: evict_service_pages(slugs, category_slugs(category_ids)))
+
+# Ratings are shown on catalog pages, so reviews change the catalog version.
+# Searches and facet counts only see the rating band of each service, so they
+# are retired only when a review moves a service into another band.
+def bump_catalog_version_on_review(bands_changed):
+    transaction.on_commit(lambda: bump_catalog_version(listings=bands_changed))
+
+# Runs inside the transaction of the write (Review.save wraps it in one, deletes
+# always run in one). reviews.distribution imports this module.
+@receiver(post_save, sender=Review)
+def update_rating_distribution_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Fixtures don't go through the distribution (see reconcile)
+        bump_catalog_version_on_review(True)
+        return
+    from .distribution import record_review_change
+    bump_catalog_version_on_review(record_review_change(instance, created))
+
+@receiver(post_delete, sender=Review)
+def update_rating_distribution_on_delete(sender, instance, **kwargs):
+    from .distribution import record_review_delete
+    bump_catalog_version_on_review(record_review_delete(instance))
@@ -1,3 +1,107 @@
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from orders.models import Order
+from services.models import Category, Service
+from .distribution import find_drift, reconcile
+from .models import RatingDistribution, Review
+
+
+class RatingDistributionTests(TestCase):
+    """
+    The per-star counters must always match the reviews table.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', is_seller=True, is_client=False)
+        cls.client_user = User.objects.create_user('client', 'client@example.com', 'pw')
+        category = Category.objects.create(name='Web', slug='web')
+        cls.services = [
+            Service.objects.create(
+                seller=cls.seller, category=category, title=f'Service {i}', slug=f'service-{i}',
+                description='Description', price=10,
+            )
+            for i in range(2)
+        ]
+
+    def review(self, service, rating):
+        order = Order.objects.create(client=self.client_user, seller=self.seller, service=service, status='COMPLETED')
+        return Review.objects.create(service=service, client=self.client_user, order=order, rating=rating)
+
+    def counts(self, service):
+        return RatingDistribution.objects.get(service=service).counts()
+
+    def assertConsistent(self):
+        self.assertEqual(find_drift([service.pk for service in self.services]), {})
+
+    def test_create(self):
+        self.review(self.services[0], 4)
+        self.review(self.services[0], 4)
+        self.review(self.services[0], 2)
+        self.assertEqual(self.counts(self.services[0]), {1: 0, 2: 1, 3: 0, 4: 2, 5: 0})
+        self.assertEqual(RatingDistribution.objects.get(service=self.services[0]).average, 3.3)
+        self.assertConsistent()
+
+    def test_rating_edit(self):
+        review = self.review(self.services[0], 4)
+        review.rating = 1
+        review.save()
+        # Saved again without a change: nothing to apply
+        review.save()
+        self.assertEqual(self.counts(self.services[0]), {1: 1, 2: 0, 3: 0, 4: 0, 5: 0})
+        self.assertConsistent()
+
+    def test_rating_edit_of_a_loaded_review(self):
+        self.review(self.services[0], 4)
+        review = Review.objects.get()
+        review.rating = 5
+        review.save()
+        self.assertEqual(self.counts(self.services[0]), {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+        self.assertConsistent()
+
+    def test_queryset_update_drifts_until_reconciled(self):
+        self.review(self.services[0], 4)
+        Review.objects.update(rating=3)
+        self.assertIn(self.services[0].pk, find_drift([self.services[0].pk]))
+        reconcile([service.pk for service in self.services], fix=True)
+        self.assertEqual(self.counts(self.services[0])[3], 1)
+        self.assertConsistent()
+
+    def test_delete(self):
+        review = self.review(self.services[0], 4)
+        self.review(self.services[0], 5)
+        review.delete()
+        self.assertEqual(self.counts(self.services[0]), {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+        self.assertConsistent()
+
+    def test_delete_after_unsaved_edit(self):
+        review = self.review(self.services[0], 4)
+        review.rating = 2
+        review.delete()
+        self.assertEqual(self.counts(self.services[0]), {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+        self.assertConsistent()
+
+    def test_queryset_delete(self):
+        self.review(self.services[0], 4)
+        self.review(self.services[1], 3)
+        Review.objects.all().delete()
+        self.assertEqual(sum(self.counts(self.services[0]).values()), 0)
+        self.assertEqual(sum(self.counts(self.services[1]).values()), 0)
+        self.assertConsistent()
+
+    def test_service_move(self):
+        review = self.review(self.services[0], 4)
+        review.service = self.services[1]
+        review.rating = 5
+        review.save()
+        self.assertEqual(self.counts(self.services[0]), {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+        self.assertEqual(self.counts(self.services[1]), {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+        self.assertConsistent()
+
+    def test_delete_after_unsaved_move(self):
+        review = self.review(self.services[0], 4)
+        review.service = self.services[1]
+        review.delete()
+        self.assertEqual(sum(self.counts(self.services[0]).values()), 0)
+        self.assertConsistent()
@@ -6,4 +6,7 @@ from . import views
 urlpatterns = [
     # Submit a review for a specific completed order
     path('create/<int:order_pk>/', views.ReviewCreateView.as_view(), name='create_review'),
+
+    # Further reviews of a service, loaded by the service page (cursor paginated)
+    path('service/<slug:slug>/', views.service_reviews, name='service_reviews'),
 ]
\ No newline at end of file
@@ -5,10 +5,15 @@ from django.views.generic import CreateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.urls import reverse_lazy, reverse
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_GET
 
 from orders.models import Order
+from services.models import Service
 from .models import Review
 from .forms import ReviewForm
+from .listing import review_page
 
 class ReviewCreateView(LoginRequiredMixin, CreateView):
     model = Review
@@ -53,4 +58,20 @@ class ReviewCreateView(LoginRequiredMixin, CreateView):
         context = super().get_context_data(**kwargs)
         context['order'] = self.order
         context['service'] = self.order.service
-        return context
\ No newline at end of file
+        return context
+
+@require_GET
+def service_reviews(request, slug):
+    """
+    Next batch of a service's reviews for the "Load more" button on the
+    service page: the rendered list items plus the cursor of the batch after
+    it (null on the last one).
+    """
+    service_id = get_object_or_404(Service.objects.only('pk'), slug=slug).pk
+    try:
+        reviews, next_cursor = review_page(service_id, request.GET.get('cursor'))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+
+    html = render_to_string('reviews/review_items.html', {'reviews': reviews}, request=request)
+    return JsonResponse({'html': html, 'next': next_cursor})
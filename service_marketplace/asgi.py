@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'service_marketplace.settings')
 
 application = get_asgi_application()
+
+# Compile templates and import views before the first request arrives
+from service_marketplace.warmup import warmup_on_startup  # noqa: E402
+
+warmup_on_startup()
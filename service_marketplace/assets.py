@@ -0,0 +1,37 @@
+# service_marketplace/assets.py
+#
+# Template library for the per-page static bundles in settings.STATIC_BUNDLES,
+# registered as {% load assets %}. The bundles themselves are built by
+# collectstatic (see service_marketplace/storage.py).
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+BUNDLE_DIR = 'bundles'
+
+TAGS = {
+    '.css': '<link rel="stylesheet" href="{}">',
+    '.js': '<script src="{}"></script>',
+}
+
+
+def bundle_path(name):
+    return f'{BUNDLE_DIR}/{name}'
+
+
+@register.simple_tag
+def bundle(name):
+    """
+    Renders the tags for a bundle, e.g. {% bundle 'base.css' %}: one tag for
+    the hashed, concatenated file, or one per source file while
+    STATIC_BUNDLES_ENABLED is off (development, no collectstatic needed).
+    """
+    sources = settings.STATIC_BUNDLES[name]
+    tag = TAGS['.css' if name.endswith('.css') else '.js']
+    if settings.STATIC_BUNDLES_ENABLED:
+        return format_html(tag, static(bundle_path(name)))
+    return format_html_join('\n', tag, ((static(source),) for source in sources))
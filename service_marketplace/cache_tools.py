@@ -0,0 +1,233 @@
+# service_marketplace/cache_tools.py
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two looks at the cache while another process computes
+WAIT_POLL_INTERVAL = 0.05
+
+METRICS_PREFIX = 'cachemetrics'
+METRIC_NAMES_KEY = f'{METRICS_PREFIX}:names'
+# hit: fresh value, stale: old value served while another process recomputes,
+# wait: value computed by another process after waiting, recompute: computed
+# here, lock_timeout: computed here because the other process took too long
+METRIC_EVENTS = ('hit', 'stale', 'wait', 'recompute', 'lock_timeout')
+
+
+# 1. Reading and computing
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _acquire(key):
+    return cache.add(_lock_key(key), 1, settings.CACHE_LOCK_TIMEOUT)
+
+
+def _entry(value, timeout, version):
+    """
+    The stored (value, fresh until, version) and its cache timeout.
+    """
+    if timeout is None:
+        return (value, float('inf'), version), None
+    # Jittered, so entries written together don't all expire together
+    fresh = timeout * random.uniform(1 - settings.CACHE_TTL_JITTER, 1)
+    return (value, time.time() + fresh, version), fresh + settings.CACHE_STALE_TIMEOUT
+
+
+def _store(key, value, timeout, version):
+    cache.set(key, *_entry(value, timeout, version))
+
+
+def _recompute(name, key, compute, timeout, version, locked=True):
+    try:
+        value = compute()
+        _store(key, value, timeout, version)
+    finally:
+        if locked:
+            cache.delete(_lock_key(key))
+    record(name, 'recompute')
+    return value
+
+
+def get_or_compute(name, key, compute, timeout, version=None):
+    """
+    The cached value of `key`, computed with `compute()` when missing or
+    out of date. `name` groups keys of one kind for the metrics ('facets').
+
+    Entries are fresh for about `timeout` seconds (jittered down by up to
+    CACHE_TTL_JITTER) and only while stored under the same `version`,
+    e.g. the catalog version, so a version bump or `mark_stale` retires
+    them without deleting them. Once an entry is out of date one process
+    recomputes it (single flight through a lock key) while the others keep
+    serving the old value for up to CACHE_STALE_TIMEOUT seconds. Without any
+    value to serve, the others wait up to CACHE_LOCK_WAIT seconds for the
+    result before computing it themselves.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until, entry_version = entry
+        if time.time() < fresh_until and entry_version == version:
+            record(name, 'hit')
+            return value
+        if not _acquire(key):
+            record(name, 'stale')
+            return value
+        return _recompute(name, key, compute, timeout, version)
+
+    if _acquire(key):
+        return _recompute(name, key, compute, timeout, version)
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry[2] == version:
+            record(name, 'wait')
+            return entry[0]
+    record(name, 'lock_timeout')
+    return _recompute(name, key, compute, timeout, version, locked=False)
+
+
+async def _arecompute(name, key, compute, timeout, version, locked=True):
+    try:
+        value = await compute()
+        await cache.aset(key, *_entry(value, timeout, version))
+    finally:
+        if locked:
+            await cache.adelete(_lock_key(key))
+    record(name, 'recompute')
+    return value
+
+
+async def aget_or_compute(name, key, compute, timeout, version=None):
+    """
+    get_or_compute for async views: `compute` is a coroutine function, and
+    waiting for another process's result doesn't block the event loop.
+    """
+    entry = await cache.aget(key)
+    if entry is not None:
+        value, fresh_until, entry_version = entry
+        if time.time() < fresh_until and entry_version == version:
+            record(name, 'hit')
+            return value
+        if not await cache.aadd(_lock_key(key), 1, settings.CACHE_LOCK_TIMEOUT):
+            record(name, 'stale')
+            return value
+        return await _arecompute(name, key, compute, timeout, version)
+
+    if await cache.aadd(_lock_key(key), 1, settings.CACHE_LOCK_TIMEOUT):
+        return await _arecompute(name, key, compute, timeout, version)
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(WAIT_POLL_INTERVAL)
+        entry = await cache.aget(key)
+        if entry is not None and entry[2] == version:
+            record(name, 'wait')
+            return entry[0]
+    record(name, 'lock_timeout')
+    return await _arecompute(name, key, compute, timeout, version, locked=False)
+
+
+def refresh(name, key, compute, timeout, version=None):
+    """
+    Recomputes `key` unless it is fresh for `version` or another process is
+    already on it (prewarming). Returns True when it computed the value.
+    """
+    if is_fresh(key, version) or not _acquire(key):
+        return False
+    _recompute(name, key, compute, timeout, version)
+    return True
+
+
+def is_fresh(key, version=None):
+    entry = cache.get(key)
+    return entry is not None and time.time() < entry[1] and entry[2] == version
+
+
+def mark_stale(*keys):
+    """
+    Retires entries without dropping them: the next reader recomputes while
+    the others keep getting the old value.
+    """
+    entries = cache.get_many(keys)
+    if entries:
+        cache.set_many(
+            {key: (value, 0, version) for key, (value, _, version) in entries.items()},
+            settings.CACHE_STALE_TIMEOUT,
+        )
+
+
+# 2. Metrics
+# Counted in memory and added to shared counters every
+# CACHE_METRICS_FLUSH_SECONDS, so reads don't pay an extra round trip.
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record(name, event):
+    global _last_flush
+    with _pending_lock:
+        _pending[(name, event)] += 1
+        if time.monotonic() - _last_flush < settings.CACHE_METRICS_FLUSH_SECONDS:
+            return
+        counts = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    flush_metrics(counts)
+
+
+def _metric_key(name, event):
+    return f'{METRICS_PREFIX}:{name}:{event}'
+
+
+def flush_metrics(counts=None):
+    """
+    Adds {(name, event): count} (by default this process's pending counts)
+    to the shared counters.
+    """
+    if counts is None:
+        with _pending_lock:
+            counts = dict(_pending)
+            _pending.clear()
+    try:
+        names = set(cache.get(METRIC_NAMES_KEY) or ())
+        if not {name for name, _ in counts} <= names:
+            cache.set(METRIC_NAMES_KEY, names | {name for name, _ in counts}, None)
+        for (name, event), count in counts.items():
+            key = _metric_key(name, event)
+            if not cache.add(key, count, None):
+                cache.incr(key, count)
+    except Exception:
+        # Metrics are best effort and never fail the request
+        logger.exception("Flushing cache metrics failed")
+
+
+def cache_metrics():
+    """
+    {name: {event: count}} from the shared counters.
+    """
+    names = sorted(cache.get(METRIC_NAMES_KEY) or ())
+    keys = {_metric_key(name, event): (name, event) for name in names for event in METRIC_EVENTS}
+    values = cache.get_many(list(keys))
+    metrics = {name: dict.fromkeys(METRIC_EVENTS, 0) for name in names}
+    for key, count in values.items():
+        name, event = keys[key]
+        metrics[name][event] = count
+    return metrics
+
+
+def reset_metrics():
+    names = cache.get(METRIC_NAMES_KEY) or ()
+    cache.delete_many([_metric_key(name, event) for name in names for event in METRIC_EVENTS])
+    cache.delete(METRIC_NAMES_KEY)
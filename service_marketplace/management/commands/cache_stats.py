@@ -0,0 +1,27 @@
+# service_marketplace/management/commands/cache_stats.py
+
+from django.core.management.base import BaseCommand
+
+from service_marketplace.cache_tools import METRIC_EVENTS, cache_metrics, reset_metrics
+
+
+class Command(BaseCommand):
+    help = "Shows the hit/stale/wait/recompute counters of the computed caches (see service_marketplace/cache_tools.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters after printing them.")
+
+    def handle(self, *args, **options):
+        metrics = cache_metrics()
+        if not metrics:
+            self.stdout.write("No cache metrics recorded yet.")
+        else:
+            self.stdout.write(f"{'cache':<16}" + ''.join(f"{event:>14}" for event in METRIC_EVENTS) + f"{'hit ratio':>11}")
+            for name, counts in metrics.items():
+                reads = sum(counts.values())
+                served = counts['hit'] + counts['stale'] + counts['wait']
+                ratio = f"{served / reads:.1%}" if reads else '-'
+                self.stdout.write(f"{name:<16}" + ''.join(f"{counts[event]:>14}" for event in METRIC_EVENTS) + f"{ratio:>11}")
+        if options['reset']:
+            reset_metrics()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
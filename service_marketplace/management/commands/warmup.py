@@ -0,0 +1,17 @@
+# service_marketplace/management/commands/warmup.py
+
+from django.core.management.base import BaseCommand
+
+from service_marketplace.warmup import queue_search_prewarm, warmup
+
+
+class Command(BaseCommand):
+    help = "Compiles the project templates, imports every view module and queues the search prewarm (e.g. from a deploy step)."
+
+    def handle(self, *args, **options):
+        result = warmup()
+        queue_search_prewarm()
+        self.stdout.write(self.style.SUCCESS(
+            f"Compiled {result['templates']} templates and {result['urls']} URL names in "
+            f"{result['seconds']:.2f}s; search prewarm queued."
+        ))
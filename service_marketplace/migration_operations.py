@@ -0,0 +1,56 @@
+# service_marketplace/migration_operations.py
+
+from django.db import migrations
+
+
+class PostgresOnlyRunSQL(migrations.RunSQL):
+    """
+    RunSQL that only runs on PostgreSQL, for indexes other databases
+    can't express (expression indexes with pattern operator classes).
+    Elsewhere the migration is recorded as applied without doing anything.
+    """
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def trigram_extension():
+    """
+    Enables pg_trgm (similarity functions/operators and their index
+    operator classes). Needs a role allowed to create the extension.
+    """
+    return PostgresOnlyRunSQL(
+        sql='CREATE EXTENSION IF NOT EXISTS pg_trgm;',
+        reverse_sql=migrations.RunSQL.noop,
+    )
+
+
+def trigram_index(name, table, column):
+    """
+    GIN trigram index serving the pg_trgm similarity operators (`<%`, `%`)
+    and `column ILIKE '%...%'` (the trigram_contains lookup of
+    services/fuzzy.py). Django's icontains compares UPPER(column::text),
+    which this index can't serve. Built concurrently, so the migration must
+    set atomic = False.
+    """
+    return PostgresOnlyRunSQL(
+        sql=f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops);',
+        reverse_sql=f'DROP INDEX CONCURRENTLY IF EXISTS {name};',
+    )
+
+
+def upper_like_index(name, table, column):
+    """
+    Index serving Django's case-insensitive lookups (iexact/istartswith,
+    i.e. the admin's '=' and '^' search prefixes), which compile to
+    UPPER(column::text) = / LIKE on PostgreSQL. Built concurrently, so the
+    migration must set atomic = False.
+    """
+    return PostgresOnlyRunSQL(
+        sql=f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} (UPPER({column}::text) text_pattern_ops);',
+        reverse_sql=f'DROP INDEX CONCURRENTLY IF EXISTS {name};',
+    )
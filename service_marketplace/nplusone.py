@@ -0,0 +1,190 @@
+# service_marketplace/nplusone.py
+
+import logging
+import weakref
+from collections import Counter
+
+from django.conf import settings
+from django.db import models
+from django.db.models import prefetch_related_objects
+from django.db.models.fields.related_descriptors import (
+    ForwardManyToOneDescriptor, ForwardOneToOneDescriptor, ReverseOneToOneDescriptor,
+)
+from django.db.models.query import ModelIterable
+
+logger = logging.getLogger(__name__)
+
+# NPLUSONE_DETECTION values
+OFF, LOG, RAISE = 'off', 'log', 'raise'
+
+
+class NPlusOneError(Exception):
+    """
+    A relation was loaded lazily, one query per object, for several objects
+    fetched by one queryset (NPLUSONE_DETECTION = 'raise').
+    """
+
+
+def _tracking():
+    return settings.AUTO_PREFETCH or settings.NPLUSONE_DETECTION != OFF
+
+
+# 1. Remembering which instances were loaded together
+
+class LoadedTogether:
+    """
+    The instances one queryset evaluation returned, kept on each of them
+    (weakly, so the group doesn't keep them alive), and the lazy loads
+    seen so far per relation. Pickled and copied instances start without
+    a group.
+    """
+    __slots__ = ('refs', 'lazy_loads', 'grouped', '__weakref__')
+
+    def __init__(self, instances=()):
+        self.refs = [weakref.ref(instance) for instance in instances]
+        self.lazy_loads = Counter()
+        # Relations whose related objects were grouped in turn
+        self.grouped = set()
+
+    def __reduce__(self):
+        return (LoadedTogether, ())
+
+    def instances(self):
+        return [instance for instance in (ref() for ref in self.refs) if instance is not None]
+
+
+def remember_together(instances):
+    instances = list(instances)
+    if len(instances) > 1:
+        group = LoadedTogether(instances)
+        for instance in instances:
+            instance._state.loaded_together = group
+
+
+def _group_of(instance):
+    return getattr(instance._state, 'loaded_together', None)
+
+
+class TrackedQuerySet(models.QuerySet):
+    """
+    Remembers which model instances were fetched together, so the related
+    object descriptors below can tell a loop over them from a single object.
+    Only lists of instances are tracked (not values() or iterator()), and
+    only while NPLUSONE_DETECTION or AUTO_PREFETCH is on.
+    """
+
+    def _fetch_all(self):
+        evaluating = self._result_cache is None
+        super()._fetch_all()
+        if evaluating and issubclass(self._iterable_class, ModelIterable) and _tracking():
+            remember_together(self._result_cache)
+
+
+TrackedManager = models.Manager.from_queryset(TrackedQuerySet)
+
+
+# 2. Related object descriptors
+
+class BatchedAccessMixin:
+    """
+    On the lazy load of a relation of an instance fetched together with
+    others: with AUTO_PREFETCH, loads the relation for all of them in one
+    query (prefetch_related_objects); otherwise reports the second such
+    load of the relation in the group as an N+1 query.
+
+    Related objects found in the cache of every instance of a group
+    (select_related, prefetched) are grouped in turn, which covers chains
+    like message.sender.profile.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None or not _tracking():
+            return super().__get__(instance, cls)
+        group = _group_of(instance)
+        if group is not None and not self.is_cached(instance) and self.would_query(instance):
+            self.load_for_group(instance, group)
+        value = super().__get__(instance, cls)
+        if group is not None and self.accessor_name not in group.grouped:
+            self.group_related(group)
+        return value
+
+    def load_for_group(self, instance, group):
+        name = self.accessor_name
+        if settings.AUTO_PREFETCH:
+            pending = [other for other in group.instances() if not self.is_cached(other)]
+            if len(pending) > 1:
+                prefetch_related_objects(pending, name)
+            return
+        group.lazy_loads[name] += 1
+        if group.lazy_loads[name] == 2:
+            report(type(instance), name)
+
+    def group_related(self, group):
+        group.grouped.add(self.accessor_name)
+        instances = group.instances()
+        if all(self.is_cached(instance) for instance in instances):
+            values = {id(value): value for value in map(self.cached_value, instances) if value is not None}
+            remember_together(value for value in values.values() if _group_of(value) is None)
+
+
+class BatchedForwardManyToOneDescriptor(BatchedAccessMixin, ForwardManyToOneDescriptor):
+
+    @property
+    def accessor_name(self):
+        return self.field.name
+
+    def would_query(self, instance):
+        return None not in self.field.get_local_related_value(instance)
+
+    def cached_value(self, instance):
+        return self.field.get_cached_value(instance, None)
+
+
+class BatchedForwardOneToOneDescriptor(BatchedForwardManyToOneDescriptor, ForwardOneToOneDescriptor):
+    pass
+
+
+class BatchedReverseOneToOneDescriptor(BatchedAccessMixin, ReverseOneToOneDescriptor):
+
+    @property
+    def accessor_name(self):
+        return self.related.get_accessor_name()
+
+    def would_query(self, instance):
+        return instance._is_pk_set()
+
+    def cached_value(self, instance):
+        return self.related.get_cached_value(instance, None)
+
+
+# 3. Fields
+# Stored and migrated exactly like Django's own (same deconstruct path).
+
+class ForeignKey(models.ForeignKey):
+    forward_related_accessor_class = BatchedForwardManyToOneDescriptor
+
+    def deconstruct(self):
+        name, _, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.ForeignKey', args, kwargs
+
+
+class OneToOneField(models.OneToOneField):
+    forward_related_accessor_class = BatchedForwardOneToOneDescriptor
+    related_accessor_class = BatchedReverseOneToOneDescriptor
+
+    def deconstruct(self):
+        name, _, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.OneToOneField', args, kwargs
+
+
+# 4. Reporting
+
+def report(model, name):
+    message = (
+        f"N+1 queries: {model.__name__}.{name} is loaded one object at a time for "
+        f"{model.__name__} objects fetched together. Load it with select_related() or "
+        f"prefetch_related() on the queryset that fetches them."
+    )
+    if settings.NPLUSONE_DETECTION == RAISE:
+        raise NPlusOneError(message)
+    logger.warning(message)
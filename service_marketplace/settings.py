@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -52,11 +53,23 @@ INSTALLED_APPS = [
     'orders.apps.OrdersConfig',
     'reviews.apps.ReviewsConfig',
     'chat.apps.ChatConfig',
+    'analytics.apps.AnalyticsConfig',
+    'jobs.apps.JobsConfig',
+    'notifications.apps.NotificationsConfig',
+    'recommendations.apps.RecommendationsConfig',
+    'invalidation.apps.InvalidationConfig',
+
+    # Project-wide management commands (warmup)
+    'service_marketplace',
 ]
 
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Serves the hashed, precompressed static files (see STORAGES below)
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Applies cache invalidations from other processes (see invalidation/)
+    'invalidation.middleware.invalidation_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,12 +92,26 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'accounts.context_processors.user_profile_context',
+                'notifications.context_processors.unread_notifications',
             ],
+            'libraries': {
+                'assets': 'service_marketplace.assets',
+            },
         },
     },
 ]
 
 WSGI_APPLICATION = 'service_marketplace.wsgi.application'
+ASGI_APPLICATION = 'service_marketplace.asgi.application'
+
+# Precompile templates and import views when a server process starts, so the
+# first request after a (rolling) restart is not the slow one. This never
+# touches the database; `python manage.py warmup` (a deploy step) also queues
+# the search prewarm. See service_marketplace/warmup.py.
+WARMUP_ON_STARTUP = os.getenv('WARMUP_ON_STARTUP', str(not DEBUG)).lower() in ('true', '1', 't')
+
+# Serve the catalog list/detail pages with async views (enable when running under ASGI)
+ASYNC_CATALOG_VIEWS = os.getenv('ASYNC_CATALOG_VIEWS', 'False').lower() in ('true', '1', 't')
 
 
 # Database
@@ -101,6 +128,140 @@ DATABASES = {
     }
 }
 
+# Cache
+# Use a shared backend (e.g. Redis or Memcached) in production so every worker
+# sees the same catalog version.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Seconds a browser/CDN may reuse an anonymous catalog page before revalidating
+CATALOG_CACHE_MAX_AGE = int(os.getenv('CATALOG_CACHE_MAX_AGE', '60'))
+
+# Server-side cache of rendered anonymous catalog pages
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', '300'))
+# Listing pages per category that a Service save evicts directly
+PAGE_CACHE_EVICT_PAGES = 3
+
+# Facet counts are also keyed on the catalog version; this only bounds memory
+FACET_CACHE_TIMEOUT = 600
+
+# Computed caches (see service_marketplace/cache_tools.py): expired or
+# invalidated values are recomputed by one process while the others serve
+# the old value for up to CACHE_STALE_TIMEOUT seconds; without one they
+# wait up to CACHE_LOCK_WAIT seconds. TTLs are cut by up to CACHE_TTL_JITTER
+# so entries written together don't expire together. Hit/miss counters are
+# shared every CACHE_METRICS_FLUSH_SECONDS (`python manage.py cache_stats`).
+CACHE_STALE_TIMEOUT = 300
+CACHE_LOCK_TIMEOUT = 30 # A recompute that takes longer is assumed lost
+CACHE_LOCK_WAIT = 5
+CACHE_TTL_JITTER = 0.1
+CACHE_METRICS_FLUSH_SECONDS = 30
+
+# First batch of reviews on the service page and public seller pages; saves
+# mark them stale right away, the timeouts only bound drift
+REVIEWS_CACHE_TIMEOUT = 600
+SELLER_PROFILE_CACHE_TIMEOUT = 300
+
+# Reviews shown per batch on the service page (first batch inline, the rest
+# through the cursor endpoint)
+REVIEWS_PAGE_SIZE = 10
+
+# Search result cache (see services/search_cache.py): ordered ids of a search,
+# keyed on the catalog version so changes retire them; the TTL only bounds
+# memory. Broader searches keep only their first SEARCH_CACHE_MAX_IDS ids.
+SEARCH_CACHE_TIMEOUT = 600
+SEARCH_CACHE_MAX_IDS = 1000
+# Searches are counted in memory and written to the query log this often
+SEARCH_LOG_FLUSH_SECONDS = 60
+# Most frequent searches of the last days recomputed after a catalog change
+# or deploy, once the changes have settled for SEARCH_PREWARM_DELAY seconds
+SEARCH_PREWARM_QUERIES = 100
+SEARCH_PREWARM_DAYS = 7
+SEARCH_PREWARM_DELAY = 30
+
+# Typo-tolerant search (see services/fuzzy.py): minimum word similarity (0-1)
+# between the query and a title or seller username, and on databases other
+# than PostgreSQL the most fuzzy matches the in-process trigram index returns
+FUZZY_SEARCH_THRESHOLD = 0.5
+FUZZY_SEARCH_MAX_MATCHES = 500
+
+# Search box typeahead (see services/typeahead.py): suggestions returned, how
+# long a process keeps its in-memory index before rebuilding it in the
+# background (refreshing the order-count weights), and the browser cache
+# lifetime of a response
+TYPEAHEAD_LIMIT = 8
+TYPEAHEAD_MAX_AGE = 15 * 60
+TYPEAHEAD_CACHE_SECONDS = 60
+
+# Invalidation bus (see invalidation/bus.py): keeps the in-process caches
+# (category registry, typeahead index, role group ids) of every process in
+# line with saves made by the others. The default transport polls a table at
+# most every INVALIDATION_POLL_INTERVAL seconds per process, the most a cache
+# lags behind; events are kept INVALIDATION_KEEP_SECONDS. With
+# 'invalidation.transports.RedisTransport' (needs the redis package) events
+# are pushed through INVALIDATION_REDIS_URL instead.
+INVALIDATION_TRANSPORT = os.getenv('INVALIDATION_TRANSPORT', 'invalidation.transports.DatabaseTransport')
+INVALIDATION_REDIS_URL = os.getenv('INVALIDATION_REDIS_URL', 'redis://localhost:6379/1')
+INVALIDATION_POLL_INTERVAL = 1.0
+INVALIDATION_KEEP_SECONDS = 60 * 60
+
+# Service rankings (see services/rankings.py)
+RANKING_BAYES_PRIOR = 10 # Weight (in reviews) of the catalog-wide mean rating
+RANKING_TRENDING_WINDOW_DAYS = 14
+RANKING_TRENDING_HALF_LIFE_DAYS = 3
+
+# Service page views (see analytics/pageviews.py): counted in memory and added
+# to the per-day counters by each process every VIEW_COUNTS_FLUSH_SECONDS;
+# a crashed process loses at most that window
+VIEW_COUNTS_FLUSH_SECONDS = 30
+
+# N+1 queries (see service_marketplace/nplusone.py) on Service, Order, Message,
+# Review and UserProfile relations: NPLUSONE_DETECTION is 'off', 'log' (a
+# warning per repeated lazy load) or 'raise' (NPlusOneError, the default
+# under `manage.py test`). AUTO_PREFETCH instead loads a relation for every
+# object fetched together on its first lazy access.
+NPLUSONE_DETECTION = os.getenv('NPLUSONE_DETECTION', 'log' if DEBUG else 'off')
+if sys.argv[1:2] == ['test']:
+    NPLUSONE_DETECTION = 'raise'
+AUTO_PREFETCH = os.getenv('AUTO_PREFETCH', 'False').lower() in ('true', '1', 't')
+
+# "Clients also ordered" recommendations (see recommendations/ and
+# `python manage.py build_recommendations`): neighbours kept per service and
+# clients two services must share before they are related
+RECOMMENDATIONS_TOP_K = 8
+RECOMMENDATIONS_MIN_COOCCURRENCE = 1
+
+# Background jobs (see jobs/ and `python manage.py runjobs`)
+# With JOBS_EAGER the tasks run in-process right after the commit instead,
+# for development without a worker.
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False').lower() in ('true', '1', 't')
+JOBS_WORKERS = int(os.getenv('JOBS_WORKERS', '4'))
+JOBS_POLL_INTERVAL = 1.0 # Seconds between polls when the queue is empty
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BACKOFF = 10 # Seconds before the first retry, doubled on each attempt
+JOBS_RETRY_BACKOFF_MAX = 3600
+JOBS_LOCK_TIMEOUT = 600 # Running jobs older than this are assumed lost and requeued
+JOBS_KEEP_DONE_DAYS = 7
+
+# Email (console backend by default; set EMAIL_BACKEND/EMAIL_HOST in production)
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False').lower() in ('true', '1', 't')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'ServiceMarket <no-reply@localhost>')
+# Absolute links in emails
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
+
+# Notifications (see notifications/delivery.py)
+NOTIFICATIONS_COALESCE_SECONDS = 60 # Repeated events within this window share one notification
+NOTIFICATIONS_DIGEST_DELAY = 900 # Seconds between the first unread notification and its email digest
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -131,6 +292,32 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles' # For deployment
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # Hashed names + gzip/brotli variants, built by collectstatic
+    'staticfiles': {
+        'BACKEND': 'service_marketplace.storage.BundledStaticFilesStorage',
+    },
+}
+
+# Per-page bundles, rendered with {% load assets %}{% bundle 'base.css' %}
+STATIC_BUNDLES = {
+    'base.css': ['vendor/bootstrap/css/bootstrap.min.css', 'css/global.css'],
+    'base.js': ['vendor/bootstrap/js/bootstrap.bundle.min.js', 'js/main.js'],
+    'dashboard.css': ['css/dashboard.css'],
+    'dashboard.js': ['vendor/chartjs/chart.umd.min.js', 'js/charts.js'],
+    'reviews.js': ['js/reviews.js'],
+    'typeahead.js': ['js/typeahead.js'],
+}
+# Bundles only exist after collectstatic; in development each file is linked
+STATIC_BUNDLES_ENABLED = os.getenv('STATIC_BUNDLES_ENABLED', str(not DEBUG)).lower() in ('true', '1', 't')
+if sys.argv[1:2] == ['test']:
+    # Tests render pages without running collectstatic first
+    STORAGES['staticfiles'] = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
+    STATIC_BUNDLES_ENABLED = False
+
 # Media files (User uploads)
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.models import User
+from services.models import Category, Service
+from .cache_tools import _store, aget_or_compute, get_or_compute, is_fresh, mark_stale
+from .nplusone import NPlusOneError
+
+
+class Computations:
+    """
+    A compute function counting its calls, optionally slow.
+    """
+
+    def __init__(self, value='value', delay=0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.value
+
+
+def hold_lock(key):
+    # What another process computing `key` leaves in the cache
+    cache.add(f'{key}:lock', 1)
+
+
+class GetOrComputeTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_computes_once(self):
+        compute = Computations()
+        self.assertEqual(get_or_compute('test', 'key', compute, 60), 'value')
+        self.assertEqual(get_or_compute('test', 'key', compute, 60), 'value')
+        self.assertEqual(compute.calls, 1)
+
+    def test_version_change_recomputes(self):
+        get_or_compute('test', 'key', Computations('old'), 60, version=1)
+        self.assertEqual(get_or_compute('test', 'key', Computations('new'), 60, version=2), 'new')
+
+    def test_single_flight(self):
+        compute = Computations(delay=0.2)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_compute('test', 'key', compute, 60)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 5)
+        self.assertEqual(compute.calls, 1)
+
+    def test_stale_value_served_while_another_process_recomputes(self):
+        get_or_compute('test', 'key', Computations('old'), 60)
+        mark_stale('key')
+        self.assertFalse(is_fresh('key'))
+        hold_lock('key')
+        compute = Computations('new')
+        self.assertEqual(get_or_compute('test', 'key', compute, 60), 'old')
+        self.assertEqual(compute.calls, 0)
+
+    def test_stale_value_recomputed_by_first_reader(self):
+        get_or_compute('test', 'key', Computations('old'), 60)
+        mark_stale('key')
+        self.assertEqual(get_or_compute('test', 'key', Computations('new'), 60), 'new')
+        self.assertTrue(is_fresh('key'))
+
+    @override_settings(CACHE_LOCK_WAIT=0.2)
+    def test_waits_for_another_process(self):
+        hold_lock('key')
+        threading.Timer(0.05, lambda: _store('key', 'theirs', 60, None)).start()
+        compute = Computations('mine')
+        self.assertEqual(get_or_compute('test', 'key', compute, 60), 'theirs')
+        self.assertEqual(compute.calls, 0)
+
+    @override_settings(CACHE_LOCK_WAIT=0)
+    def test_computes_when_the_other_process_takes_too_long(self):
+        hold_lock('key')
+        compute = Computations()
+        self.assertEqual(get_or_compute('test', 'key', compute, 60), 'value')
+        self.assertEqual(compute.calls, 1)
+
+    def test_failed_compute_releases_the_lock(self):
+        def broken():
+            raise RuntimeError
+        with self.assertRaises(RuntimeError):
+            get_or_compute('test', 'key', broken, 60)
+        self.assertEqual(get_or_compute('test', 'key', Computations(), 60), 'value')
+
+    async def test_async_single_flight(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return 'value'
+
+        results = await asyncio.gather(*[aget_or_compute('test', 'key', compute, 60) for _ in range(5)])
+        self.assertEqual(results, ['value'] * 5)
+        self.assertEqual(len(calls), 1)
+
+    async def test_async_stale_value(self):
+        async def compute():
+            return 'new'
+
+        get_or_compute('test', 'key', Computations('old'), 60)
+        mark_stale('key')
+        hold_lock('key')
+        self.assertEqual(await aget_or_compute('test', 'key', compute, 60), 'old')
+
+
+@override_settings(NPLUSONE_DETECTION='raise', AUTO_PREFETCH=False)
+class NPlusOneTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Web', slug='web')
+        for i in range(3):
+            seller = User.objects.create_user(f'seller{i}', f'seller{i}@example.com', 'pw', is_seller=True)
+            Service.objects.create(
+                seller=seller, category=category, title=f'Service {i}', slug=f'service-{i}',
+                description='Description', price=10,
+            )
+
+    def test_lazy_loads_in_a_loop_raise(self):
+        with self.assertRaisesMessage(NPlusOneError, 'Service.seller'):
+            [service.seller.username for service in Service.objects.all()]
+
+    def test_select_related(self):
+        with self.assertNumQueries(1):
+            [service.seller.username for service in Service.objects.select_related('seller')]
+
+    def test_chain_through_select_related(self):
+        # The sellers loaded together are grouped in turn
+        with self.assertRaisesMessage(NPlusOneError, 'User.profile'):
+            [service.seller.profile for service in Service.objects.select_related('seller')]
+
+    def test_single_object(self):
+        service = Service.objects.get(slug='service-0')
+        self.assertEqual(service.seller.username, 'seller0')
+
+    def test_one_object_of_a_list(self):
+        services = list(Service.objects.all())
+        self.assertTrue(services[0].seller.username)
+
+    @override_settings(AUTO_PREFETCH=True)
+    def test_auto_prefetch_loads_the_relation_for_the_whole_list(self):
+        with self.assertNumQueries(2):
+            usernames = [service.seller.username for service in Service.objects.order_by('pk')]
+        self.assertEqual(usernames, ['seller0', 'seller1', 'seller2'])
+
+    @override_settings(NPLUSONE_DETECTION='off')
+    def test_off(self):
+        with self.assertNumQueries(4):
+            [service.seller.username for service in Service.objects.all()]
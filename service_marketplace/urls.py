@@ -12,6 +12,8 @@ urlpatterns = [
     path('orders/', include('orders.urls')),
     path('reviews/', include('reviews.urls')),
     path('chat/', include('chat.urls')),
+    path('analytics/', include('analytics.urls')), # Seller dashboard time series
+    path('notifications/', include('notifications.urls')),
 ]
 
 # Serve media files in development
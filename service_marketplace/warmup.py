@@ -0,0 +1,98 @@
+# service_marketplace/warmup.py
+
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+
+def project_template_names():
+    """
+    Names of every template shipped with the project (the global templates
+    directory and the apps' templates directories). Templates of Django and
+    third-party packages are left alone.
+    """
+    base_dir = Path(settings.BASE_DIR).resolve()
+    dirs = [Path(path) for engine in settings.TEMPLATES for path in engine.get('DIRS', [])]
+    dirs += [Path(path) for path in get_app_template_dirs('templates')]
+
+    names = set()
+    for directory in dirs:
+        directory = directory.resolve()
+        if base_dir not in directory.parents:
+            continue
+        for path in directory.rglob('*'):
+            if path.suffix in TEMPLATE_EXTENSIONS and path.is_file():
+                names.add(path.relative_to(directory).as_posix())
+    return sorted(names)
+
+
+def warm_templates():
+    """
+    Loads every project template once, which compiles it into the cached
+    loader (includes such as navbar.html or chat/message_thread.html too).
+    Returns the number of templates compiled.
+    """
+    engine = engines['django']
+    compiled = 0
+    for name in project_template_names():
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError:
+            logger.exception("Template %s failed to compile during warmup", name)
+            continue
+        compiled += 1
+    return compiled
+
+
+def warm_urls():
+    """
+    Builds the URL resolver's reverse lookup tables, importing every urls
+    and views module on the way. Returns the number of named URL patterns.
+    """
+    resolver = get_resolver()
+    return len([key for key in resolver.reverse_dict if isinstance(key, str)])
+
+
+def queue_search_prewarm():
+    """
+    Queues the prewarm of the popular searches (from the warmup command,
+    once per deploy).
+    """
+    from services.search_cache import queue_search_prewarm
+
+    queue_search_prewarm()
+
+
+def warmup():
+    """
+    Compiles the templates and imports the views. Nothing here touches the
+    database, so it is safe to run while the application module is imported.
+    """
+    start = time.monotonic()
+    urls = warm_urls()
+    templates = warm_templates()
+    elapsed = time.monotonic() - start
+    logger.info("Warmup: %s URL names, %s templates in %.2fs", urls, templates, elapsed)
+    return {'urls': urls, 'templates': templates, 'seconds': elapsed}
+
+
+def warmup_on_startup():
+    """
+    Called by wsgi.py/asgi.py once the application is loaded. A warmup
+    failure is logged and never prevents the server from starting.
+    """
+    if not settings.WARMUP_ON_STARTUP:
+        return
+    try:
+        warmup()
+    except Exception:
+        logger.exception("Startup warmup failed")
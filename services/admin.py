@@ -1,18 +1,25 @@
 # services/admin.py
 
 from django.contrib import admin
-from .models import Category, Service
+from service_marketplace.admin_tools import FastChangeListMixin, username_filter
+from .models import Category, SearchQuery, Service
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
+    search_fields = ('^name',)
 
 @admin.register(Service)
-class ServiceAdmin(admin.ModelAdmin):
+class ServiceAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('title', 'seller', 'category', 'price', 'is_active', 'created_at')
-    list_filter = ('is_active', 'category', 'seller')
-    search_fields = ('title', 'description', 'seller__username')
+    list_select_related = ('seller', 'category')
+    # Sellers are filtered by username instead of listing every user
+    list_filter = ('is_active', 'category', username_filter('seller'))
+    # Title prefix (indexed on PostgreSQL, see migration 0004) and seller username;
+    # description is no longer searched, icontains on it scans the whole table
+    search_fields = ('^title', '^seller__username')
+    autocomplete_fields = ('seller', 'category')
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'created_at'
     # Fieldsets to organize the admin form
@@ -32,4 +39,12 @@ class ServiceAdmin(admin.ModelAdmin):
         # Automatically set the seller to the logged-in user if not already set
         if not obj.seller_id:
             obj.seller = request.user
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+
+@admin.register(SearchQuery)
+class SearchQueryAdmin(admin.ModelAdmin):
+    # Written by the search query log (services/search_cache.py)
+    list_display = ('params', 'count', 'last_searched_at')
+    ordering = ('-count',)
+    search_fields = ('params',)
+    readonly_fields = ('params', 'count', 'last_searched_at')
@@ -0,0 +1,391 @@
+# services/caching.py
+
+import hashlib
+from decimal import Decimal
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import urlencode
+from django.views.decorators.http import condition
+
+from service_marketplace.cache_tools import aget_or_compute, get_or_compute, mark_stale
+
+# Cache key holding the datetime of the last catalog change
+CATALOG_VERSION_KEY = 'catalog:version'
+# The version derived from the database on a cold cache, computed by one
+# process at a time. Short lived, and dropped by every bump.
+CATALOG_VERSION_SEED_KEY = 'catalog:version:seed'
+CATALOG_VERSION_SEED_TIMEOUT = 10
+# Generation counter bumped when categories change (they appear on every page)
+CATEGORY_GENERATION_KEY = 'catalog:categories'
+# Datetime of the last change to what searches and facet counts are computed
+# from: bumped with the catalog version, except for reviews that leave every
+# service in its rating band (see reviews/distribution.py)
+LISTING_VERSION_KEY = 'catalog:listings'
+
+PAGE_CACHE_PREFIX = 'pages'
+# Query params that change what the catalog renders. Requests carrying any
+# other param are not cached, since links on the page echo the query string.
+PAGE_CACHE_PARAMS = (
+    'q', 'category', 'price', 'min_price', 'max_price', 'min_rating', 'seller', 'sort', 'page',
+)
+# Params of the listing pages a Service save evicts explicitly
+EVICTABLE_PARAMS = {'category', 'page'}
+
+
+# 1. Catalog Version
+
+def _latest_catalog_change():
+    Service = apps.get_model('services', 'Service')
+    Review = apps.get_model('reviews', 'Review')
+    candidates = [
+        Service.objects.aggregate(latest=Max('updated_at'))['latest'],
+        Review.objects.aggregate(latest=Max('updated_at'))['latest'],
+    ]
+    candidates = [value for value in candidates if value is not None]
+    version = max(candidates) if candidates else timezone.now()
+    # A bump that came first wins
+    cache.add(CATALOG_VERSION_KEY, version, None)
+    return version
+
+
+def get_catalog_version():
+    """
+    Returns the datetime of the latest change to the public catalog
+    (services, categories and reviews).
+
+    The value lives in the shared cache and is bumped by model signals.
+    On a cold cache it is derived from the newest `updated_at` so every
+    process agrees on the same version; one process runs the aggregates
+    while the others wait for its result, since every catalog request
+    needs the version at once.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        seed = get_or_compute(
+            'catalog_version', CATALOG_VERSION_SEED_KEY, _latest_catalog_change, CATALOG_VERSION_SEED_TIMEOUT
+        )
+        version = cache.get(CATALOG_VERSION_KEY) or seed
+    return version
+
+
+def bump_catalog_version(listings=True):
+    """
+    Marks the catalog as changed, which retires the cached catalog pages.
+    With `listings` it also retires every cached search result and facet
+    count and queues the prewarm of the popular searches. Call after the
+    write has committed.
+    """
+    from .search_cache import queue_search_prewarm
+
+    cache.set(CATALOG_VERSION_KEY, timezone.now(), None)
+    # A later cold start must not restore the version from before this bump
+    cache.delete(CATALOG_VERSION_SEED_KEY)
+    if listings:
+        cache.set(LISTING_VERSION_KEY, timezone.now(), None)
+        queue_search_prewarm()
+
+
+def get_listing_version():
+    """
+    The version searches, facet counts and the trigram index are cached
+    under (see LISTING_VERSION_KEY). A cold cache starts a new one, which
+    never matches an index a process built before.
+    """
+    return cache.get_or_set(LISTING_VERSION_KEY, timezone.now, None)
+
+
+# 2. Conditional GET for anonymous catalog pages
+
+def is_anonymous_cacheable(request):
+    """
+    True when the response only depends on the URL, i.e. an anonymous
+    GET/HEAD request with no pending flash messages.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # len() loads the messages without marking them as used
+    return not len(get_messages(request))
+
+
+def catalog_etag(request, *args, **kwargs):
+    version = getattr(request, 'catalog_version', None)
+    if version is None:
+        return None
+    return '"catalog-%d"' % int(version.timestamp() * 1000000)
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return getattr(request, 'catalog_version', None)
+
+
+def _prepare_catalog_request(request):
+    """
+    Flags the request as cacheable and resolves the catalog version once,
+    so the ETag/Last-Modified callables never hit the database themselves.
+    """
+    request.catalog_cacheable = is_anonymous_cacheable(request)
+    request.catalog_version = get_catalog_version() if request.catalog_cacheable else None
+
+
+def _patch_catalog_headers(request, response):
+    if request.catalog_cacheable:
+        patch_cache_control(response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True)
+    # Anonymous and logged-in users share the same URLs
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def catalog_http_cache(view_func):
+    """
+    View decorator adding ETag/Last-Modified validation (304 responses)
+    and shared-cache headers to anonymous catalog pages. Authenticated
+    responses are marked private so a proxy never stores them.
+    Works with both sync and async views.
+    """
+    conditional_view = condition(
+        etag_func=catalog_etag,
+        last_modified_func=catalog_last_modified,
+    )(view_func)
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapper(request, *args, **kwargs):
+            await sync_to_async(_prepare_catalog_request)(request)
+            response = await conditional_view(request, *args, **kwargs)
+            return _patch_catalog_headers(request, response)
+
+        return _async_wrapper
+
+    @wraps(view_func)
+    def _wrapper(request, *args, **kwargs):
+        _prepare_catalog_request(request)
+        response = conditional_view(request, *args, **kwargs)
+        return _patch_catalog_headers(request, response)
+
+    return _wrapper
+
+
+# 3. Server-side page cache for anonymous catalog pages
+
+def normalize_page_params(query_dict):
+    """
+    Returns the cache-relevant query params as an ordered list of pairs, or
+    None when one of them holds a value the view ignores or rejects (unknown
+    category, sort or price bucket, malformed number or page): such pages
+    are not cached, so made-up values can't fill the cache or store one
+    page under another's key.
+
+    Values are read the way the view reads them (the category slug as is,
+    filters through parse_filters) and written in one form; whitespace in
+    the search is collapsed and defaults (first page, newest sort outside
+    searches, best match within them) are dropped, so equivalent URLs share
+    one cache entry.
+    """
+    from .categories import category_by_slug
+    from .facets import FILTER_PARAMS, parse_filters
+    from .fuzzy import RELEVANCE
+    from .rankings import SORT_ORDERINGS
+
+    query = ' '.join(str(query_dict.get('q') or '').split())
+    values = {'q': query}
+
+    category = str(query_dict.get('category') or '')
+    if category and category_by_slug(category) is None:
+        return None
+    values['category'] = category
+
+    filters = parse_filters(query_dict)
+    for name in FILTER_PARAMS:
+        if name in filters:
+            value = filters[name]
+            values[name] = format(value.normalize(), 'f') if isinstance(value, Decimal) else str(value)
+        elif str(query_dict.get(name) or '').strip():
+            return None
+
+    sort = str(query_dict.get('sort') or '')
+    searched = bool(query)
+    if sort and sort not in SORT_ORDERINGS and not (searched and sort == RELEVANCE):
+        return None
+    values['sort'] = '' if sort == (RELEVANCE if searched else 'newest') else sort
+
+    page = str(query_dict.get('page') or '1')
+    if page != 'last':
+        if not page.isdigit() or int(page) < 1:
+            return None
+        page = str(int(page))
+    values['page'] = '' if page == '1' else page
+
+    return [(name, values[name]) for name in PAGE_CACHE_PARAMS if values.get(name)]
+
+
+def _is_evictable(params):
+    """
+    Pages a Service/Review save evicts explicitly: plain category listings
+    within the first PAGE_CACHE_EVICT_PAGES pages. Everything else (search,
+    facet filters, ranking sorts) is keyed on the catalog version and
+    expires wholesale when it changes.
+    """
+    values = dict(params)
+    if set(values) - EVICTABLE_PARAMS:
+        return False
+    page = values.get('page', '1')
+    return page.isdigit() and int(page) <= settings.PAGE_CACHE_EVICT_PAGES
+
+
+def _category_generation():
+    return cache.get_or_set(CATEGORY_GENERATION_KEY, 0, None)
+
+
+def page_cache_key(path, params, generation=None, version=None):
+    if generation is None:
+        generation = _category_generation()
+    raw = '%s?%s|%s' % (path, urlencode(params), generation)
+    if not _is_evictable(params):
+        version = version or get_catalog_version()
+        raw = '%s|%s' % (raw, version.timestamp())
+    return '%s:%s' % (PAGE_CACHE_PREFIX, hashlib.md5(raw.encode()).hexdigest())
+
+
+def _has_uncached_params(request):
+    return bool(set(request.GET) - set(PAGE_CACHE_PARAMS))
+
+
+def _request_page_cache_key(request):
+    """
+    The page cache key of a cacheable request, or None when its query
+    string can't be cached (see normalize_page_params).
+    """
+    if _has_uncached_params(request):
+        return None
+    params = normalize_page_params(request.GET)
+    if params is None:
+        return None
+    return page_cache_key(request.path, params, version=request.catalog_version)
+
+
+def _page_content(response):
+    """
+    (content, content type) of a rendered response worth caching, or None
+    (errors, redirects, streaming responses).
+    """
+    if response.status_code != 200 or response.streaming:
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    return response.content, response['Content-Type']
+
+
+def _cached_response(page, rendered):
+    # The response rendered by this request, the cached copy, or None: not cacheable
+    if rendered is not None:
+        return rendered
+    if page is not None:
+        content, content_type = page
+        return HttpResponse(content, content_type=content_type)
+    return None
+
+
+def anonymous_page_cache(view_func):
+    """
+    Serves anonymous catalog pages from the cache without running the view.
+    Must be applied inside `catalog_http_cache`, which decides whether the
+    request is cacheable. Works with both sync and async views.
+
+    Pages go through cache_tools: one request renders a missing or stale
+    page while the others wait for it or get the stale copy, so evicting a
+    hot page doesn't send all its traffic to the database at once.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapper(request, *args, **kwargs):
+            if not getattr(request, 'catalog_cacheable', False):
+                return await view_func(request, *args, **kwargs)
+            key = await sync_to_async(_request_page_cache_key)(request)
+            if key is None:
+                return await view_func(request, *args, **kwargs)
+
+            rendered = None
+
+            async def render():
+                nonlocal rendered
+                rendered = await view_func(request, *args, **kwargs)
+                return await sync_to_async(_page_content)(rendered)
+
+            page = await aget_or_compute('pages', key, render, settings.PAGE_CACHE_TIMEOUT)
+            response = _cached_response(page, rendered)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            return response
+
+        return _async_wrapper
+
+    @wraps(view_func)
+    def _wrapper(request, *args, **kwargs):
+        if not getattr(request, 'catalog_cacheable', False):
+            return view_func(request, *args, **kwargs)
+        key = _request_page_cache_key(request)
+        if key is None:
+            return view_func(request, *args, **kwargs)
+
+        rendered = None
+
+        def render():
+            nonlocal rendered
+            rendered = view_func(request, *args, **kwargs)
+            return _page_content(rendered)
+
+        page = get_or_compute('pages', key, render, settings.PAGE_CACHE_TIMEOUT)
+        response = _cached_response(page, rendered)
+        if response is None:
+            response = view_func(request, *args, **kwargs)
+        return response
+
+    return _wrapper
+
+
+def evict_service_pages(slugs=(), category_slugs=()):
+    """
+    Marks stale the cached detail pages for `slugs` and the first listing
+    pages of the unfiltered catalog and of each category in
+    `category_slugs`: the next request renders them again while the others
+    keep getting the old copy.
+    """
+    generation = _category_generation()
+    keys = [
+        page_cache_key(reverse('service_detail', kwargs={'slug': slug}), [], generation)
+        for slug in set(slugs) if slug
+    ]
+
+    listing_path = reverse('home')
+    for category_slug in {''} | {slug for slug in category_slugs if slug}:
+        for page in range(1, settings.PAGE_CACHE_EVICT_PAGES + 1):
+            params = normalize_page_params({'category': category_slug, 'page': page})
+            if params is not None:
+                keys.append(page_cache_key(listing_path, params, generation))
+    mark_stale(*keys)
+
+
+def bump_category_generation():
+    """
+    Invalidates every cached page; used when the category sidebar changes.
+    """
+    if cache.add(CATEGORY_GENERATION_KEY, 1, None):
+        return
+    try:
+        cache.incr(CATEGORY_GENERATION_KEY)
+    except ValueError:
+        cache.set(CATEGORY_GENERATION_KEY, 1, None)
@@ -0,0 +1,58 @@
+# services/categories.py
+
+import threading
+
+from invalidation.bus import poll, subscribe
+
+_categories = None
+# Bumped by every change, so a load racing with one isn't kept
+_generation = 0
+_lock = threading.Lock()
+
+
+def all_categories():
+    """
+    Every category, loaded once per process and dropped when any process
+    changes one (published on the invalidation bus by services/models.py).
+    Categories are on every catalog page and rarely change.
+    """
+    global _categories
+    categories = _categories
+    if categories is None:
+        from .models import Category
+
+        with _lock:
+            if _categories is None:
+                poll()
+                generation = _generation
+                categories = list(Category.objects.all())
+                if generation == _generation:
+                    _categories = categories
+            else:
+                categories = _categories
+    return categories
+
+
+def category_by_slug(slug, categories=None):
+    """
+    The category with `slug` among `categories` (by default all of them), or
+    None.
+    """
+    return next((category for category in categories or all_categories() if category.slug == slug), None)
+
+
+def category_slugs(ids):
+    """
+    Slugs of the categories with the given ids; unknown ids and None are
+    skipped.
+    """
+    return [category.slug for category in all_categories() if category.pk in ids]
+
+
+def _drop(keys):
+    global _categories, _generation
+    _generation += 1
+    _categories = None
+
+
+subscribe('services.Category', _drop)
@@ -0,0 +1,188 @@
+# services/facets.py
+
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Value
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
+
+from service_marketplace.cache_tools import get_or_compute
+
+from .caching import get_listing_version
+from .search_cache import normalize_query
+
+# (key, label, min inclusive, max exclusive)
+PRICE_BUCKETS = [
+    ('under-50', 'Under $50', None, 50),
+    ('50-100', '$50 - $100', 50, 100),
+    ('100-250', '$100 - $250', 100, 250),
+    ('250-500', '$250 - $500', 250, 500),
+    ('500-plus', '$500 & above', 500, None),
+]
+PRICE_BUCKET_RANGES = {key: (low, high) for key, _, low, high in PRICE_BUCKETS}
+
+# Minimum average rating bands ("4 stars & up", ...)
+RATING_BANDS = [4, 3, 2, 1]
+
+# Query params consumed by the facet filters
+FILTER_PARAMS = ('price', 'min_price', 'max_price', 'min_rating', 'seller')
+
+
+# 1. Parsing
+
+def _decimal_or_none(value):
+    try:
+        value = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return value if value >= 0 else None
+
+
+def parse_filters(params):
+    """
+    Returns the valid facet filters found in a QueryDict/dict.
+    Invalid values are ignored rather than raising.
+    """
+    filters = {}
+
+    price = params.get('price')
+    if price in PRICE_BUCKET_RANGES:
+        filters['price'] = price
+
+    for name in ('min_price', 'max_price'):
+        value = _decimal_or_none(params.get(name))
+        if value is not None:
+            filters[name] = value
+
+    min_rating = params.get('min_rating')
+    if min_rating and min_rating.isdigit() and int(min_rating) in RATING_BANDS:
+        filters['min_rating'] = int(min_rating)
+
+    seller = (params.get('seller') or '').strip()
+    if seller:
+        filters['seller'] = seller
+
+    return filters
+
+
+# 2. Filtering
+
+def _price_q(filters):
+    q = Q()
+    if 'price' in filters:
+        low, high = PRICE_BUCKET_RANGES[filters['price']]
+        q &= _range_q(low, high)
+    if 'min_price' in filters:
+        q &= Q(price__gte=filters['min_price'])
+    if 'max_price' in filters:
+        q &= Q(price__lte=filters['max_price'])
+    return q
+
+
+def _range_q(low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lt=high)
+    return q
+
+
+def _min_rating_q(stars):
+    """
+    Services whose average rating as shown on the cards (RatingDistribution
+    .average, rounded to one decimal) is at least `stars`, computed from
+    the same per-star counters: round(sum / total, 1) >= stars is
+    20 * sum >= (20 * stars - 1) * total, in integers.
+    """
+    counts = {rating: F(f'rating_distribution__stars_{rating}') for rating in range(1, 6)}
+    total = sum(counts.values(), Value(0))
+    rating_sum = sum((rating * count for rating, count in counts.items()), Value(0))
+    return Q(GreaterThan(total, 0)) & Q(GreaterThanOrEqual(20 * rating_sum, (20 * stars - 1) * total))
+
+
+def rating_band(counts):
+    """
+    The highest RATING_BANDS value a service with these {stars: count}
+    counts under (0 without reviews); `_min_rating_q` in Python.
+    """
+    total = sum(counts.values())
+    rating_sum = sum(stars * count for stars, count in counts.items())
+    return max((band for band in RATING_BANDS if total and 20 * rating_sum >= (20 * band - 1) * total), default=0)
+
+
+def _rating_q(filters):
+    if 'min_rating' in filters:
+        return _min_rating_q(filters['min_rating'])
+    return Q()
+
+
+def _category_q(category):
+    return Q(category=category) if category is not None else Q()
+
+
+def apply_filters(queryset, filters):
+    """
+    Applies the price and rating filters to a Service queryset. The seller
+    filter narrows the base queryset the facets are counted over, so it is
+    applied together with the search instead.
+    """
+    return queryset.filter(_price_q(filters) & _rating_q(filters))
+
+
+# 3. Facet Counts
+
+def facet_counts(queryset, filters, categories, category=None):
+    """
+    Counts results per category, price bucket and rating band in a single
+    aggregate query (one filtered COUNT per facet value).
+
+    `queryset` must already carry the search and seller filters but not the
+    category, price or rating ones (see services.views.search_services).
+    Each facet is counted with every other active facet applied, so a count
+    is what the user gets by clicking it.
+    """
+    price_q, rating_q, category_q = _price_q(filters), _rating_q(filters), _category_q(category)
+
+    aggregates = {}
+    for cat in categories:
+        aggregates[f'category_{cat.pk}'] = Count('pk', filter=price_q & rating_q & Q(category=cat))
+    aggregates['category_all'] = Count('pk', filter=price_q & rating_q)
+    for key, _, low, high in PRICE_BUCKETS:
+        aggregates[f'price_{key}'] = Count('pk', filter=category_q & rating_q & _range_q(low, high))
+    for band in RATING_BANDS:
+        aggregates[f'rating_{band}'] = Count('pk', filter=category_q & price_q & _min_rating_q(band))
+
+    counts = queryset.order_by().aggregate(**aggregates)
+    return {
+        'categories': {cat.pk: counts[f'category_{cat.pk}'] for cat in categories},
+        'all': counts['category_all'],
+        'price': [
+            {'key': key, 'label': label, 'count': counts[f'price_{key}']}
+            for key, label, _, _ in PRICE_BUCKETS
+        ],
+        'rating': [
+            {'stars': band, 'count': counts[f'rating_{band}']}
+            for band in RATING_BANDS
+        ],
+    }
+
+
+def cached_facet_counts(queryset, filters, categories, category=None, query=''):
+    """
+    `facet_counts` cached per listing version, so the counts are
+    recomputed only after a Service or Category change, or a review that
+    moves a service into another rating band (by one process, the others
+    serve the previous counts meanwhile).
+    """
+    raw = '|'.join([
+        normalize_query(query),
+        str(category.pk if category is not None else ''),
+        repr(sorted(filters.items())),
+    ])
+    key = 'facets:%s' % hashlib.md5(raw.encode()).hexdigest()
+    return get_or_compute(
+        'facets', key, lambda: facet_counts(queryset, filters, categories, category),
+        settings.FACET_CACHE_TIMEOUT, version=get_listing_version(),
+    )
@@ -0,0 +1,226 @@
+# services/fuzzy.py
+
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import (
+    BooleanField, Case, CharField, ExpressionWrapper, F, FloatField, Func, Lookup, Q, TextField, Value, When,
+)
+from django.db.models.functions import Greatest
+from django.db.models.lookups import IContains
+
+from .caching import get_listing_version
+from .search_cache import normalize_query
+
+# Ordering of searches without an explicit sort
+RELEVANCE = 'relevance'
+
+
+# 1. Trigrams (same rules as PostgreSQL's pg_trgm)
+
+def trigrams(text):
+    """
+    The trigram set of `text` (normalized words), each word padded with two
+    spaces in front and one behind, as pg_trgm does.
+    """
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[start:start + 3] for start in range(len(padded) - 2))
+    return grams
+
+
+# 2. PostgreSQL: pg_trgm operators backed by GIN indexes (migration 0006)
+
+class WordSimilarity(Func):
+    function = 'word_similarity'
+    output_field = FloatField()
+
+
+class WordSimilar(Lookup):
+    """
+    `query <% column`: true when the query's word similarity to the column
+    reaches pg_trgm.word_similarity_threshold (set per connection to
+    FUZZY_SEARCH_THRESHOLD). Unlike comparing word_similarity() with a
+    constant, the operator can use the trigram index.
+    """
+    lookup_name = 'word_similar_to'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{rhs} <%% {lhs}', rhs_params + lhs_params
+
+
+class TrigramContains(IContains):
+    """
+    icontains that PostgreSQL runs as `column ILIKE '%word%'` on the bare
+    column, which the GIN trigram indexes serve. Django's own icontains
+    compares UPPER(column::text), an expression those indexes don't cover.
+    Other databases run plain icontains.
+    """
+    lookup_name = 'trigram_contains'
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = Lookup.process_lhs(self, compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} ILIKE {rhs}', (*lhs_params, *rhs_params)
+
+
+for field_class in (CharField, TextField):
+    field_class.register_lookup(WordSimilar)
+    field_class.register_lookup(TrigramContains)
+
+
+def _matching_sellers(queryset, query):
+    """
+    (pk, lowercased username, similar to the whole query) of the users whose
+    username contains a query word or is similar to the query.
+    """
+    similar = Q(username__word_similar_to=query)
+    match = similar
+    for word in query.split():
+        match |= Q(username__trigram_contains=word)
+    users = get_user_model().objects.using(queryset.db).filter(match).annotate(
+        similar=ExpressionWrapper(similar, output_field=BooleanField())
+    )
+    return [(pk, username.lower(), similar) for pk, username, similar in users.values_list('pk', 'username', 'similar')]
+
+
+def _postgres_search(queryset, query):
+    """
+    Sellers are matched first and services filtered by seller id, so every
+    branch of the OR is a condition on the service table that an index
+    serves (trigram indexes, the seller foreign key) and PostgreSQL can
+    combine them in one bitmap scan. A condition on the joined user table
+    inside the OR would force a scan of every service.
+    """
+    sellers = _matching_sellers(queryset, query)
+    exact = Q()
+    for word in query.split():
+        exact &= (
+            Q(title__trigram_contains=word) |
+            Q(description__trigram_contains=word) |
+            Q(seller_id__in=[pk for pk, username, _ in sellers if word in username])
+        )
+    fuzzy = Q(title__word_similar_to=query) | Q(seller_id__in=[pk for pk, _, similar in sellers if similar])
+    rank = Greatest(
+        WordSimilarity(Value(query), F('title')),
+        WordSimilarity(Value(query), F('seller__username')),
+    )
+    return exact | fuzzy, rank
+
+
+def configure_connection(connection):
+    """
+    Sets the similarity threshold the `<%` operator uses on a new
+    PostgreSQL connection.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+                [str(settings.FUZZY_SEARCH_THRESHOLD)],
+            )
+
+
+# 3. Other databases (SQLite in development and tests): in-process trigram index
+
+class TrigramIndex:
+    """
+    Inverted trigram index over the titles of the active services and the
+    usernames of their sellers. A query's score against a label is the
+    share of the query's trigrams found in it, an approximation of
+    pg_trgm's word_similarity.
+    """
+
+    def __init__(self, rows):
+        self.postings = defaultdict(set)
+        self.services_of_seller = defaultdict(set)
+        for service_id, title, seller_id, username in rows:
+            self.services_of_seller[seller_id].add(service_id)
+            for gram in trigrams(normalize_query(title)):
+                self.postings[gram].add(('service', service_id))
+            for gram in trigrams(normalize_query(username)):
+                self.postings[gram].add(('seller', seller_id))
+
+    def scores(self, query):
+        """
+        {service_id: score} of the services whose title or seller scores at
+        least FUZZY_SEARCH_THRESHOLD, at most FUZZY_SEARCH_MAX_MATCHES.
+        """
+        grams = trigrams(query)
+        if not grams:
+            return {}
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+
+        scores = {}
+        for (kind, pk), count in shared.items():
+            score = count / len(grams)
+            if score < settings.FUZZY_SEARCH_THRESHOLD:
+                continue
+            for service_id in (self.services_of_seller[pk] if kind == 'seller' else (pk,)):
+                scores[service_id] = max(score, scores.get(service_id, 0))
+        best = sorted(scores.items(), key=lambda item: -item[1])[:settings.FUZZY_SEARCH_MAX_MATCHES]
+        return dict(best)
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def trigram_index():
+    """
+    This process's TrigramIndex, rebuilt after every catalog change.
+    """
+    global _index, _index_version
+    version = get_listing_version()
+    with _index_lock:
+        if _index is None or _index_version != version:
+            from .models import Service
+
+            rows = Service.objects.filter(is_active=True).values_list('pk', 'title', 'seller_id', 'seller__username')
+            _index, _index_version = TrigramIndex(rows.iterator(chunk_size=2000)), version
+        return _index
+
+
+def _fallback_search(queryset, query):
+    exact = Q()
+    for word in query.split():
+        # Every join here is a forward FK, so no DISTINCT is needed
+        exact &= (
+            Q(title__icontains=word) |
+            Q(description__icontains=word) |
+            Q(seller__username__icontains=word)
+        )
+    scores = trigram_index().scores(query)
+    rank = Case(
+        *[When(pk=service_id, then=Value(score)) for service_id, score in scores.items()],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return exact | Q(pk__in=list(scores)), rank
+
+
+# 4. Search
+
+def search_match(queryset, query):
+    """
+    (Q, rank expression) for the services matching the normalized `query`:
+    every word found in the title, description or seller username, in any
+    order, or the whole query similar to the title or seller username,
+    typos included ("wbe developer" finds "Web developer"). The rank is the
+    similarity, 0 to 1.
+
+    Runs queries itself (matching sellers, or loading the fallback trigram
+    index), so async views call it through sync_to_async.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        return _postgres_search(queryset, query)
+    return _fallback_search(queryset, query)
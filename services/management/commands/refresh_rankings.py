@@ -0,0 +1,20 @@
+# services/management/commands/refresh_rankings.py
+
+from django.core.management.base import BaseCommand
+
+from services.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = "Recomputes the precomputed service rankings (top rated, trending, best selling)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Recompute every service instead of only those changed since the last run.",
+        )
+
+    def handle(self, *args, **options):
+        count = refresh_rankings(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed rankings for {count} services."))
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("services", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServiceRanking",
+            fields=[
+                (
+                    "service",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="ranking",
+                        serialize=False,
+                        to="services.service",
+                    ),
+                ),
+                ("review_count", models.PositiveIntegerField(default=0)),
+                ("rating_sum", models.PositiveIntegerField(default=0)),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                ("sales_count", models.PositiveIntegerField(default=0)),
+                ("bayesian_rating", models.FloatField(default=0)),
+                ("trending_score", models.FloatField(default=0)),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="services.category",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-bayesian_rating"], name="ranking_top_rated_idx"
+                    ),
+                    models.Index(
+                        fields=["-trending_score"], name="ranking_trending_idx"
+                    ),
+                    models.Index(
+                        fields=["category", "-sales_count"],
+                        name="ranking_best_selling_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
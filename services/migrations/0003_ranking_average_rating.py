@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("services", "0002_service_ranking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="serviceranking",
+            name="average_rating",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="serviceranking",
+            index=models.Index(
+                fields=["average_rating"], name="ranking_avg_rating_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Case-insensitive search indexes for the admin (PostgreSQL only)
+
+from django.db import migrations
+
+from service_marketplace.migration_operations import upper_like_index
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("services", "0003_ranking_average_rating"),
+    ]
+
+    operations = [
+        upper_like_index("service_title_upper_idx", "services_service", "title"),
+    ]
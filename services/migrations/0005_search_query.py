@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("services", "0004_service_title_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("params", models.CharField(max_length=500, unique=True)),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("last_searched_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name_plural": "Search queries",
+                "indexes": [
+                    models.Index(fields=["-count"], name="search_query_count_idx")
+                ],
+            },
+        ),
+    ]
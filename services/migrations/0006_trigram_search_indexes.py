@@ -0,0 +1,20 @@
+# Trigram indexes for the typo-tolerant catalog search (PostgreSQL only)
+
+from django.db import migrations
+
+from service_marketplace.migration_operations import trigram_extension, trigram_index
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("services", "0005_search_query"),
+    ]
+
+    operations = [
+        trigram_extension(),
+        trigram_index("service_title_trgm_idx", "services_service", "title"),
+        # Serves the exact-word branch (description trigram_contains, i.e. ILIKE) too
+        trigram_index("service_description_trgm_idx", "services_service", "description"),
+    ]
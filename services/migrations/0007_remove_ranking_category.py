@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("services", "0006_trigram_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="serviceranking",
+            name="ranking_best_selling_idx",
+        ),
+        migrations.RemoveField(
+            model_name="serviceranking",
+            name="category",
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("services", "0007_remove_ranking_category"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="serviceranking",
+            name="ranking_avg_rating_idx",
+        ),
+    ]
@@ -1,10 +1,17 @@
 # services/models.py
 
-from django.db import models
+from django.db import models, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.conf import settings # Best practice for referencing AUTH_USER_MODEL
 from django.urls import reverse
 import uuid # For unique, readable URLs/slugs
-from django.db.models import Avg
+from django.core.exceptions import ObjectDoesNotExist
+from service_marketplace import nplusone
+from .caching import bump_catalog_version, bump_category_generation, evict_service_pages
+from invalidation.bus import publish_instance
+from . import categories, typeahead # Subscribe their caches to the invalidation bus
 
 # 1. Service Category
 class Category(models.Model):
@@ -20,19 +27,22 @@ class Category(models.Model):
 # 2. Service Listing
 class Service(models.Model):
     # Foreign Key (Relational Design)
-    seller = models.ForeignKey(
+    seller = nplusone.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE, 
         limit_choices_to={'is_seller': True}, # Only allow sellers
         related_name='services'
     )
-    category = models.ForeignKey(
+    category = nplusone.ForeignKey(
         Category, 
         on_delete=models.SET_NULL, 
         null=True, 
         related_name='services'
     )
 
+    # Tracks objects fetched together (service_marketplace/nplusone.py)
+    objects = nplusone.TrackedManager()
+
     # Core Fields
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True, blank=True)
@@ -56,27 +66,133 @@ class Service(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored URL and category so a save also evicts the
+        # cached pages under the previous ones
+        if 'slug' in field_names and 'category_id' in field_names:
+            instance._loaded_page_keys = (instance.slug, instance.category_id)
+        return instance
+
     def get_absolute_url(self):
         # Use slug in the URL for better SEO and readability
         return reverse('service_detail', kwargs={'slug': self.slug})
 
-    # Helper method for average rating (will be implemented with 'reviews' app)
+    # Rating helpers, read from the per-star counters kept by the 'reviews' app
+    # (select_related('rating_distribution') makes them query-free)
     @property
     def average_rating(self):
-        """Calculates the average rating based on all associated reviews."""
-        # Check if the 'reviews' app is loaded and the Review model is accessible
-        if hasattr(self, 'reviews'):
-            # Use the Avg aggregation function on the 'rating' field
-            avg = self.reviews.aggregate(Avg('rating'))['rating__avg']
-            # Return the average, rounded to one decimal place, or None if no reviews
-            return round(avg, 1) if avg is not None else None
-        return None
-
-    # ADD THIS PROPERTY (Helper for display)
+        """Average rating rounded to one decimal place, or None if no reviews."""
+        distribution = self._rating_distribution()
+        return distribution.average if distribution is not None else None
+
     @property
     def total_reviews(self):
         """Returns the total number of reviews for the service."""
-        return self.reviews.count()
+        distribution = self._rating_distribution()
+        return distribution.total if distribution is not None else 0
+
+    def _rating_distribution(self):
+        # Services without reviews may have no row yet
+        try:
+            return self.rating_distribution
+        except ObjectDoesNotExist:
+            return None
         
     def get_absolute_url(self):
-        return reverse('service_detail', kwargs={'slug': self.slug})
\ No newline at end of file
+        return reverse('service_detail', kwargs={'slug': self.slug})
+
+# 3. Precomputed Rankings
+class ServiceRanking(models.Model):
+    """
+    Denormalized ranking scores for a service, refreshed periodically by the
+    `refresh_rankings` management command (see services/rankings.py).
+    Listing sorts read these precomputed columns instead of aggregating
+    reviews and orders at query time.
+    """
+    service = models.OneToOneField(
+        Service,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking'
+    )
+
+    # Raw counters
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    sales_count = models.PositiveIntegerField(default=0) # Completed orders
+
+    # Scores
+    average_rating = models.FloatField(null=True, blank=True) # None without reviews
+    bayesian_rating = models.FloatField(default=0)
+    trending_score = models.FloatField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-bayesian_rating'], name='ranking_top_rated_idx'),
+            models.Index(fields=['-trending_score'], name='ranking_trending_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ranking for {self.service_id}"
+
+# 4. Search Query Log
+class SearchQuery(models.Model):
+    """
+    How often a search (normalized query string, see services/search_cache.py)
+    was run. The most frequent ones are prewarmed into the result cache.
+    """
+    params = models.CharField(max_length=500, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    last_searched_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Search queries"
+        indexes = [
+            models.Index(fields=['-count'], name='search_query_count_idx'),
+        ]
+
+    def __str__(self):
+        return self.params
+
+# 5. Signals for catalog caches
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Service)
+def bump_catalog_version_on_change(sender, instance, **kwargs):
+    # Bump only once the write is visible to other connections
+    transaction.on_commit(bump_catalog_version)
+
+@receiver([post_save, post_delete], sender=Category)
+def evict_pages_on_category_change(sender, instance, **kwargs):
+    # Categories are listed in the sidebar of every catalog page
+    transaction.on_commit(bump_category_generation)
+
+@receiver([post_save, post_delete], sender=Service)
+def evict_pages_on_service_change(sender, instance, **kwargs):
+    slugs = {instance.slug}
+    category_ids = {instance.category_id}
+    loaded = getattr(instance, '_loaded_page_keys', None)
+    if loaded:
+        slugs.add(loaded[0])
+        category_ids.add(loaded[1])
+    instance._loaded_page_keys = (instance.slug, instance.category_id)
+    transaction.on_commit(lambda: evict_service_pages(slugs, categories.category_slugs(category_ids)))
+
+# 6. Signals for the in-process caches (category registry, typeahead index)
+# Published on the invalidation bus so every process drops or reloads its copy
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Service)
+def publish_catalog_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        publish_instance(instance)
+
+# 7. Database connections: similarity threshold of the fuzzy search (PostgreSQL)
+@receiver(connection_created)
+def configure_fuzzy_search(sender, connection, **kwargs):
+    from .fuzzy import configure_connection # Avoid circular import (rankings -> orders -> services)
+
+    configure_connection(connection)
@@ -0,0 +1,168 @@
+# services/rankings.py
+
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from jobs.watermarks import get_watermark, set_watermark
+from orders.models import Order
+from reviews.models import Review
+from .models import Service, ServiceRanking
+
+# Watermark of the last refresh; a missing value forces a full refresh
+LAST_REFRESH_WATERMARK = 'rankings.last_refresh'
+
+# Decimals the catalog-wide mean rating is rounded to before it enters the
+# Bayesian scores, so a new review elsewhere doesn't rewrite every score
+PRIOR_MEAN_DECIMALS = 2
+
+# Rows per IN (...) batch when recomputing counters
+BATCH_SIZE = 500
+
+# Listing sort options -> ORDER BY on the precomputed ranking columns
+SORT_OPTIONS = [
+    ('newest', 'Newest'),
+    ('top_rated', 'Top Rated'),
+    ('trending', 'Trending'),
+    ('best_selling', 'Best Selling'),
+]
+SORT_ORDERINGS = {
+    'newest': ('-created_at',),
+    'top_rated': (F('ranking__bayesian_rating').desc(nulls_last=True), '-created_at'),
+    'trending': (F('ranking__trending_score').desc(nulls_last=True), '-created_at'),
+    'best_selling': (F('ranking__sales_count').desc(nulls_last=True), '-created_at'),
+}
+
+
+def sort_services(queryset, sort):
+    """
+    Orders a Service queryset by one of SORT_ORDERINGS (unknown values fall
+    back to newest first).
+    """
+    return queryset.order_by(*SORT_ORDERINGS.get(sort, SORT_ORDERINGS['newest']))
+
+
+# --- Refresh ---
+
+def refresh_rankings(full=False, now=None):
+    """
+    Recomputes rankings and returns the number of services refreshed.
+
+    Incremental runs only touch services whose reviews or orders changed
+    since the last run, services without a ranking row yet, and services
+    whose trending window moved. The Bayesian score is then re-derived
+    from the stored counters in a single UPDATE of the rows whose score
+    changed.
+    """
+    now = now or timezone.now()
+    since = None if full else get_watermark(LAST_REFRESH_WATERMARK)
+
+    if since is None:
+        service_ids = set(Service.objects.values_list('pk', flat=True))
+    else:
+        service_ids = _changed_service_ids(since, now)
+
+    service_ids = sorted(service_ids)
+    for start in range(0, len(service_ids), BATCH_SIZE):
+        _refresh_batch(service_ids[start:start + BATCH_SIZE], now)
+
+    _refresh_bayesian_ratings()
+    set_watermark(LAST_REFRESH_WATERMARK, now)
+    return len(service_ids)
+
+
+def refresh_service_rankings(service_ids):
+    """
+    Recomputes the counters of a few services right away, e.g. after a new
+    review, so the sorts reflect it before the next periodic refresh.
+    The Bayesian score catches up on the next `refresh_rankings` run.
+    """
+    _refresh_batch(sorted(set(service_ids)), timezone.now())
+
+
+def _trending_window_start(now):
+    return now - timedelta(days=settings.RANKING_TRENDING_WINDOW_DAYS)
+
+
+def _changed_service_ids(since, now):
+    ids = set(Review.objects.filter(updated_at__gte=since).values_list('service_id', flat=True))
+    ids |= set(Order.objects.filter(updated_at__gte=since).values_list('service_id', flat=True))
+    ids |= set(Service.objects.filter(ranking__isnull=True).values_list('pk', flat=True))
+    # Trending decays with time, so anything inside or leaving the window moves
+    ids |= set(Order.objects.filter(created_at__gte=_trending_window_start(now)).values_list('service_id', flat=True))
+    ids |= set(ServiceRanking.objects.filter(trending_score__gt=0).values_list('service_id', flat=True))
+    return ids
+
+
+def _refresh_batch(service_ids, now):
+    reviews = {
+        row['service_id']: row
+        for row in Review.objects.filter(service_id__in=service_ids)
+        .order_by().values('service_id')
+        .annotate(review_count=Count('id'), rating_sum=Sum('rating'))
+    }
+    orders = {
+        row['service_id']: row
+        for row in Order.objects.filter(service_id__in=service_ids)
+        .order_by().values('service_id')
+        .annotate(order_count=Count('id'), sales_count=Count('id', filter=Q(status='COMPLETED')))
+    }
+
+    # Exponentially decayed order velocity over the trending window
+    half_life = settings.RANKING_TRENDING_HALF_LIFE_DAYS * 86400
+    trending = defaultdict(float)
+    recent = Order.objects.filter(
+        service_id__in=service_ids, created_at__gte=_trending_window_start(now)
+    ).values_list('service_id', 'created_at')
+    for service_id, created_at in recent:
+        age = max((now - created_at).total_seconds(), 0)
+        trending[service_id] += math.pow(0.5, age / half_life)
+
+    rankings = []
+    for service_id in Service.objects.filter(pk__in=service_ids).values_list('pk', flat=True):
+        review_row = reviews.get(service_id, {})
+        order_row = orders.get(service_id, {})
+        review_count = review_row.get('review_count', 0)
+        rating_sum = review_row.get('rating_sum') or 0
+        rankings.append(ServiceRanking(
+            service_id=service_id,
+            review_count=review_count,
+            rating_sum=rating_sum,
+            average_rating=(rating_sum / review_count) if review_count else None,
+            order_count=order_row.get('order_count', 0),
+            sales_count=order_row.get('sales_count', 0),
+            trending_score=round(trending[service_id], 6),
+        ))
+
+    ServiceRanking.objects.bulk_create(
+        rankings,
+        update_conflicts=True,
+        unique_fields=['service'],
+        update_fields=[
+            'review_count', 'rating_sum', 'average_rating',
+            'order_count', 'sales_count', 'trending_score', 'refreshed_at',
+        ],
+    )
+
+
+def _refresh_bayesian_ratings():
+    """
+    bayesian = (C * m + sum of ratings) / (m + number of reviews), where C is
+    the catalog-wide mean rating and m the prior weight. Only rows whose
+    score differs are written: those whose counters changed, or all of them
+    when C moves. Returns the number of rows updated.
+    """
+    totals = ServiceRanking.objects.aggregate(ratings=Sum('rating_sum'), reviews=Sum('review_count'))
+    prior_mean = round(totals['ratings'] / totals['reviews'], PRIOR_MEAN_DECIMALS) if totals['reviews'] else 0.0
+    prior_weight = float(settings.RANKING_BAYES_PRIOR)
+
+    bayesian_rating = (
+        (Value(prior_mean * prior_weight) + Cast(F('rating_sum'), FloatField()))
+        / (Value(prior_weight) + Cast(F('review_count'), FloatField()))
+    )
+    return ServiceRanking.objects.filter(~Q(bayesian_rating=bayesian_rating)).update(bayesian_rating=bayesian_rating)
@@ -0,0 +1,201 @@
+# services/search_cache.py
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import QueryDict
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from jobs.queue import enqueue
+from service_marketplace.cache_tools import get_or_compute, is_fresh, refresh
+from .caching import get_listing_version
+from .rankings import SORT_ORDERINGS
+
+SEARCH_CACHE_PREFIX = 'search'
+
+# One prewarm job at a time, however many saves or process starts ask for it
+PREWARM_JOB_KEY = 'search:prewarm'
+
+# Longer query strings are searched but neither cached nor logged
+MAX_PARAMS_LENGTH = 500
+
+
+# 1. Normalization
+
+def normalize_query(query):
+    """
+    Lowercased, trimmed search words without repeats, sorted: the search
+    matches every word separately, so word order and case don't change
+    the results.
+    """
+    return ' '.join(sorted(set((query or '').lower().split())))
+
+
+def search_params(query, category=None, filters=None, sort=None):
+    """
+    The normalized query string identifying one result list. Every page of
+    a search shares it.
+    """
+    params = [('q', normalize_query(query))]
+    if category is not None:
+        params.append(('category', category.slug))
+    params.extend(sorted((name, str(value)) for name, value in (filters or {}).items()))
+    # Anything else sorts by relevance (services/fuzzy.py)
+    if sort in SORT_ORDERINGS:
+        params.append(('sort', sort))
+    return urlencode(params)
+
+
+# 2. Cached result lists
+
+class SearchResults:
+    """
+    The results of one search as its cached, ordered ids. Paginator reads
+    len() for the result count; a page slice is one in_bulk() of its ids.
+    Pages past the cached ids (very broad searches) are sliced from the
+    search queryset as usual.
+    """
+
+    def __init__(self, ids, total, queryset):
+        self.ids = ids
+        self.total = total
+        self.queryset = queryset
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(self.total)
+        if stop > len(self.ids):
+            return list(self.queryset[start:stop])
+        page_ids = self.ids[start:stop]
+        found = self.queryset.in_bulk(page_ids)
+        # Services deactivated since the list was cached are skipped
+        return [found[pk] for pk in page_ids if pk in found]
+
+
+def _cache_key(params):
+    return '%s:%s' % (SEARCH_CACHE_PREFIX, hashlib.md5(params.encode()).hexdigest())
+
+
+def _compute(queryset):
+    limit = settings.SEARCH_CACHE_MAX_IDS
+    ids = list(queryset.values_list('pk', flat=True)[:limit + 1])
+    total = len(ids) if len(ids) <= limit else queryset.count()
+    return ids[:limit], total
+
+
+def search_results(queryset, params, record=True):
+    """
+    The results of the search `queryset` (filtered and sorted) identified by
+    `params` (see `search_params`), read from the id list cached for the
+    current listing version. A popular search costs one cache read plus one
+    in_bulk() for the page; a miss fetches the ids once for every page.
+    After a catalog change one process recomputes the list while the others
+    keep paging through the previous one.
+
+    With `record` the search is counted in the query log. Views pass it for
+    the first page only: paging through results is not a new search.
+    """
+    if len(params) > MAX_PARAMS_LENGTH:
+        return SearchResults([], queryset.count(), queryset)
+    entry = get_or_compute(
+        'search', _cache_key(params), lambda: _compute(queryset),
+        settings.SEARCH_CACHE_TIMEOUT, version=get_listing_version(),
+    )
+    if record:
+        record_search(params)
+    return SearchResults(*entry, queryset)
+
+
+# 3. Query log
+# Searches are counted in memory and handed to a job every
+# SEARCH_LOG_FLUSH_SECONDS; counts of a process that dies meanwhile are lost.
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record_search(params):
+    global _last_flush
+    with _pending_lock:
+        _pending[params] += 1
+        if time.monotonic() - _last_flush < settings.SEARCH_LOG_FLUSH_SECONDS:
+            return
+        rows = [[logged, count] for logged, count in _pending.items()]
+        _pending.clear()
+        _last_flush = time.monotonic()
+    enqueue('services.record_search_queries', rows=rows)
+
+
+def save_search_counts(rows, now=None):
+    """
+    Adds [[params, count], ...] to the query log.
+    """
+    from .models import SearchQuery
+
+    now = now or timezone.now()
+    for params, count in rows:
+        updated = SearchQuery.objects.filter(params=params).update(count=F('count') + count, last_searched_at=now)
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                SearchQuery.objects.create(params=params, count=count, last_searched_at=now)
+        except IntegrityError:
+            # Logged by another worker meanwhile
+            SearchQuery.objects.filter(params=params).update(count=F('count') + count, last_searched_at=now)
+
+
+# 4. Prewarming
+
+def queue_search_prewarm():
+    """
+    Queues `prewarm_search_cache` a little later, so a burst of catalog
+    changes warms the cache once.
+    """
+    enqueue('services.prewarm_search_cache', key=PREWARM_JOB_KEY, delay=settings.SEARCH_PREWARM_DELAY)
+
+
+def prewarm_search_cache(limit=None):
+    """
+    Fills the result cache of the most frequent searches of the last
+    SEARCH_PREWARM_DAYS days for the current listing version. Returns the
+    number of result lists computed.
+    """
+    from .models import Category, SearchQuery
+    from .views import catalog_base_queryset, filter_services, search_services
+    from .facets import parse_filters
+
+    since = timezone.now() - timedelta(days=settings.SEARCH_PREWARM_DAYS)
+    logged = (
+        SearchQuery.objects.filter(last_searched_at__gte=since)
+        .order_by('-count').values_list('params', flat=True)[:limit or settings.SEARCH_PREWARM_QUERIES]
+    )
+    version = get_listing_version()
+    computed = 0
+    for params in logged:
+        key = _cache_key(params)
+        if is_fresh(key, version):
+            continue
+        values = QueryDict(params)
+        category = None
+        if values.get('category'):
+            category = Category.objects.filter(slug=values['category']).first()
+            if category is None:
+                continue
+        filters = parse_filters(values)
+        searched = search_services(catalog_base_queryset(), values.get('q'), filters)
+        queryset = filter_services(searched, category, values.get('sort'), filters)
+        computed += refresh('search', key, lambda: _compute(queryset), settings.SEARCH_CACHE_TIMEOUT, version)
+    return computed
@@ -0,0 +1,30 @@
+# services/tasks.py
+
+from jobs.queue import task
+from . import rankings, search_cache
+
+
+@task()
+def refresh_service_rankings(service_ids):
+    """
+    Recomputes the ranking counters of the given services (queued by review
+    signals, see reviews/models.py).
+    """
+    rankings.refresh_service_rankings(service_ids)
+
+
+@task()
+def record_search_queries(rows):
+    """
+    Adds the search counts buffered by a web process to the query log.
+    """
+    search_cache.save_search_counts(rows)
+
+
+@task()
+def prewarm_search_cache():
+    """
+    Recomputes the cached results of the most frequent searches (queued
+    after catalog changes and deploys, see services/search_cache.py).
+    """
+    search_cache.prewarm_search_cache()
@@ -1,3 +1,355 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from invalidation.bus import invalidate_all
+from jobs.watermarks import get_watermark
+from orders.models import Order
+from reviews.distribution import distribution_counts
+from reviews.models import Review
+from service_marketplace.cache_tools import _store, is_fresh
+from .facets import apply_filters, facet_counts, rating_band
+from .caching import (
+    CATALOG_VERSION_KEY, anonymous_page_cache, bump_catalog_version, evict_service_pages, get_catalog_version,
+    get_listing_version, normalize_page_params, page_cache_key,
+)
+from .models import Category, Service, ServiceRanking
+from .rankings import LAST_REFRESH_WATERMARK, _refresh_bayesian_ratings, refresh_rankings
+from .views import AsyncServiceDetailView, AsyncServiceListView, is_first_page
+
+
+class AsyncServiceListViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user('webdev', 'webdev@example.com', 'pw', is_seller=True, is_client=False)
+        category = Category.objects.create(name='Web', slug='web')
+        Service.objects.create(
+            seller=seller, category=category, title='Web developer', slug='web-developer',
+            description='Sites and shops', price=100,
+        )
+        Service.objects.create(
+            seller=seller, category=category, title='Logo design', slug='logo-design',
+            description='Brand marks', price=50,
+        )
+
+    def setUp(self):
+        invalidate_all()
+
+    async def get(self, path):
+        request = AsyncRequestFactory().get(path)
+        request.user = AnonymousUser()
+        response = await AsyncServiceListView.as_view()(request)
+        return response.render()
+
+    async def test_search(self):
+        # The search runs ORM queries, which must not happen in the event loop
+        response = await self.get('/?q=developer')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([service.slug for service in response.context_data['services']], ['web-developer'])
+
+    async def test_search_with_typo(self):
+        response = await self.get('/?q=wbe+developer')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('web-developer', [service.slug for service in response.context_data['services']])
+
+    async def test_search_counted_on_first_page_only(self):
+        with mock.patch('services.search_cache.record_search') as record_search:
+            for path in ['/?q=developer', '/?q=developer&page=last']:
+                await cache.aclear()
+                self.assertEqual((await self.get(path)).status_code, 200)
+        self.assertEqual(record_search.call_count, 1)
+
+    async def test_detail(self):
+        request = AsyncRequestFactory().get('/services/web-developer/')
+        request.user = AnonymousUser()
+        # Counting the view would start the flusher thread, which outlives the test database
+        with mock.patch('analytics.pageviews.record_view'):
+            response = await AsyncServiceDetailView.as_view()(request, slug='web-developer')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context_data['service'].slug, 'web-developer')
+
+    def test_is_first_page(self):
+        factory = RequestFactory()
+        for query, first in [('', True), ('?page=', True), ('?page=1', True), ('?page=2', False), ('?page=last', False)]:
+            with self.subTest(query=query):
+                self.assertIs(is_first_page(factory.get('/' + query)), first)
+
+
+class PageCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.renders = 0
+        self.status = 200
+
+    def view(self, request):
+        self.renders += 1
+        return HttpResponse(f'render {self.renders}', status=self.status)
+
+    def get(self, view=None):
+        request = RequestFactory().get('/')
+        request.catalog_cacheable = True
+        request.catalog_version = timezone.now()
+        return anonymous_page_cache(view or self.view)(request)
+
+    def test_served_from_cache(self):
+        self.assertEqual(self.get().content, b'render 1')
+        self.assertEqual(self.get().content, b'render 1')
+        self.assertEqual(self.renders, 1)
+
+    def test_errors_not_cached(self):
+        self.status = 404
+        self.get()
+        self.get()
+        self.assertEqual(self.renders, 2)
+
+    def test_evicted_page_served_stale_while_rerendered(self):
+        self.get()
+        evict_service_pages()
+        self.assertFalse(is_fresh(page_cache_key('/', [])))
+        # Another request holds the lock and renders it again
+        cache.add(page_cache_key('/', []) + ':lock', 1)
+        self.assertEqual(self.get().content, b'render 1')
+        self.assertEqual(self.renders, 1)
+
+    def test_evicted_page_rerendered_by_first_request(self):
+        self.get()
+        evict_service_pages()
+        self.assertEqual(self.get().content, b'render 2')
+        self.assertEqual(self.get().content, b'render 2')
+
+    async def test_async_view(self):
+        async def view(request):
+            return self.view(request)
+
+        request = AsyncRequestFactory().get('/')
+        request.catalog_cacheable = True
+        request.catalog_version = timezone.now()
+        first = await anonymous_page_cache(view)(request)
+        second = await anonymous_page_cache(view)(request)
+        self.assertEqual((first.content, second.content), (b'render 1', b'render 1'))
+
+
+class PageCacheParamsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(name='Web', slug='web')
+
+    def setUp(self):
+        invalidate_all()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_equivalent_urls_share_a_key(self):
+        self.assertEqual(
+            normalize_page_params({'category': 'web', 'min_price': '50.00', 'sort': 'newest', 'page': '01'}),
+            [('category', 'web'), ('min_price', '50')],
+        )
+        self.assertEqual(normalize_page_params({'q': ' logo  design ', 'sort': 'relevance'}), [('q', 'logo design')])
+
+    def test_values_the_view_ignores_are_not_cached(self):
+        for params in [
+            {'category': 'WEB'}, {'category': 'nope'}, {'price': 'bogus'}, {'min_price': 'abc'},
+            {'min_rating': '7'}, {'sort': 'x'}, {'sort': 'relevance'}, {'page': '0'}, {'page': 'abc'},
+        ]:
+            with self.subTest(params=params):
+                self.assertIsNone(normalize_page_params(params))
+
+    def test_unknown_category_page_not_stored_as_the_category(self):
+        response = self.client.get('/?category=WEB')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(page_cache_key('/', normalize_page_params({'category': 'web'}))))
+
+    def test_page_out_of_range_not_stored(self):
+        self.assertEqual(self.client.get('/?page=99999').status_code, 404)
+        self.assertIsNone(cache.get(page_cache_key('/', [('page', '99999')])))
+
+
+class CatalogVersionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_cold_cache_derived_once(self):
+        with self.assertNumQueries(2):
+            version = get_catalog_version()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_catalog_version(), version)
+
+    def test_bump_not_undone_by_a_later_cold_start(self):
+        get_catalog_version()
+        bump_catalog_version()
+        cache.delete(CATALOG_VERSION_KEY)
+        # Derived from the database again, not restored from before the bump
+        with self.assertNumQueries(2):
+            get_catalog_version()
+
+
+class PageEvictionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', is_seller=True, is_client=False)
+        cls.web = Category.objects.create(name='Web', slug='web')
+        cls.design = Category.objects.create(name='Design', slug='design')
+        cls.service = Service.objects.create(
+            seller=cls.seller, category=cls.web, title='Web developer', slug='web-developer',
+            description='Sites', price=100,
+        )
+
+    def setUp(self):
+        # Categories created by setUpTestData were never published (no commit)
+        invalidate_all()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.pages = {
+            'detail': page_cache_key('/services/web-developer/', []),
+            'renamed': page_cache_key('/services/renamed/', []),
+            'home': page_cache_key('/', []),
+            'web': page_cache_key('/', normalize_page_params({'category': 'web'})),
+            'design': page_cache_key('/', normalize_page_params({'category': 'design'})),
+        }
+        for key in self.pages.values():
+            _store(key, (b'page', 'text/html'), 300, None)
+
+    def stale_pages(self):
+        return {name for name, key in self.pages.items() if not is_fresh(key)}
+
+    def test_save_evicts_previous_and_current_pages_without_a_select(self):
+        service = Service.objects.get(pk=self.service.pk)
+        service.slug = 'renamed'
+        service.category = self.design
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            service.save()
+        # The previous slug and category come from the loaded instance
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "services_service"')])
+        self.assertEqual(self.stale_pages(), {'detail', 'renamed', 'home', 'web', 'design'})
+
+    def test_review_evicts_detail_and_listing_pages(self):
+        client = User.objects.create_user('client', 'client@example.com', 'pw')
+        order = Order.objects.create(client=client, seller=self.seller, service=self.service, status='COMPLETED')
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(service=self.service, client=client, order=order, rating=5)
+        self.assertEqual(self.stale_pages(), {'detail', 'home', 'web'})
+
+
+class RankingRefreshTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', is_seller=True, is_client=False)
+        cls.client_user = User.objects.create_user('client', 'client@example.com', 'pw')
+        category = Category.objects.create(name='Web', slug='web')
+        cls.services = [
+            Service.objects.create(
+                seller=cls.seller, category=category, title=f'Service {i}', slug=f'service-{i}',
+                description='Description', price=10,
+            )
+            for i in range(3)
+        ]
+
+    def review(self, service, rating):
+        order = Order.objects.create(client=self.client_user, seller=self.seller, service=service, status='COMPLETED')
+        return Review.objects.create(service=service, client=self.client_user, order=order, rating=rating)
+
+    def test_watermark_kept_in_the_database(self):
+        self.assertIsNone(get_watermark(LAST_REFRESH_WATERMARK))
+        self.assertEqual(refresh_rankings(), 3)
+        self.assertIsNotNone(get_watermark(LAST_REFRESH_WATERMARK))
+        # Survives a cache flush (e.g. another process or host running the command)
+        cache.clear()
+        self.assertEqual(refresh_rankings(), 0)
+
+    def test_incremental_refresh_of_changed_services(self):
+        refresh_rankings()
+        self.review(self.services[0], 5)
+        self.assertEqual(refresh_rankings(), 1)
+        self.assertEqual(ServiceRanking.objects.get(service=self.services[0]).review_count, 1)
+
+    def test_bayesian_update_writes_changed_rows_only(self):
+        self.review(self.services[0], 4)
+        refresh_rankings()
+        self.assertEqual(_refresh_bayesian_ratings(), 0)
+        # The catalog mean stays 4: only the two newly reviewed services move
+        ServiceRanking.objects.filter(service=self.services[1]).update(review_count=1, rating_sum=5)
+        ServiceRanking.objects.filter(service=self.services[2]).update(review_count=1, rating_sum=3)
+        self.assertEqual(_refresh_bayesian_ratings(), 2)
+        ranking = ServiceRanking.objects.get(service=self.services[1])
+        self.assertAlmostEqual(ranking.bayesian_rating, (4.0 * 10 + 5) / (10 + 1))
+
+
+class RatingFacetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', is_seller=True, is_client=False)
+        cls.category = Category.objects.create(name='Web', slug='web')
+        cls.services = [
+            Service.objects.create(
+                seller=cls.seller, category=cls.category, title=f'Service {i}', slug=f'service-{i}',
+                description='Description', price=10,
+            )
+            for i in range(4)
+        ]
+        # Averages shown on the cards: 4.0, 3.9 (3.875 rounded), 2.0, no reviews
+        for service, ratings in zip(cls.services, ([5, 4, 4, 3], [5, 4, 4, 4, 4, 4, 3, 3], [2], [])):
+            for rating in ratings:
+                client = User.objects.create_user(f'client{User.objects.count()}', '', 'pw')
+                order = Order.objects.create(client=client, seller=cls.seller, service=service, status='COMPLETED')
+                Review.objects.create(service=service, client=client, order=order, rating=rating)
+
+    def test_counts_match_the_filter_and_the_shown_averages(self):
+        # No rankings refresh ran: the counts follow the reviews right away
+        queryset = Service.objects.select_related('rating_distribution')
+        counts = {band['stars']: band['count'] for band in facet_counts(queryset, {}, [self.category])['rating']}
+        for stars in (4, 3, 2, 1):
+            shown = [
+                service.slug for service in queryset.order_by('pk')
+                if service.average_rating is not None and service.average_rating >= stars
+            ]
+            filtered = [service.slug for service in apply_filters(queryset, {'min_rating': stars}).order_by('pk')]
+            self.assertEqual(filtered, shown)
+            self.assertEqual(counts[stars], len(shown))
+        self.assertEqual(counts, {4: 1, 3: 2, 2: 3, 1: 3})
+
+    def test_rating_band_matches_the_filter(self):
+        queryset = Service.objects.select_related('rating_distribution').order_by('pk')
+        self.assertEqual([rating_band(distribution_counts(service)) for service in queryset], [4, 3, 2, 0])
+
+    def review(self, service, rating):
+        client = User.objects.create_user(f'client{User.objects.count()}', '', 'pw')
+        order = Order.objects.create(client=client, seller=self.seller, service=service, status='COMPLETED')
+        with self.captureOnCommitCallbacks(execute=True):
+            return Review.objects.create(service=service, client=client, order=order, rating=rating)
+
+    def test_listing_caches_retired_only_when_a_band_changes(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        catalog_version, listing_version = get_catalog_version(), get_listing_version()
+
+        # 4.0 stays 4.0: the pages show a new review count, the facets are unchanged
+        review = self.review(self.services[0], 4)
+        self.assertNotEqual(get_catalog_version(), catalog_version)
+        self.assertEqual(get_listing_version(), listing_version)
+
+        # 4.0 to 3.4
+        with self.captureOnCommitCallbacks(execute=True):
+            review.rating = 1
+            review.save()
+        self.assertNotEqual(get_listing_version(), listing_version)
+
+        # A first review puts the service in the 1+ band at least
+        listing_version = get_listing_version()
+        self.review(self.services[3], 1)
+        self.assertNotEqual(get_listing_version(), listing_version)
@@ -0,0 +1,352 @@
+# services/typeahead.py
+
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import OrderedDict, defaultdict, namedtuple
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from invalidation.bus import poll, subscribe
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+')
+
+# A label is findable from the start of each of its first words, so
+# "logo" suggests "Professional logo design"
+MAX_TERM_WORDS = 8
+# Longer terms and prefixes are cut, which keeps the sorted array small
+MAX_TERM_CHARS = 64
+# Prefixes whose top suggestions are remembered between lookups
+MAX_CACHED_PREFIXES = 50000
+# Prefix lengths answered from a table precomputed at build time
+PRECOMPUTED_PREFIX_CHARS = 3
+
+SERVICE, CATEGORY, SELLER = 'service', 'category', 'seller'
+
+# One suggestion. `slug` is the service/category slug or the seller username.
+Suggestion = namedtuple('Suggestion', 'kind pk label slug weight')
+
+
+def normalize(text):
+    """
+    Lowercased, accent-free words of `text` joined by single spaces.
+    """
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode()
+    return ' '.join(TOKEN_RE.findall(text.lower()))
+
+
+def label_terms(label):
+    words = normalize(label).split(' ')
+    return {' '.join(words[start:])[:MAX_TERM_CHARS] for start in range(min(len(words), MAX_TERM_WORDS))} - {''}
+
+
+def suggestion_url(suggestion):
+    if suggestion.kind == SERVICE:
+        return reverse('service_detail', kwargs={'slug': suggestion.slug})
+    if suggestion.kind == CATEGORY:
+        return f"{reverse('home')}?{urlencode({'category': suggestion.slug})}"
+    return reverse('seller_profile', kwargs={'username': suggestion.slug})
+
+
+def _rank(suggestion):
+    # Most ordered first; shorter labels first among equals
+    return (suggestion.weight, -len(suggestion.label), suggestion.label)
+
+
+# 1. The index
+
+class PrefixIndex:
+    """
+    Typeahead suggestions (service titles, category names and seller
+    usernames) kept in memory in one process.
+
+    Every label is stored under a few normalized terms in one sorted list
+    of (term, kind, pk). A prefix lookup bisects to the range of terms that
+    start with it and keeps the heaviest suggestions, weighted by orders
+    (services by their own, categories and sellers by their services').
+    Results are remembered per prefix (prefixes of up to three characters
+    are precomputed), so the typical lookup is a dictionary hit. Changes
+    patch the remembered results of the prefixes they touch.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.built_at = time.monotonic()
+        self.suggestions = {}
+        self.terms = []
+        self.top = OrderedDict()
+        # Order counts of the active services per category and per seller
+        self.category_services = defaultdict(dict)
+        self.seller_services = defaultdict(dict)
+        self.service_groups = {}
+        self.category_labels = {}
+        self.seller_labels = {}
+        self.lock = threading.Lock()
+
+    # Lookups
+
+    def lookup(self, query, limit=None):
+        prefix = normalize(query)[:MAX_TERM_CHARS]
+        if not prefix:
+            return []
+        with self.lock:
+            top = self.top.get(prefix)
+            if top is None:
+                top = self._scan(prefix)
+                self.top[prefix] = top
+                if len(self.top) > MAX_CACHED_PREFIXES:
+                    self.top.popitem(last=False)
+            return top[:limit or self.limit]
+
+    def _scan(self, prefix):
+        start = bisect_left(self.terms, (prefix,))
+        end = bisect_left(self.terms, (prefix + '\uffff',), start)
+        keys = {(kind, pk) for _, kind, pk in self.terms[start:end]}
+        return heapq.nlargest(self.limit, (self.suggestions[key] for key in keys), key=_rank)
+
+    def precompute(self):
+        """
+        Fills the short-prefix table with one pass over the terms per length.
+        """
+        for length in range(1, PRECOMPUTED_PREFIX_CHARS + 1):
+            groups = defaultdict(set)
+            for term, kind, pk in self.terms:
+                if len(term) >= length:
+                    groups[term[:length]].add((kind, pk))
+            for prefix, keys in groups.items():
+                self.top[prefix] = heapq.nlargest(
+                    self.limit, (self.suggestions[key] for key in keys), key=_rank
+                )
+
+    # Changes
+
+    def _patch(self, key, suggestion, old_terms, new_terms):
+        """
+        Updates the remembered results of the prefixes of the changed terms
+        in place. Only a suggestion that drops in rank (or loses a term)
+        while listed can let an unlisted one in; those prefixes are
+        forgotten and rescanned on their next lookup.
+        """
+        previous = self.suggestions.get(key)
+        prefixes = {term[:length] for term in old_terms | new_terms for length in range(1, len(term) + 1)}
+        for prefix in prefixes:
+            top = self.top.get(prefix)
+            if top is None:
+                continue
+            listed = any((entry.kind, entry.pk) == key for entry in top)
+            matches = suggestion is not None and any(term.startswith(prefix) for term in new_terms)
+            demoted = not matches or (previous is not None and _rank(suggestion) < _rank(previous))
+            if listed and demoted:
+                del self.top[prefix]
+                continue
+            top = [entry for entry in top if (entry.kind, entry.pk) != key]
+            if matches:
+                top.append(suggestion)
+                top.sort(key=_rank, reverse=True)
+            self.top[prefix] = top[:self.limit]
+
+    def _put(self, suggestion):
+        key = (suggestion.kind, suggestion.pk)
+        previous = self.suggestions.get(key)
+        old_terms = label_terms(previous.label) if previous is not None else set()
+        new_terms = label_terms(suggestion.label) if suggestion.weight is not None else set()
+        self._patch(key, suggestion if suggestion.weight is not None else None, old_terms, new_terms)
+        for term in old_terms - new_terms:
+            index = bisect_left(self.terms, (term, *key))
+            if index < len(self.terms) and self.terms[index] == (term, *key):
+                del self.terms[index]
+        for term in new_terms - old_terms:
+            insort(self.terms, (term, *key))
+        if suggestion.weight is None:
+            self.suggestions.pop(key, None)
+        else:
+            self.suggestions[key] = suggestion
+
+    def _remove(self, kind, pk):
+        self._put(Suggestion(kind, pk, '', '', None))
+
+    def _refresh_group(self, kind, pk):
+        groups, labels = (
+            (self.category_services, self.category_labels) if kind == CATEGORY
+            else (self.seller_services, self.seller_labels)
+        )
+        services = groups.get(pk, {})
+        if pk not in labels or (kind == SELLER and not services):
+            # Sellers are suggested while they have an active service
+            self._remove(kind, pk)
+            return
+        name, slug = labels[pk]
+        self._put(Suggestion(kind, pk, name, slug, sum(services.values())))
+
+    def set_service(self, pk, title, slug, seller_id, seller_username, category_id, order_count, active=True):
+        with self.lock:
+            touched = {(SELLER, seller_id), (CATEGORY, category_id)}
+            previous = self.service_groups.pop(pk, None)
+            if previous is not None:
+                old_seller, old_category = previous
+                self.seller_services[old_seller].pop(pk, None)
+                self.category_services[old_category].pop(pk, None)
+                touched |= {(SELLER, old_seller), (CATEGORY, old_category)}
+            if active:
+                self._put(Suggestion(SERVICE, pk, title, slug, order_count))
+                self.service_groups[pk] = (seller_id, category_id)
+                self.seller_services[seller_id][pk] = order_count
+                self.category_services[category_id][pk] = order_count
+                self.seller_labels[seller_id] = (seller_username, seller_username)
+            else:
+                self._remove(SERVICE, pk)
+            for kind, group_id in touched:
+                if group_id is not None:
+                    self._refresh_group(kind, group_id)
+
+    def remove_service(self, pk):
+        self.set_service(pk, '', '', None, '', None, 0, active=False)
+
+    def set_category(self, pk, name, slug):
+        with self.lock:
+            self.category_labels[pk] = (name, slug)
+            self._refresh_group(CATEGORY, pk)
+
+    def remove_category(self, pk):
+        with self.lock:
+            self.category_labels.pop(pk, None)
+            # Its services are left without a category (SET_NULL)
+            for service_id in self.category_services.pop(pk, {}):
+                seller_id, _ = self.service_groups[service_id]
+                self.service_groups[service_id] = (seller_id, None)
+            self._remove(CATEGORY, pk)
+
+
+# 2. Building
+
+def build_index():
+    """
+    Loads every active service, category and selling seller into a new
+    PrefixIndex. Popularity comes from the precomputed ranking counters, so
+    no orders are aggregated here.
+    """
+    from .models import Category, Service
+
+    index = PrefixIndex(settings.TYPEAHEAD_LIMIT)
+    index.category_labels = {pk: (name, slug) for pk, name, slug in Category.objects.values_list('pk', 'name', 'slug')}
+    services = Service.objects.filter(is_active=True).values_list(
+        'pk', 'title', 'slug', 'seller_id', 'seller__username', 'category_id', 'ranking__order_count'
+    )
+    for pk, title, slug, seller_id, username, category_id, order_count in services.iterator(chunk_size=2000):
+        order_count = order_count or 0
+        index.suggestions[(SERVICE, pk)] = Suggestion(SERVICE, pk, title, slug, order_count)
+        index.service_groups[pk] = (seller_id, category_id)
+        index.seller_services[seller_id][pk] = order_count
+        index.category_services[category_id][pk] = order_count
+        index.seller_labels[seller_id] = (username, username)
+    for pk, (name, slug) in index.category_labels.items():
+        index.suggestions[(CATEGORY, pk)] = Suggestion(CATEGORY, pk, name, slug, sum(index.category_services[pk].values()))
+    for pk, (username, _) in index.seller_labels.items():
+        index.suggestions[(SELLER, pk)] = Suggestion(SELLER, pk, username, username, sum(index.seller_services[pk].values()))
+
+    index.terms = sorted(
+        (term, kind, pk)
+        for (kind, pk), suggestion in index.suggestions.items()
+        for term in label_terms(suggestion.label)
+    )
+    index.precompute()
+    return index
+
+
+# 3. The process-wide index
+
+_index = None
+_rebuilding = threading.Lock()
+
+
+def get_index():
+    """
+    This process's index, built on first use.
+    Past TYPEAHEAD_MAX_AGE it is rebuilt in a background thread, which
+    refreshes the popularity weights; lookups keep using the old index
+    meanwhile.
+    """
+    global _index
+    if _index is None:
+        with _rebuilding:
+            if _index is None:
+                poll()
+                _index = build_index()
+    elif time.monotonic() - _index.built_at > settings.TYPEAHEAD_MAX_AGE:
+        _rebuild_soon()
+    return _index
+
+
+def _rebuild_in_background():
+    global _index
+    try:
+        _index = build_index()
+    except Exception:
+        logger.exception("Rebuilding the typeahead index failed")
+        # Retry after another full period
+        _index.built_at = time.monotonic()
+    finally:
+        _rebuilding.release()
+
+
+def suggest(query, limit=None):
+    return get_index().lookup(query, limit)
+
+
+# 4. Incremental updates (changes published on the invalidation bus)
+# Only an index this process has built is updated; one built later reads the
+# change from the database anyway. Changes are reloaded from the database,
+# so the index converges on the committed state whatever the event order.
+
+def _reload_services(keys):
+    if _index is None:
+        return
+    if keys is None:
+        _rebuild_soon()
+        return
+    from .models import Service
+
+    ids = {int(key) for key in keys}
+    rows = Service.objects.filter(pk__in=ids).values_list(
+        'pk', 'title', 'slug', 'seller_id', 'seller__username', 'category_id', 'ranking__order_count', 'is_active'
+    )
+    for pk, title, slug, seller_id, username, category_id, order_count, active in rows:
+        ids.discard(pk)
+        _index.set_service(pk, title, slug, seller_id, username, category_id, order_count or 0, active=active)
+    for pk in ids:
+        # Deleted
+        _index.remove_service(pk)
+
+
+def _reload_categories(keys):
+    if _index is None:
+        return
+    if keys is None:
+        _rebuild_soon()
+        return
+    from .models import Category
+
+    ids = {int(key) for key in keys}
+    for pk, name, slug in Category.objects.filter(pk__in=ids).values_list('pk', 'name', 'slug'):
+        ids.discard(pk)
+        _index.set_category(pk, name, slug)
+    for pk in ids:
+        _index.remove_category(pk)
+
+
+def _rebuild_soon():
+    # Lookups keep using the current index until the rebuild finishes
+    if _index is not None and _rebuilding.acquire(blocking=False):
+        threading.Thread(target=_rebuild_in_background, daemon=True).start()
+
+
+subscribe('services.Service', _reload_services)
+subscribe('services.Category', _reload_categories)
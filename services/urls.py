@@ -1,12 +1,21 @@
 # services/urls.py
 
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI the async catalog views let one worker serve many slow clients
+if settings.ASYNC_CATALOG_VIEWS:
+    ListView, DetailView = views.AsyncServiceListView, views.AsyncServiceDetailView
+else:
+    ListView, DetailView = views.ServiceListView, views.ServiceDetailView
+
 urlpatterns = [
     # Client Facing
-    path('', views.ServiceListView.as_view(), name='home'), # Home Page
-    path('services/<slug:slug>/', views.ServiceDetailView.as_view(), name='service_detail'),
+    path('', ListView.as_view(), name='home'), # Home Page
+    path('services/<slug:slug>/', DetailView.as_view(), name='service_detail'),
+    # Search box typeahead (in-memory prefix index)
+    path('search/suggest/', views.service_suggestions, name='service_suggestions'),
     
     # Seller CRUD (Create, Read, Update, Delete)
     path('seller/services/create/', views.ServiceCreateView.as_view(), name='service_create'),
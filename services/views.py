@@ -1,14 +1,32 @@
 # services/views.py
 
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.core.paginator import Paginator, InvalidPage
+from django.http import Http404, JsonResponse
+from django.template.response import TemplateResponse
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
 from django.contrib import messages
-from django.db.models import Q # For searching
-from django.db.models import Avg
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_GET
+from analytics.pageviews import count_service_views
+from recommendations.lookup import group_by_kind, recommended_services
+from recommendations.models import ServiceRecommendation
+from reviews.listing import first_review_page, rating_histogram
 from .models import Service, Category
 from .forms import ServiceForm
+from .caching import catalog_http_cache, anonymous_page_cache
+from .categories import all_categories, category_by_slug
+from .rankings import SORT_OPTIONS, sort_services
+from .facets import apply_filters, cached_facet_counts, parse_filters
+from .fuzzy import RELEVANCE, search_match
+from .search_cache import SearchResults, normalize_query, search_params, search_results
+from .typeahead import suggest, suggestion_url
 import uuid
 
 # --- Helper Mixin for Sellers ---
@@ -20,8 +38,87 @@ class SellerRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
     def test_func(self):
         return self.request.user.is_authenticated and self.request.user.is_seller
 
+# --- Shared Catalog Helpers ---
+
+SEARCH_SORT_OPTIONS = [(RELEVANCE, 'Best match')] + SORT_OPTIONS
+
+def search_services(queryset, query=None, filters=None):
+    """
+    Applies the catalog search plus the price, rating and seller filters.
+    The category filter is kept separate because it is also a facet.
+    """
+    # 1. Search Logic (Q objects): every word found somewhere, in any order,
+    # or the whole query similar to the title or seller username (typo
+    # tolerant, see services/fuzzy.py). Ranked by that similarity.
+    query = normalize_query(query)
+    if query:
+        match, rank = search_match(queryset, query)
+        queryset = queryset.filter(match).annotate(search_rank=rank)
+
+    # 2. Seller filter (the facet filters are applied by filter_services)
+    if filters and 'seller' in filters:
+        queryset = queryset.filter(seller__username=filters['seller'])
+    return queryset
+
+def filter_services(queryset, category=None, sort=None, filters=None):
+    """
+    Applies the category and facet filters and the sort order on top of
+    `search_services`. Shared by the sync and async listing views.
+    """
+    # 1. Filtering by Category
+    if category is not None:
+        queryset = queryset.filter(category=category)
+
+    # 2. Price/rating facets
+    if filters:
+        queryset = apply_filters(queryset, filters)
+
+    # 3. Sorting: searches default to the best matches first, everything
+    # else to the precomputed rankings
+    if 'search_rank' in queryset.query.annotations and sort in (None, '', RELEVANCE):
+        return queryset.order_by('-search_rank', '-created_at')
+    return sort_services(queryset, sort)
+
+def catalog_base_queryset():
+    # The rating distribution backs service.average_rating on the cards
+    return Service.objects.filter(is_active=True).select_related('seller', 'category', 'rating_distribution')
+
+def listing_context(categories, facets, category, query, sort, filters):
+    """
+    Sidebar/search context shared by the sync and async listing views.
+    """
+    return {
+        'category_facets': [(cat, facets['categories'].get(cat.pk, 0)) for cat in categories],
+        'facets': facets,
+        'current_category': category,
+        'query': query,
+        'sort': sort or (RELEVANCE if normalize_query(query) else ''),
+        # "Best match" only means something for a search
+        'sort_options': SEARCH_SORT_OPTIONS if normalize_query(query) else SORT_OPTIONS,
+        'filters': filters,
+    }
+
+def review_context(reviews, next_cursor, histogram):
+    """
+    Reviews block context shared by the sync and async detail views: the
+    first batch of reviews, the cursor for the next one and the cached
+    rating histogram (which also provides the average and total), both read
+    from the service's rating distribution.
+    """
+    context = {'reviews': reviews, 'next_review_cursor': next_cursor}
+    context.update(histogram)
+    return context
+
+def recommendation_context(rows):
+    grouped = group_by_kind(rows)
+    return {
+        'also_ordered': grouped[ServiceRecommendation.ALSO_ORDERED],
+        'similar_services': grouped[ServiceRecommendation.SIMILAR],
+    }
+
 # --- Client Facing Views (Browse/Search) ---
 
+@method_decorator([catalog_http_cache, anonymous_page_cache], name='dispatch')
 class ServiceListView(ListView):
     """
     Home page/Service listing with search, filtering, and pagination.
@@ -32,58 +129,194 @@ class ServiceListView(ListView):
     paginate_by = 12 # Pagination
 
     def get_queryset(self):
-        queryset = super().get_queryset().filter(is_active=True)
-        
-        # 1. Search Logic (Q objects)
-        query = self.request.GET.get('q')
-        if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(seller__username__icontains=query)
-            ).distinct()
-
-        # 2. Filtering by Category
+        self.category = None
         category_slug = self.request.GET.get('category')
         if category_slug:
-            try:
-                category = Category.objects.get(slug=category_slug)
-                queryset = queryset.filter(category=category)
-                self.category = category
-            except Category.DoesNotExist:
-                pass # Ignore if category slug is invalid
+            # Ignore if category slug is invalid
+            self.category = category_by_slug(category_slug)
 
+        self.filters = parse_filters(self.request.GET)
+        query, sort = self.request.GET.get('q'), self.request.GET.get('sort')
+        self.searched = search_services(catalog_base_queryset(), query, self.filters)
+        queryset = filter_services(self.searched, self.category, sort, self.filters)
+        if normalize_query(query):
+            # Searches page through their cached id list
+            return search_results(
+                queryset, search_params(query, self.category, self.filters, sort),
+                record=is_first_page(self.request),
+            )
         return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Pass all categories for the filter sidebar
-        context['categories'] = Category.objects.all()
-        context['current_category'] = getattr(self, 'category', None)
-        context['query'] = self.request.GET.get('q', '')
+        query = self.request.GET.get('q', '')
+
+        # Pass all categories and their facet counts for the filter sidebar
+        categories = all_categories()
+        facets = cached_facet_counts(self.searched, self.filters, categories, self.category, query)
+        context['categories'] = categories
+        context.update(listing_context(
+            categories, facets, self.category, query, self.request.GET.get('sort', ''), self.filters
+        ))
         return context
 
+@method_decorator([count_service_views, catalog_http_cache, anonymous_page_cache], name='dispatch')
 class ServiceDetailView(DetailView):
     model = Service
     template_name = 'services/service_detail.html'
     context_object_name = 'service'
 
+    def get_queryset(self):
+        # The rating distribution provides the average and the histogram
+        return Service.objects.select_related('seller', 'category', 'rating_distribution')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         service = self.object
 
-        # Fetch all related reviews, sorted by creation date
-        context['reviews'] = service.reviews.all() 
-        
-        # The average_rating is calculated via the @property in the model, 
-        # but we can explicitly pass it if needed, though it's available via service.average_rating
-        # context['average_rating'] = service.average_rating 
+        # Only the newest reviews are rendered (cached per service); the rest
+        # load through the cursor endpoint (reviews/views.py)
+        reviews, next_cursor = first_review_page(service.pk)
+        context.update(review_context(reviews, next_cursor, rating_histogram(service)))
+        context['categories'] = all_categories()
+
+        # Precomputed "clients also ordered" and "similar services" lists:
+        # one indexed lookup, no text comparison at request time
+        context.update(recommendation_context(recommended_services(service.pk)))
         
-        # Check if the current user is the seller of this service
-        context['is_seller'] = self.request.user == service.seller
+        # Per-user bits (seller/client actions) are resolved from request.user
+        # in the template, so the anonymous page stays identical for everyone.
         
         return context
 
+@require_GET
+def service_suggestions(request):
+    """
+    Typeahead for the search box: the most ordered services, categories and
+    sellers whose names contain a word starting with `q`. Answered from the
+    in-memory prefix index (services/typeahead.py) without touching the
+    database.
+    """
+    suggestions = [
+        {'kind': suggestion.kind, 'label': suggestion.label, 'url': suggestion_url(suggestion)}
+        for suggestion in suggest(request.GET.get('q', ''))
+    ]
+    response = JsonResponse({'suggestions': suggestions})
+    # The same for every visitor; a short max-age absorbs repeated keystrokes
+    patch_cache_control(response, public=True, max_age=settings.TYPEAHEAD_CACHE_SECONDS)
+    return response
+
+# --- Async Catalog Views (served under ASGI) ---
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+async def apaginate(request, queryset, per_page):
+    """
+    Async counterpart of ListView pagination: returns (paginator, page) with
+    the page's objects already fetched through the async ORM.
+    """
+    if isinstance(queryset, SearchResults):
+        return await sync_to_async(paginate)(request, queryset, per_page)
+
+    paginator = Paginator(queryset, per_page)
+    # Prime Paginator.count (a cached_property) so it never runs a sync COUNT
+    paginator.count = await queryset.acount()
+    page = _page(request, paginator)
+    page.object_list = [obj async for obj in page.object_list]
+    return paginator, page
+
+def paginate(request, object_list, per_page):
+    """
+    Sync pagination of cached search results; the page is fetched here.
+    """
+    paginator = Paginator(object_list, per_page)
+    page = _page(request, paginator)
+    page.object_list = list(page.object_list)
+    return paginator, page
+
+def is_first_page(request):
+    # Only the first page of a search counts in the query log
+    return (request.GET.get('page') or '1') == '1'
+
+def _page(request, paginator):
+    page_number = request.GET.get('page') or 1
+    if page_number == 'last':
+        page_number = paginator.num_pages
+    try:
+        return paginator.page(page_number)
+    except InvalidPage as e:
+        raise Http404(f"Invalid page ({page_number}): {e}")
+
+@method_decorator([catalog_http_cache, anonymous_page_cache], name='get')
+class AsyncServiceListView(View):
+    """
+    Async variant of ServiceListView using the async ORM.
+    """
+    template_name = ServiceListView.template_name
+    paginate_by = ServiceListView.paginate_by
+
+    async def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '')
+        sort = request.GET.get('sort', '')
+        # Categories come from the in-process registry (services/categories.py)
+        categories = await sync_to_async(all_categories)()
+        category = None
+        category_slug = request.GET.get('category')
+        if category_slug:
+            category = category_by_slug(category_slug, categories)
+
+        filters = parse_filters(request.GET)
+        # Searching queries the matching sellers (or the trigram index) first
+        searched = await sync_to_async(search_services)(catalog_base_queryset(), query, filters)
+        queryset = filter_services(searched, category, sort, filters)
+        if normalize_query(query):
+            queryset = await sync_to_async(search_results)(
+                queryset, search_params(query, category, filters, sort), record=is_first_page(request),
+            )
+
+        paginator, page = await apaginate(request, queryset, self.paginate_by)
+        facets = await sync_to_async(cached_facet_counts)(searched, filters, categories, category, query)
+
+        context = {
+            'services': page.object_list,
+            'object_list': page.object_list,
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'categories': categories,
+        }
+        context.update(listing_context(categories, facets, category, query, sort, filters))
+        return TemplateResponse(request, self.template_name, context)
+
+@method_decorator([count_service_views, catalog_http_cache, anonymous_page_cache], name='get')
+class AsyncServiceDetailView(View):
+    """
+    Async variant of ServiceDetailView. The ORM calls made through
+    sync_to_async share one thread (the one holding the connection), so
+    they are awaited in turn rather than gathered.
+    """
+    template_name = ServiceDetailView.template_name
+
+    async def get(self, request, slug, *args, **kwargs):
+        service = await aget_object_or_404(
+            Service.objects.select_related('seller', 'category', 'rating_distribution'), slug=slug
+        )
+
+        reviews, next_cursor = await sync_to_async(first_review_page)(service.pk)
+        categories = await sync_to_async(all_categories)()
+        recommendations = await alist(recommended_services(service.pk))
+        histogram = rating_histogram(service)
+
+        context = {
+            'service': service,
+            'object': service,
+            'categories': categories,
+        }
+        context.update(recommendation_context(recommendations))
+        context.update(review_context(reviews, next_cursor, histogram))
+        return TemplateResponse(request, self.template_name, context)
+
 # --- Seller CRUD Views ---
 
 class ServiceCreateView(SellerRequiredMixin, CreateView):
@@ -162,7 +395,7 @@ class MyServicesListView(SellerRequiredMixin, ListView):
 
     def get_queryset(self):
         # Filter services only for the logged-in seller
-        return Service.objects.filter(seller=self.request.user).order_by('-created_at')
+        return Service.objects.filter(seller=self.request.user).select_related('category').order_by('-created_at')
 
 # --- Admin Customization Helper (for initial setup) ---
 
@@ -3,17 +3,27 @@
  * ---------------------------------------
  * Initializes Chart.js visualizations for the dashboard.
  * Requires Chart.js library to be loaded first.
+ *
+ * Series data comes from the analytics endpoint named in a
+ * [data-series-url] element; [data-series-range] buttons switch between
+ * the 30 day, 90 day and 1 year ranges.
  */
 
 document.addEventListener('DOMContentLoaded', function() {
-    
+
+    const STATUS_LABELS = ['Completed', 'In Progress', 'Pending', 'Cancelled'];
+    const STATUS_KEYS = ['COMPLETED', 'IN_PROGRESS', 'PENDING', 'CANCELLED'];
+
+    let orderStatusChart = null;
+    let earningsTrendChart = null;
+
+
     // --- 1. Order Status Distribution Chart (Doughnut Chart) ---
 
     const orderStatusChartCtx = document.getElementById('orderStatusChart');
     if (orderStatusChartCtx) {
-        // Data is assumed to be passed via Django template variables and accessible in the DOM
+        // All-time totals rendered by the view, replaced once a range is loaded
         // Example: data-pending="5", data-in-progress="8", data-completed="12", data-cancelled="3"
-        
         const dataElement = orderStatusChartCtx.closest('[data-order-stats]');
         if (dataElement) {
             const pending = parseInt(dataElement.dataset.pending) || 0;
@@ -22,12 +32,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const cancelled = parseInt(dataElement.dataset.cancelled) || 0;
 
             const data = {
-                labels: [
-                    'Completed',
-                    'In Progress',
-                    'Pending',
-                    'Cancelled'
-                ],
+                labels: STATUS_LABELS,
                 datasets: [{
                     data: [completed, inProgress, pending, cancelled],
                     backgroundColor: [
@@ -40,7 +45,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 }]
             };
 
-            new Chart(orderStatusChartCtx, {
+            orderStatusChart = new Chart(orderStatusChartCtx, {
                 type: 'doughnut',
                 data: data,
                 options: {
@@ -61,50 +66,118 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
 
-    // --- 2. Monthly Earnings Trend Chart (Line Chart) ---
+    // --- 2. Earnings & Order Volume Trend Chart (Line Chart) ---
 
     const earningsTrendChartCtx = document.getElementById('earningsTrendChart');
     if (earningsTrendChartCtx) {
-        // Data is assumed to be passed via Django template variables
-        // Example: data-months="['Jan', 'Feb', 'Mar']", data-earnings="[1200, 1900, 3000]"
-        
-        const dataElement = earningsTrendChartCtx.closest('[data-earnings-data]');
-        if (dataElement) {
-            // These would be JSON strings passed from the view, so parse them
-            const months = JSON.parse(dataElement.dataset.months); 
-            const earnings = JSON.parse(dataElement.dataset.earnings);
-
-            const data = {
-                labels: months,
-                datasets: [{
-                    label: 'Monthly Earnings ($)',
-                    data: earnings,
-                    borderColor: '#007bff', // Primary Blue
-                    backgroundColor: 'rgba(0, 123, 255, 0.1)',
-                    tension: 0.3,
-                    fill: true
-                }]
-            };
+        const data = {
+            labels: [],
+            datasets: [{
+                label: 'Earnings ($)',
+                data: [],
+                borderColor: '#007bff', // Primary Blue
+                backgroundColor: 'rgba(0, 123, 255, 0.1)',
+                tension: 0.3,
+                fill: true,
+                yAxisID: 'y'
+            }, {
+                label: 'Orders Placed',
+                data: [],
+                borderColor: '#6c757d', // Secondary Grey
+                backgroundColor: 'rgba(108, 117, 125, 0.1)',
+                tension: 0.3,
+                yAxisID: 'orders'
+            }]
+        };
 
-            new Chart(earningsTrendChartCtx, {
-                type: 'line',
-                data: data,
-                options: {
-                    responsive: true,
-                    maintainAspectRatio: false,
-                    plugins: {
-                        title: {
-                            display: true,
-                            text: 'Last 6 Months Earnings Trend'
-                        }
+        earningsTrendChart = new Chart(earningsTrendChartCtx, {
+            type: 'line',
+            data: data,
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'Earnings Trend'
+                    }
+                },
+                scales: {
+                    y: {
+                        beginAtZero: true
                     },
-                    scales: {
-                        y: {
-                            beginAtZero: true
+                    orders: {
+                        beginAtZero: true,
+                        position: 'right',
+                        grid: {
+                            drawOnChartArea: false
+                        },
+                        ticks: {
+                            precision: 0
                         }
                     }
                 }
+            }
+        });
+    }
+
+
+    // --- 3. Loading a range from the analytics endpoint ---
+
+    const seriesElement = document.querySelector('[data-series-url]');
+    if (!seriesElement) {
+        return;
+    }
+    const seriesUrl = seriesElement.dataset.seriesUrl;
+    const rangeButtons = seriesElement.querySelectorAll('[data-series-range]');
+
+    function rangeTitle(series) {
+        return series.bucket === 'month' ? 'Monthly Earnings (last year)' : 'Daily Earnings (last ' + series.days + ' days)';
+    }
+
+    function loadSeries(days) {
+        fetch(seriesUrl + '?days=' + encodeURIComponent(days), {
+            credentials: 'same-origin',
+            headers: { 'Accept': 'application/json' }
+        })
+            .then(function(response) {
+                if (!response.ok) {
+                    throw new Error('Analytics request failed: ' + response.status);
+                }
+                return response.json();
+            })
+            .then(function(series) {
+                if (earningsTrendChart) {
+                    earningsTrendChart.data.labels = series.labels;
+                    earningsTrendChart.data.datasets[0].data = series.revenue;
+                    earningsTrendChart.data.datasets[1].data = series.orders;
+                    earningsTrendChart.options.plugins.title.text = rangeTitle(series);
+                    earningsTrendChart.update();
+                }
+                if (orderStatusChart) {
+                    orderStatusChart.data.datasets[0].data = STATUS_KEYS.map(function(key) {
+                        return series.status_totals[key] || 0;
+                    });
+                    orderStatusChart.options.plugins.title.text = 'Order Status (last ' + series.days + ' days)';
+                    orderStatusChart.update();
+                }
+            })
+            .catch(function(error) {
+                console.error(error);
             });
-        }
     }
-});
\ No newline at end of file
+
+    rangeButtons.forEach(function(button) {
+        button.addEventListener('click', function() {
+            rangeButtons.forEach(function(other) {
+                other.classList.toggle('active', other === button);
+            });
+            loadSeries(button.dataset.seriesRange);
+        });
+    });
+
+    const activeButton = seriesElement.querySelector('[data-series-range].active') || rangeButtons[0];
+    if (activeButton) {
+        loadSeries(activeButton.dataset.seriesRange);
+    }
+});
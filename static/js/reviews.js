@@ -0,0 +1,40 @@
+/*
+ * Service-Marketplace/static/js/reviews.js
+ * ----------------------------------------
+ * "Load more reviews" on the service page. The button carries the endpoint
+ * ([data-reviews-url]) and the cursor of the next batch ([data-cursor]);
+ * each response appends its list items and hands back the following cursor.
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+
+    document.querySelectorAll('[data-reviews-url]').forEach(function(button) {
+        const list = document.querySelector(button.dataset.target);
+
+        button.addEventListener('click', function() {
+            button.disabled = true;
+            const url = button.dataset.reviewsUrl + '?cursor=' + encodeURIComponent(button.dataset.cursor);
+
+            fetch(url, { headers: { 'Accept': 'application/json' } })
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error('Reviews request failed: ' + response.status);
+                    }
+                    return response.json();
+                })
+                .then(data => {
+                    list.insertAdjacentHTML('beforeend', data.html);
+                    if (data.next) {
+                        button.dataset.cursor = data.next;
+                        button.disabled = false;
+                    } else {
+                        button.remove();
+                    }
+                })
+                .catch(error => {
+                    console.error(error);
+                    button.disabled = false;
+                });
+        });
+    });
+});
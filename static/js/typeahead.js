@@ -0,0 +1,86 @@
+/*
+ * Service-Marketplace/static/js/typeahead.js
+ * ------------------------------------------
+ * Suggestions under the catalog search box. The input carries the endpoint
+ * ([data-suggest-url]); each pause in typing fetches the top services,
+ * categories and sellers for the text so far and lists them as links.
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+
+    const KIND_LABELS = { service: 'Service', category: 'Category', seller: 'Seller' };
+    const DELAY_MS = 120;
+
+    document.querySelectorAll('[data-suggest-url]').forEach(function(input) {
+        const menu = document.createElement('div');
+        menu.className = 'list-group position-absolute w-100 shadow-sm d-none';
+        menu.style.top = '100%';
+        menu.style.zIndex = 1050;
+        // Hung under the whole form so the input group keeps its layout
+        const form = input.form;
+        form.classList.add('position-relative');
+        form.appendChild(menu);
+
+        let timer = null;
+        let latest = '';
+
+        function hide() {
+            menu.classList.add('d-none');
+            menu.replaceChildren();
+        }
+
+        function show(suggestions) {
+            menu.replaceChildren(...suggestions.map(function(suggestion) {
+                const item = document.createElement('a');
+                item.className = 'list-group-item list-group-item-action d-flex justify-content-between';
+                item.href = suggestion.url;
+                item.textContent = suggestion.label;
+                const kind = document.createElement('small');
+                kind.className = 'text-muted ms-3';
+                kind.textContent = KIND_LABELS[suggestion.kind] || '';
+                item.appendChild(kind);
+                return item;
+            }));
+            menu.classList.toggle('d-none', suggestions.length === 0);
+        }
+
+        input.addEventListener('input', function() {
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (!query) {
+                hide();
+                return;
+            }
+            timer = setTimeout(function() {
+                latest = query;
+                fetch(input.dataset.suggestUrl + '?q=' + encodeURIComponent(query), {
+                    headers: { 'Accept': 'application/json' }
+                })
+                    .then(response => {
+                        if (!response.ok) {
+                            throw new Error('Suggestions request failed: ' + response.status);
+                        }
+                        return response.json();
+                    })
+                    .then(data => {
+                        // Ignore answers to text the user has typed past
+                        if (query === latest) {
+                            show(data.suggestions);
+                        }
+                    })
+                    .catch(error => console.error(error));
+            }, DELAY_MS);
+        });
+
+        input.addEventListener('keydown', function(event) {
+            if (event.key === 'Escape') {
+                hide();
+            }
+        });
+        document.addEventListener('click', function(event) {
+            if (!form.contains(event.target)) {
+                hide();
+            }
+        });
+    });
+});